@@ -1,19 +1,59 @@
 # backend/app/api/documents.py
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 import os
 import uuid
 import hashlib
 import shutil
+import tempfile
+import aiofiles
+from typing import Tuple
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from python_multipart.exceptions import MultipartParseError
 
 from app.core.config import settings
 from app.core.database import get_database
-from app.services.parser import IPDParser
+from app.services.job_queue import JobQueue
+from app.services.dedup import (
+    find_parsed_duplicate,
+    find_inflight_duplicate,
+    complete_from_source,
+    release_waiting_duplicates
+)
+from app.services.ingest import mark_document_failed, request_reparse
+from app.services.app_state import mark_data_changed
+from app.services.response_cache import cached_json
+from app.services.streaming import ndjson_response, wants_ndjson
 from app.models.document import DocumentModel
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
+# Boundaries and part headers around the file in an upload body
+MULTIPART_OVERHEAD = 16 * 1024
+
+# The upload body is parsed by hand (save_upload_stream), so describe it for the API docs
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "required": ["file"],
+            "properties": {"file": {"type": "string", "format": "binary"}}
+        }}}
+    }
+}
+
+
+def get_job_queue(db: AsyncIOMotorDatabase = Depends(get_database)) -> JobQueue:
+    return JobQueue(
+        db,
+        max_attempts=settings.PARSE_JOB_MAX_ATTEMPTS,
+        retry_backoff_seconds=settings.PARSE_JOB_RETRY_BACKOFF_SECONDS,
+        lease_seconds=settings.PARSE_JOB_LEASE_SECONDS
+    )
+
 @router.get("/")
 async def list_documents(
     limit: int = 50,
@@ -35,70 +75,106 @@ async def list_documents(
         "skip": skip
     }
 
-@router.post("/upload")
+@router.post("/upload", openapi_extra=UPLOAD_REQUEST_BODY)
 async def upload_document(
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(...),
+    request: Request,
     doc_type: str = "IPD",
     aircraft_model: str = "787-8",
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    priority: int = 0,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    job_queue: JobQueue = Depends(get_job_queue)
 ):
     """
     Upload IPD PDF document for parsing
     Phase 1: Simple upload and store
     """
-    # Validate file
-    if not file.filename.endswith('.pdf'):
-        raise HTTPException(400, "Only PDF files are supported")
-    
     # Generate document ID
     document_id = str(uuid.uuid4())
     
-    # Save file
-    pdf_filename = f"{document_id}.pdf"
-    pdf_path = os.path.join(settings.UPLOAD_DIR, pdf_filename)
-    
-    # Ensure upload directory exists
-    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-    
-    # Save file
-    content = await file.read()
-    with open(pdf_path, "wb") as f:
-        f.write(content)
-    
-    # Calculate file hash
-    file_hash = hashlib.sha256(content).hexdigest()
+    # Stream the body to a temp file in UPLOAD_DIR, hashing and size-checking as we go
+    filename, tmp_path, file_hash, size_bytes = await save_upload_stream(request, settings.UPLOAD_DIR)
     
-    # Create document record
-    document = {
-        "document_id": document_id,
-        "document_type": doc_type,
-        "document_number": file.filename.replace('.pdf', ''),
-        "revision": "unknown",
-        "aircraft_model": aircraft_model,
-        "source_pdf_path": pdf_path,
-        "file_hash": file_hash,
-        "uploaded_at": datetime.utcnow(),
-        "parsing_status": "pending",
-        "parts_count": 0
-    }
+    try:
+        # Create document record
+        document = {
+            "document_id": document_id,
+            "document_type": doc_type,
+            "document_number": filename.replace('.pdf', ''),
+            "revision": "unknown",
+            "aircraft_model": aircraft_model,
+            "file_hash": file_hash,
+            "uploaded_at": datetime.utcnow(),
+            "parsing_status": "pending",
+            "parts_count": 0
+        }
+        
+        response = {
+            "document_id": document_id,
+            "status": "queued",
+            "cached": False,
+            "filename": filename,
+            "size_bytes": size_bytes
+        }
+        
+        pdf_path = os.path.join(settings.UPLOAD_DIR, f"{document_id}.pdf")
+        
+        for _ in range(3):
+            # Same content already parsed: reuse its parts, no parse needed
+            source = await find_parsed_duplicate(db, file_hash)
+            if source:
+                document["source_pdf_path"] = source.get("source_pdf_path")
+                document["dedup_of"] = source["document_id"]
+                await db.documents.insert_one(document)
+                await complete_from_source(db, document_id, source)
+                
+                response.update({"status": "completed", "cached": True, "dedup_of": source["document_id"]})
+                return response
+            
+            # Same content currently parsing: join that parse instead of starting another
+            inflight = await find_inflight_duplicate(db, file_hash)
+            if inflight:
+                document["source_pdf_path"] = inflight.get("source_pdf_path")
+                document["dedup_of"] = inflight["document_id"]
+                await db.documents.insert_one(document)
+                await mark_data_changed(db, [])  # document counts in cached statistics
+                
+                # The source may have finished while we were inserting
+                await release_waiting_duplicates(db, inflight["document_id"])
+                
+                response.update({"status": "joined", "cached": True, "dedup_of": inflight["document_id"]})
+                return response
+            
+            # Claim the parse: the unique inflight_hash index (migration 020) admits one
+            # original per content, a concurrent upload of the same file goes round again
+            try:
+                await db.documents.insert_one(
+                    {**document, "source_pdf_path": pdf_path, "inflight_hash": file_hash}
+                )
+                break
+            except DuplicateKeyError:
+                continue
+        else:
+            raise HTTPException(409, "The same file is being uploaded concurrently, please retry")
+        
+        # Move the finished upload into place
+        try:
+            os.replace(tmp_path, pdf_path)
+        except OSError:
+            await db.documents.delete_one({"document_id": document_id})
+            raise
+        
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
     
-    await db.documents.insert_one(document)
+    await mark_data_changed(db, [])  # document counts in cached statistics
     
-    # Trigger parsing in background
-    background_tasks.add_task(
-        parse_document_background,
-        document_id=document_id,
-        pdf_path=pdf_path,
-        db=db
-    )
+    # Queue parsing for the worker process (python -m app.worker)
+    job = await job_queue.enqueue(document_id, pdf_path, priority=priority)
     
-    return {
-        "document_id": document_id,
-        "status": "queued",
-        "filename": file.filename,
-        "size_bytes": len(content)
-    }
+    response["job_id"] = job["job_id"]
+    response["queue_position"] = await job_queue.position(job)
+    return response
 
 @router.get("/{document_id}")
 async def get_document(
@@ -119,7 +195,8 @@ async def get_document(
 @router.get("/{document_id}/status")
 async def get_document_status(
     document_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    job_queue: JobQueue = Depends(get_job_queue)
 ):
     """Get parsing status"""
     document = await db.documents.find_one({"document_id": document_id})
@@ -127,104 +204,226 @@ async def get_document_status(
     if not document:
         raise HTTPException(404, "Document not found")
     
-    return {
+    pages_done = document.get("pages_done", 0)
+    pages_total = document.get("pages_total")
+    
+    result = {
         "document_id": document_id,
         "status": document.get("parsing_status"),
         "parts_count": document.get("parts_count", 0),
-        "uploaded_at": document.get("uploaded_at")
+        "pages_done": pages_done,
+        "pages_total": pages_total,
+        "progress": round(pages_done / pages_total, 3) if pages_total else None,
+        "uploaded_at": document.get("uploaded_at"),
+        "job": None
+    }
+    
+    job = await job_queue.latest_for_document(document_id)
+    if job:
+        result["job"] = {
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "priority": job["priority"],
+            "attempts": job["attempts"],
+            "max_attempts": job["max_attempts"],
+            "queue_position": await job_queue.position(job),
+            "run_after": job.get("run_after"),
+            "error": job.get("error")
+        }
+    
+    return result
+
+@router.post("/{document_id}/cancel")
+async def cancel_document_parse(
+    document_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    job_queue: JobQueue = Depends(get_job_queue)
+):
+    """Cancel a queued or running parse"""
+    job = await job_queue.cancel(document_id)
+    
+    if not job:
+        raise HTTPException(404, "No active parse job for this document")
+    
+    if job["status"] == "cancelled":
+        # Never started, nothing for the worker to clean up
+        await mark_document_failed(db, document_id, "Cancelled by user", status="cancelled")
+    
+    return {
+        "document_id": document_id,
+        "job_id": job["job_id"],
+        "status": "cancelled" if job["status"] == "cancelled" else "cancelling"
+    }
+
+@router.post("/{document_id}/reparse")
+async def reparse_document(
+    document_id: str,
+    priority: int = 0,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    job_queue: JobQueue = Depends(get_job_queue)
+):
+    """Re-run extraction for a document (uses cached tables when available)"""
+    document = await db.documents.find_one({"document_id": document_id})
+    
+    if not document:
+        raise HTTPException(404, "Document not found")
+    
+    if not document.get("source_pdf_path") or not os.path.exists(document["source_pdf_path"]):
+        raise HTTPException(409, "Source PDF is no longer available")
+    
+    job = await request_reparse(db, job_queue, document, priority=priority)
+    if not job:
+        raise HTTPException(409, "Document already has an active parse job")
+    
+    return {
+        "document_id": document_id,
+        "job_id": job["job_id"],
+        "status": "queued",
+        "queue_position": await job_queue.position(job)
     }
 
 @router.get("/{document_id}/parts")
 async def get_document_parts(
+    request: Request,
     document_id: str,
     limit: int = 100,
     skip: int = 0,
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
-    """Get all parts from a document"""
-    cursor = db.ipd_parts.find(
-        {"document_id": document_id}
-    ).skip(skip).limit(limit)
-    
-    parts = await cursor.to_list(length=limit)
+    """
+    Get all parts from a document
+    With Accept: application/x-ndjson every part from `skip` on is streamed
+    (limit only applies when given explicitly)
+    """
+    if wants_ndjson(request):
+        cursor = db.ipd_parts.find({"document_id": document_id}).sort("_id", 1).skip(skip).batch_size(1000)
+        if "limit" in request.query_params:
+            cursor = cursor.limit(limit)
+        return ndjson_response(cursor)
     
-    # Convert ObjectId to string
-    for part in parts:
-        part["_id"] = str(part["_id"])
+    async def build():
+        cursor = db.ipd_parts.find(
+            {"document_id": document_id}
+        ).skip(skip).limit(limit)
+        
+        parts = await cursor.to_list(length=limit)
+        
+        # Convert ObjectId to string
+        for part in parts:
+            part["_id"] = str(part["_id"])
+        
+        return {
+            "total": await db.ipd_parts.count_documents({"document_id": document_id}),
+            "items": parts,
+            "limit": limit,
+            "skip": skip
+        }
     
-    return {
-        "total": await db.ipd_parts.count_documents({"document_id": document_id}),
-        "items": parts,
-        "limit": limit,
-        "skip": skip
-    }
+    return await cached_json(
+        request, db, "documents.parts",
+        {"document_id": document_id, "limit": limit, "skip": skip},
+        build
+    )
 
-async def parse_document_background(document_id: str, pdf_path: str, db):
-    """Background task for parsing"""
+
+async def save_upload_stream(request: Request, upload_dir: str,
+                             field: str = "file") -> Tuple[str, str, str, int]:
+    """
+    Stream the `field` file of a multipart/form-data body to a temp file in
+    UPLOAD_CHUNK_SIZE steps, hashing as we go. The body is read straight from
+    the request, so nothing is spooled before the size checks run.
+    Returns (filename, tmp_path, sha256, size); raises 413 from Content-Length
+    before reading the body, or as soon as MAX_UPLOAD_SIZE is passed.
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(400, "Expected a multipart/form-data upload")
+    
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > settings.MAX_UPLOAD_SIZE + MULTIPART_OVERHEAD:
+        raise HTTPException(413, f"File exceeds {settings.MAX_UPLOAD_SIZE} bytes")
+    
+    # Parser callbacks only collect; hashing and writing happen between body chunks
+    part = {"header": b"", "value": b"", "disposition": b"", "is_file": False}
+    filename = None
+    received = bytearray()
+    
+    def on_part_begin():
+        part.update(header=b"", value=b"", disposition=b"", is_file=False)
+    
+    def on_header_field(data, start, end):
+        part["header"] += data[start:end]
+    
+    def on_header_value(data, start, end):
+        part["value"] += data[start:end]
+    
+    def on_header_end():
+        if part["header"].lower() == b"content-disposition":
+            part["disposition"] = part["value"]
+        part.update(header=b"", value=b"")
+    
+    def on_headers_finished():
+        nonlocal filename
+        _, params = parse_options_header(part["disposition"])
+        if filename is None and params.get(b"name") == field.encode() and b"filename" in params:
+            filename = params[b"filename"].decode("utf-8", "replace")
+            part["is_file"] = True
+    
+    def on_part_data(data, start, end):
+        if part["is_file"]:
+            received.extend(data[start:end])
+    
+    def on_part_end():
+        part["is_file"] = False
+    
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end
+    })
+    
+    # Ensure upload directory exists
+    os.makedirs(upload_dir, exist_ok=True)
+    
+    fd, tmp_path = tempfile.mkstemp(dir=upload_dir, suffix=".part")
+    os.close(fd)
+    
+    sha256 = hashlib.sha256()
+    size = 0
+    
     try:
-        # Update status
-        await db.documents.update_one(
-            {"document_id": document_id},
-            {"$set": {"parsing_status": "processing"}}
-        )
-        
-        # Parse document
-        parser = IPDParser()
-        result = await parser.parse(pdf_path)
-        
-        # Save parts to database
-        saved_count = 0
-        for part in result.get('parts', []):
-            part_id = f"{part['part_number']}_{document_id}_{part['page']}"
+        async with aiofiles.open(tmp_path, "wb") as out:
+            async for chunk in request.stream():
+                try:
+                    parser.write(chunk)
+                except MultipartParseError as e:
+                    raise HTTPException(400, f"Malformed multipart body: {e}")
+                
+                if filename is not None and not filename.lower().endswith(".pdf"):
+                    raise HTTPException(400, "Only PDF files are supported")
+                
+                if size + len(received) > settings.MAX_UPLOAD_SIZE:
+                    raise HTTPException(413, f"File exceeds {settings.MAX_UPLOAD_SIZE} bytes")
+                if len(received) >= settings.UPLOAD_CHUNK_SIZE:
+                    size += len(received)
+                    sha256.update(received)
+                    await out.write(bytes(received))
+                    received.clear()
             
-            ipd_part = {
-                "ipd_part_id": part_id,
-                "document_id": document_id,  # Ini string, bukan ObjectId
-                "part_number": part["part_number"],
-                "nomenclature": part.get("nomenclature"),
-                "figure": part.get("figure"),
-                "item": part.get("item"),
-                "is_sticker": False,  # Default
-                "effectivity_type": part["effectivity"]["type"],
-                "effectivity_values": part["effectivity"].get("values"),
-                "effectivity_range": part["effectivity"] if part["effectivity"].get("type") == "RANGE" else None,
-                "upa": part.get("upa"),  # Bisa None
-                "page_number": part["page"],
-                "confidence": part.get("confidence", 0.95),
-                "created_at": datetime.utcnow()
-            }
-
-            await db.ipd_parts.update_one(
-                {"ipd_part_id": part_id},
-                {"$set": ipd_part},
-                upsert=True
-            )
-            saved_count += 1
-        
-        # Update document status
-        await db.documents.update_one(
-            {"document_id": document_id},
-            {
-                "$set": {
-                    "parsing_status": "completed",
-                    "parts_count": saved_count,
-                    "updated_at": datetime.utcnow()
-                }
-            }
-        )
+            parser.finalize()
+            size += len(received)
+            sha256.update(received)
+            await out.write(bytes(received))
         
-        # Clean up file? Optional - could keep for reference
-        # os.remove(pdf_path)
-        
-    except Exception as e:
-        # Update error status
-        await db.documents.update_one(
-            {"document_id": document_id},
-            {
-                "$set": {
-                    "parsing_status": "failed",
-                    "error_message": str(e)
-                }
-            }
-        )
-        print(f"Error parsing document {document_id}: {e}")
\ No newline at end of file
+        if filename is None:
+            raise HTTPException(400, f"Missing file field '{field}'")
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    
+    return filename, tmp_path, sha256.hexdigest(), size
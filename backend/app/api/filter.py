@@ -1,17 +1,38 @@
 # backend/app/api/filter.py
-from fastapi import APIRouter, HTTPException, Depends, Query
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import JSONResponse
+from typing import Dict, List, Optional
+import asyncio
+import base64
 import time
+import numpy as np
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from bson import ObjectId
 from datetime import datetime
+from app.core.config import settings
 from app.core.database import get_database
 from app.services.filter_service import FilterService
+from app.services.effectivity_index import (
+    effectivity_index,
+    load_document_indexes,
+    part_payload,
+    PART_FIELDS
+)
+from app.services.line_bitmaps import line_bitmap_index
+from app.services.response_cache import cached_json
+from app.services.streaming import ndjson_response, wants_ndjson
+from app.services.part_stats import read_part_stats
+from app.services.similar_parts import similar_part_index
+from app.services.alternatives import read_alternatives
+from app.services.revision_diff import read_part_history
+from app.models.filter import LineBatchRequest, LineSetRequest, PartCheckRequest
 
 router = APIRouter(prefix="/filter", tags=["filter"])
 filter_service = FilterService()
 
 @router.get("/line/{line_number}")
 async def filter_by_line(
+    request: Request,
     line_number: int,
     document_id: Optional[str] = None,
     db: AsyncIOMotorDatabase = Depends(get_database)
@@ -19,9 +40,40 @@ async def filter_by_line(
     """
     Filter parts by line number based on effectivity
     This is the core feature for Phase 1
+    With Accept: application/x-ndjson the applicable parts are streamed, one per line
     """
-    start_time = time.time()
+    if wants_ndjson(request):
+        if settings.EFFECTIVITY_INDEX_ENABLED:
+            await effectivity_index.ensure_loaded(db)
+            return ndjson_response(effectivity_index.iter_by_line(line_number, document_id))
+        return ndjson_response(iter_by_line_from_db(db, line_number, document_id))
     
+    async def build():
+        start_time = time.time()
+        
+        if settings.EFFECTIVITY_INDEX_ENABLED:
+            # In-process index, no database round-trip once loaded
+            await effectivity_index.ensure_loaded(db)
+            applicable = effectivity_index.filter_by_line(line_number, document_id)
+        else:
+            applicable = await filter_by_line_from_db(db, line_number, document_id)
+        
+        return {
+            "line_number": line_number,
+            "applicable_parts": applicable,
+            "total_applicable": len(applicable),
+            "query_time_ms": int((time.time() - start_time) * 1000)
+        }
+    
+    return await cached_json(
+        request, db, "filter.line",
+        {"line_number": line_number, "document_id": document_id},
+        build,
+        indexes=[effectivity_index] if settings.EFFECTIVITY_INDEX_ENABLED else []
+    )
+
+def line_query(line_number: int, document_id: Optional[str] = None) -> Dict:
+    """ipd_parts query for the parts applicable to a line"""
     # Build query for applicable parts
     query = {
         "$or": [
@@ -41,65 +93,239 @@ async def filter_by_line(
     
     if document_id:
         query["document_id"] = document_id
+    return query
+
+async def filter_by_line_from_db(db: AsyncIOMotorDatabase, line_number: int,
+                                 document_id: Optional[str] = None) -> List[Dict]:
+    """Same lookup straight from MongoDB (EFFECTIVITY_INDEX_ENABLED=false)"""
+    cursor = db.ipd_parts.find(line_query(line_number, document_id), PART_FIELDS)
+    return [part_payload(p) for p in await cursor.to_list(length=None)]
+
+async def iter_by_line_from_db(db: AsyncIOMotorDatabase, line_number: int,
+                               document_id: Optional[str] = None):
+    """filter_by_line_from_db as the cursor delivers, for streaming responses"""
+    cursor = db.ipd_parts.find(line_query(line_number, document_id), PART_FIELDS).batch_size(1000)
+    async for part in cursor:
+        yield part_payload(part)
+
+@router.post("/lines")
+async def filter_by_lines(
+    request: LineBatchRequest,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Applicability of every part for a block of lines (delivery schedule, fleet).
+    Returns the applicable parts once plus a line x part result:
+    - indices: per line, positions in `parts`
+    - bitmap:  per line, base64 of np.packbits over `parts` (big-endian bit order)
+    """
+    start_time = time.time()
     
-    # Get all matching parts
-    cursor = db.ipd_parts.find(query)
-    parts = await cursor.to_list(length=1000)
+    line_numbers = request.line_numbers()
+    if not line_numbers:
+        raise HTTPException(400, "No line numbers given")
+    if len(line_numbers) > settings.FILTER_BATCH_MAX_LINES:
+        raise HTTPException(400, f"At most {settings.FILTER_BATCH_MAX_LINES} lines per request")
+    lines = np.asarray(line_numbers, dtype=np.int64)
     
-    # Format response
-    result = {
-        "line_number": line_number,
-        "applicable_parts": [
-            {
-                "part_number": p["part_number"],
-                "nomenclature": p.get("nomenclature"),
-                "figure": p.get("figure"),
-                "item": p.get("item"),
-                "effectivity": {
-                    "type": p["effectivity_type"],
-                    "values": p.get("effectivity_values"),
-                    "range": p.get("effectivity_range")
-                },
-                "page": p.get("page_number"),
-                "confidence": p.get("confidence", 0.95)
-            }
-            for p in parts
-        ],
-        "total_applicable": len(parts),
+    if settings.EFFECTIVITY_INDEX_ENABLED:
+        await effectivity_index.ensure_loaded(db)
+        indexes = effectivity_index.select(request.document_id, request.revision)
+    else:
+        query = {"parsing_status": "completed"}
+        if request.document_id:
+            query["document_id"] = request.document_id
+        if request.revision:
+            query["revision"] = request.revision
+        documents = await db.documents.find(
+            query, {"_id": 0, "document_id": 1, "data_version": 1, "revision": 1}
+        ).to_list(length=None)
+        indexes = list((await load_document_indexes(db, documents)).values())
+    
+    # One matrix per document, keep only parts applicable to at least one line
+    parts = []
+    blocks = []
+    total_parts = 0
+    for index in indexes:
+        matrix = index.matrix(lines)
+        total_parts += len(index)
+        used = np.flatnonzero(matrix.any(axis=0))
+        parts.extend({**index.payloads[i], "document_id": index.document_id} for i in used)
+        blocks.append(matrix[:, used])
+    
+    matrix = np.concatenate(blocks, axis=1) if blocks else np.zeros((len(lines), 0), dtype=bool)
+    
+    if request.format == "bitmap":
+        rows = [base64.b64encode(row.tobytes()).decode("ascii") for row in np.packbits(matrix, axis=1)]
+    else:
+        rows = [np.flatnonzero(row).tolist() for row in matrix]
+    
+    # Plain JSONResponse: skips jsonable_encoder, which is slow on large int lists
+    return JSONResponse({
+        "line_numbers": line_numbers,
+        "format": request.format,
+        "parts": parts,
+        "applicable": rows,
+        "total_applicable": matrix.sum(axis=1).tolist(),
+        "total_parts": total_parts,
+        "query_time_ms": int((time.time() - start_time) * 1000)
+    })
+
+@router.post("/lines/set")
+async def line_set_operation(
+    request: LineSetRequest,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Union / intersection / difference of the part sets of lines, from the
+    per-revision line bitmaps, e.g. parts that differ between two lines
+    (symmetric_difference) or apply to every line of a range (intersection).
+    """
+    start_time = time.time()
+    
+    line_numbers = request.line_numbers()
+    if not line_numbers:
+        raise HTTPException(400, "No line numbers given")
+    if len(line_numbers) > settings.FILTER_SET_MAX_LINES:
+        raise HTTPException(400, f"At most {settings.FILTER_SET_MAX_LINES} lines per request")
+    
+    await line_bitmap_index.ensure_loaded(db)
+    documents = []
+    for bitmaps in line_bitmap_index.select(request.document_id, request.revision):
+        part_numbers = bitmaps.combine(line_numbers, request.op)
+        documents.append({
+            "document_id": bitmaps.document_id,
+            "revision": bitmaps.revision,
+            "part_numbers": part_numbers,
+            "total": len(part_numbers)
+        })
+    
+    return JSONResponse({
+        "op": request.op,
+        "line_numbers": line_numbers,
+        "documents": documents,
+        "total": sum(doc["total"] for doc in documents),
         "query_time_ms": int((time.time() - start_time) * 1000)
+    })
+
+@router.get("/part/{part_number}/lines")
+async def part_lines(
+    part_number: str,
+    document_id: Optional[str] = None,
+    revision: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Lines a part number applies to, per document revision (from the line bitmaps)
+    as inclusive ranges; "lines" lists them too unless there are more than
+    FILTER_SET_MAX_LINES
+    """
+    await line_bitmap_index.ensure_loaded(db)
+    documents = []
+    for bitmaps in line_bitmap_index.select(document_id, revision):
+        ranges = bitmaps.line_ranges_of(part_number)
+        if ranges is not None:
+            line_count = sum(to - from_ + 1 for from_, to in ranges)
+            documents.append({
+                "document_id": bitmaps.document_id,
+                "revision": bitmaps.revision,
+                "ranges": ranges,
+                "line_count": line_count,
+                "lines": [
+                    line for from_, to in ranges for line in range(from_, to + 1)
+                ] if line_count <= settings.FILTER_SET_MAX_LINES else None
+            })
+    
+    if not documents:
+        raise HTTPException(404, f"Part {part_number} not found")
+    
+    return JSONResponse({"part_number": part_number, "documents": documents})
+
+@router.get("/part/{part_number}/similar")
+async def similar_parts(
+    part_number: str,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Part numbers sharing the prefix and within Levenshtein distance 2 (SRS 5.5)
+    """
+    start_time = time.perf_counter()
+    await similar_part_index.ensure_loaded(db)
+    similar = similar_part_index.similar(part_number)
+    
+    return {
+        "part_number": part_number,
+        "similar_parts": [{"part_number": pn, "distance": d} for pn, d in similar],
+        "similar_part_count": len(similar),
+        "query_time_us": int((time.perf_counter() - start_time) * 1_000_000)
     }
+
+@router.get("/part/{part_number}/alternatives")
+async def part_alternatives(
+    part_number: str,
+    revision: Optional[str] = None,
+    document_id: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Alternatives of a part (SRS 5.4), precomputed at ingest:
+    same figure, overlapping effectivity, similar nomenclature
+    """
+    records = await read_alternatives(db, part_number, revision, document_id)
     
-    return result
+    return {
+        "part_number": part_number,
+        "records": records,
+        "alternative_count": sum(r["alternative_count"] for r in records)
+    }
+
+@router.get("/part/{part_number}/history")
+async def part_history(
+    part_number: str,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Revision timeline of a part (SRS 5.6): revisions whose change summary
+    added, removed or modified it, oldest first
+    """
+    history = await read_part_history(db, part_number)
+    
+    return {
+        "part_number": part_number,
+        "history": history,
+        "change_count": len(history)
+    }
 
 @router.get("/line/{line_number}/check")
 async def check_line_applicability(
     line_number: int,
     part_number: str,
+    revision: Optional[str] = None,
+    document_id: Optional[str] = None,
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """
     Check if a specific part is applicable for a line number
+    (latest record unless revision/document is given, see POST /check for all records)
     """
+    query = {"part_number": part_number}
+    if revision:
+        query["revision"] = revision
+    if document_id:
+        query["document_id"] = document_id
+    
     # Find the part
-    part = await db.ipd_parts.find_one({"part_number": part_number})
+    part = await db.ipd_parts.find_one(query, sort=[("_id", -1)])
     
     if not part:
         raise HTTPException(404, f"Part {part_number} not found")
     
-    # Check applicability
-    is_applicable = False
-    
-    if part["effectivity_type"] == "LIST":
-        is_applicable = line_number in part.get("effectivity_values", [])
-    elif part["effectivity_type"] == "RANGE":
-        range_data = part.get("effectivity_range", {})
-        if range_data and range_data.get("from") and range_data.get("to"):
-            is_applicable = range_data["from"] <= line_number <= range_data["to"]
-    
     return {
         "part_number": part_number,
         "line_number": line_number,
-        "is_applicable": is_applicable,
+        "is_applicable": filter_service.is_applicable(part, line_number),
+        "document_id": part.get("document_id"),
+        "revision": part.get("revision"),
         "effectivity": {
             "type": part["effectivity_type"],
             "values": part.get("effectivity_values"),
@@ -107,61 +333,80 @@ async def check_line_applicability(
         }
     }
 
+@router.post("/check")
+async def check_parts_applicability(
+    request: PartCheckRequest,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Check many candidate parts for one line in a single query.
+    Every record (revision/document) of each part is evaluated;
+    results come back in the order the part numbers were given.
+    """
+    start_time = time.time()
+    
+    if len(request.part_numbers) > settings.FILTER_CHECK_MAX_PARTS:
+        raise HTTPException(400, f"At most {settings.FILTER_CHECK_MAX_PARTS} part numbers per request")
+    
+    query = {"part_number": {"$in": list(dict.fromkeys(request.part_numbers))}}
+    if request.revision:
+        query["revision"] = request.revision
+    if request.document_id:
+        query["document_id"] = request.document_id
+    
+    records_by_part = {}
+    cursor = db.ipd_parts.find(query, {**PART_FIELDS, "revision": 1}).sort([("revision", 1), ("page_number", 1)])
+    async for part in cursor:
+        records_by_part.setdefault(part["part_number"], []).append({
+            "document_id": part["document_id"],
+            "revision": part.get("revision"),
+            "figure": part.get("figure"),
+            "item": part.get("item"),
+            "page": part.get("page_number"),
+            "is_applicable": filter_service.is_applicable(part, request.line_number),
+            "effectivity": {
+                "type": part["effectivity_type"],
+                "values": part.get("effectivity_values"),
+                "range": part.get("effectivity_range")
+            }
+        })
+    
+    results = []
+    for part_number in request.part_numbers:
+        records = records_by_part.get(part_number, [])
+        results.append({
+            "part_number": part_number,
+            "found": bool(records),
+            "is_applicable": any(r["is_applicable"] for r in records),
+            "records": records
+        })
+    
+    return {
+        "line_number": request.line_number,
+        "revision": request.revision,
+        "document_id": request.document_id,
+        "results": results,
+        "total_applicable": sum(1 for r in results if r["is_applicable"]),
+        "query_time_ms": int((time.time() - start_time) * 1000)
+    }
+
 # backend/app/api/filter.py - Tambahkan endpoint ini
 
 @router.get("/statistics")
 async def get_filter_statistics(
+    request: Request,
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """
     Get statistics about filtered parts
     """
     try:
-        # Total parts
-        total_parts = await db.ipd_parts.count_documents({})
-        
-        # Parts by effectivity type
-        list_count = await db.ipd_parts.count_documents({"effectivity_type": "LIST"})
-        range_count = await db.ipd_parts.count_documents({"effectivity_type": "RANGE"})
-        
-        # Unique part numbers
-        distinct_parts = await db.ipd_parts.distinct("part_number")
-        
-        # Sticker stats
-        sticker_count = await db.ipd_parts.count_documents({
-            "nomenclature": {"$regex": "STENCIL|PLACARD|DECAL|MARKER", "$options": "i"}
-        })
-        
-        # Documents count
-        docs_count = await db.documents.count_documents({})
-        
-        # Most common line numbers (top 10)
-        pipeline = [
-            {"$match": {"effectivity_type": "LIST"}},
-            {"$unwind": "$effectivity_values"},
-            {"$group": {"_id": "$effectivity_values", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}},
-            {"$limit": 10}
-        ]
-        top_lines = await db.ipd_parts.aggregate(pipeline).to_list(length=10)
-        
-        return {
-            "total_parts": total_parts,
-            "parts_by_type": {
-                "LIST": list_count,
-                "RANGE": range_count
-            },
-            "unique_part_numbers": len(distinct_parts),
-            "sticker_count": sticker_count,
-            "documents": docs_count,
-            "top_lines": [
-                {"line": item["_id"], "count": item["count"]} 
-                for item in top_lines
-            ],
-            "recent_uploads": await db.documents.count_documents({
-                "uploaded_at": {"$gte": datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)}
-            })
-        }
+        # recent_uploads counts from midnight UTC, so the day is part of the key
+        return await cached_json(
+            request, db, "filter.statistics",
+            {"day": datetime.utcnow().date().isoformat()},
+            lambda: read_filter_statistics(db)
+        )
     except Exception as e:
         print(f"Error in statistics: {e}")
         return {
@@ -174,45 +419,142 @@ async def get_filter_statistics(
             "recent_uploads": 0,
             "error": str(e)
         }
+
+async def read_filter_statistics(db: AsyncIOMotorDatabase) -> Dict:
+    """From the counters kept at ingest (see part_stats), full recount until they exist"""
+    stats = await read_part_stats(db)
+    if not stats:
+        return await compute_filter_statistics(db)
+    
+    docs_count, recent_uploads = await asyncio.gather(
+        db.documents.count_documents({}),
+        db.documents.count_documents({
+            "uploaded_at": {"$gte": datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)}
+        })
+    )
+    
+    return {
+        "total_parts": stats["total_parts"],
+        "parts_by_type": {
+            "LIST": stats["list_count"],
+            "RANGE": stats["range_count"]
+        },
+        "unique_part_numbers": stats["unique_part_numbers"],
+        "sticker_count": stats["sticker_count"],
+        "documents": docs_count,
+        "top_lines": stats["top_lines"],
+        "recent_uploads": recent_uploads
+    }
+
+async def compute_filter_statistics(db: AsyncIOMotorDatabase) -> Dict:
+    """Statistics straight from ipd_parts (before python -m app.rebuild_stats has run)"""
+    # Total parts
+    total_parts = await db.ipd_parts.count_documents({})
+    
+    # Parts by effectivity type
+    list_count = await db.ipd_parts.count_documents({"effectivity_type": "LIST"})
+    range_count = await db.ipd_parts.count_documents({"effectivity_type": "RANGE"})
+    
+    # Unique part numbers
+    distinct_parts = await db.ipd_parts.distinct("part_number")
+    
+    # Sticker stats
+    sticker_count = await db.ipd_parts.count_documents({"is_sticker": True})
+    
+    # Documents count
+    docs_count = await db.documents.count_documents({})
+    
+    # Most common line numbers (top 10)
+    pipeline = [
+        {"$match": {"effectivity_type": "LIST"}},
+        {"$unwind": "$effectivity_values"},
+        {"$group": {"_id": "$effectivity_values", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1}},
+        {"$limit": 10}
+    ]
+    top_lines = await db.ipd_parts.aggregate(pipeline).to_list(length=10)
+    
+    return {
+        "total_parts": total_parts,
+        "parts_by_type": {
+            "LIST": list_count,
+            "RANGE": range_count
+        },
+        "unique_part_numbers": len(distinct_parts),
+        "sticker_count": sticker_count,
+        "documents": docs_count,
+        "top_lines": [
+            {"line": item["_id"], "count": item["count"]} 
+            for item in top_lines
+        ],
+        "recent_uploads": await db.documents.count_documents({
+            "uploaded_at": {"$gte": datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)}
+        })
+    }
+
 @router.get("/browse")
 async def browse_parts(
+    request: Request,
     type: str = Query(..., description="Type of parts to browse (e.g. sticker)"),
     model: str = "787-8",
     limit: int = 50,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     skip: int = 0,
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """
     Browse parts by category (e.g. Stickers)
+    Pages are keyset-paginated on _id: pass next_cursor back as cursor while
+    has_more is true. total is only returned on the first page.
+    skip still works but gets slower with depth.
     """
     query = {}
     
-    # Filter by type (regex for stickers/placards)
+    # Filter by type (is_sticker is set at ingest from the nomenclature)
     if type.lower() == "sticker":
-        query["nomenclature"] = {"$regex": "STENCIL|PLACARD|DECAL|MARKER", "$options": "i"}
+        query["is_sticker"] = True
     
     # Filter by model (future use, currently all are 787-8)
     # query["model"] = model 
+    
+    page_query = dict(query)
+    if cursor:
+        if not ObjectId.is_valid(cursor):
+            raise HTTPException(400, "Invalid cursor")
+        page_query["_id"] = {"$gt": ObjectId(cursor)}
 
-    cursor = db.ipd_parts.find(query).skip(skip).limit(limit)
-    parts = await cursor.to_list(length=limit)
+    async def build():
+        # One row past the page tells whether another page follows
+        parts = await db.ipd_parts.find(page_query).sort("_id", 1).skip(skip).limit(limit + 1).to_list(length=limit + 1)
+        has_more = len(parts) > limit
+        parts = parts[:limit]
+        
+        return {
+            "type": type,
+            "model": model,
+            # Counting is a full index scan, so only the first page pays for it
+            "total": await db.ipd_parts.count_documents(query) if not cursor and not skip else None,
+            "next_cursor": str(parts[-1]["_id"]) if has_more else None,
+            "has_more": has_more,
+            "items": [
+                {
+                    "ipd_part_id": p["ipd_part_id"],
+                    "part_number": p["part_number"],
+                    "nomenclature": p.get("nomenclature"),
+                    "item": p.get("item"),
+                    "figure": p.get("figure"),
+                    "sticker_type": p.get("sticker_type"),
+                    "effectivity_type": p["effectivity_type"],
+                    "effectivity_values": p.get("effectivity_values"),
+                    "effectivity_range": p.get("effectivity_range"),
+                    "upa": p.get("upa")
+                }
+                for p in parts
+            ]
+        }
     
-    return {
-        "type": type,
-        "model": model,
-        "total": await db.ipd_parts.count_documents(query),
-        "items": [
-            {
-                "ipd_part_id": p["ipd_part_id"],
-                "part_number": p["part_number"],
-                "nomenclature": p.get("nomenclature"),
-                "item": p.get("item"),
-                "figure": p.get("figure"),
-                "effectivity_type": p["effectivity_type"],
-                "effectivity_values": p.get("effectivity_values"),
-                "effectivity_range": p.get("effectivity_range"),
-                "upa": p.get("upa")
-            }
-            for p in parts
-        ]
-    }
\ No newline at end of file
+    return await cached_json(
+        request, db, "filter.browse",
+        {"type": type, "model": model, "limit": limit, "cursor": cursor, "skip": skip},
+        build
+    )
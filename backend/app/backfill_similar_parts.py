@@ -0,0 +1,33 @@
+# backend/app/backfill_similar_parts.py
+"""
+Register every part number already in ipd_parts in part_master, then set
+the similar parts and similar_part_count of every part_master row afresh:
+
+    python -m app.backfill_similar_parts
+
+Ingest registers the part numbers of each new document afterwards.
+"""
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.core.database import Database
+from app.services.similar_parts import similar_part_index
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    logging.basicConfig(level=logging.INFO)
+    await Database.connect_db(settings.MONGO_URI)
+    try:
+        db = Database.get_db(settings.MONGO_DB)
+        registered = await similar_part_index.register(db, await db.ipd_parts.distinct("part_number"))
+        computed = await similar_part_index.recompute_all(db)
+        logger.info(f"🔤 Registered {registered} part numbers, similar parts set for {computed} in part_master")
+    finally:
+        await Database.close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,37 @@
+# backend/app/compute_risk.py
+"""
+Risk batch (SRS 5.9): recompute part_risk_profile from decision_log,
+revisions, similar parts and alternatives:
+
+    python -m app.compute_risk          # only parts whose inputs changed
+    python -m app.compute_risk --full   # every part in part_master
+
+The first run is always full. Schedule it (e.g. nightly or hourly);
+part_master must be filled first (python -m app.backfill_similar_parts).
+"""
+import argparse
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.core.database import Database
+from app.services.risk_engine import compute_risk_profiles
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Recompute part risk profiles")
+    parser.add_argument("--full", action="store_true", help="recompute every part, not only changed ones")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    await Database.connect_db(settings.MONGO_URI)
+    try:
+        await compute_risk_profiles(Database.get_db(settings.MONGO_DB), incremental=not args.full)
+    finally:
+        await Database.close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -22,6 +22,58 @@ class Settings(BaseSettings):
     # File Upload
     UPLOAD_DIR: str = str(Path(__file__).parent.parent.parent / "uploads")
     MAX_UPLOAD_SIZE: int = 100 * 1024 * 1024  # 100MB
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 1MB per read/hash/write step
+    
+    # Parser
+    PARSER_WORKERS: int = os.cpu_count() or 1  # 1 = serial parse
+    PARSER_PAGES_PER_CHUNK: int = 25
+    INGEST_BATCH_SIZE: int = 1000  # parts per bulk_write
+    TABLE_CACHE_ENABLED: bool = True  # raw Camelot grids per file_hash, used by re-parse
+    TABLE_CACHE_DIR: str = str(Path(__file__).parent.parent.parent / "table_cache")
+    
+    # Line filtering
+    EFFECTIVITY_INDEX_ENABLED: bool = True  # in-process index instead of a query per request
+    EFFECTIVITY_INDEX_REFRESH_SECONDS: float = 5.0  # poll for documents finished by workers
+    EFFECTIVITY_INDEX_SHARED: bool = True  # memory-map compiled indexes, one copy per host
+    EFFECTIVITY_INDEX_DIR: str = str(Path(__file__).parent.parent.parent / "effectivity_index")
+    FILTER_BATCH_MAX_LINES: int = 5000  # POST /filter/lines
+    FILTER_CHECK_MAX_PARTS: int = 500  # POST /filter/check
+    LINE_BITMAPS_ENABLED: bool = True  # build line/part bitmaps at ingest for set queries
+    LINE_BITMAP_DIR: str = str(Path(__file__).parent.parent.parent / "line_bitmaps")
+    LINE_BITMAP_CHUNK_LINES: int = 512  # lines evaluated per step while building
+    FILTER_SET_MAX_LINES: int = 5000  # POST /filter/lines/set
+    
+    # Similar parts (SRS 5.5: same prefix, Levenshtein distance <= 2)
+    SIMILAR_PART_PREFIX_LENGTH: int = 3
+    SIMILAR_PART_MAX_DISTANCE: int = 2
+    
+    # Alternatives (SRS 5.4: same figure, overlapping effectivity, similar nomenclature)
+    ALTERNATIVE_MIN_SIMILARITY: float = 0.5  # token-set Jaccard of the nomenclatures
+    
+    # Risk scoring (SRS 5.9, python -m app.compute_risk); counts at which a component reaches 100
+    RISK_WARN_SATURATION: int = 10  # warnings in the last 30 days
+    RISK_SIMILAR_SATURATION: int = 5  # similar part numbers
+    RISK_ERROR_SATURATION: int = 3  # error reports
+    RISK_OVERLAP_SATURATION: int = 5  # alternative part numbers
+    RISK_BATCH_PARTS: int = 50000  # changed parts per incremental batch
+    
+    # Configuration drift (SRS 5.11, python -m app.drift_monitor)
+    DRIFT_POLL_SECONDS: float = 0.5  # how often decision_log is followed
+    DRIFT_CHECKPOINT_SECONDS: float = 30.0  # slot map persisted to drift_slots
+    DRIFT_CLOCK_SKEW_SECONDS: float = 5.0  # overlap re-read on each poll
+    
+    # Response cache (GET filter/document endpoints, ETag + 304)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # LRU over serialized bodies
+    RESPONSE_CACHE_GENERATION_SECONDS: float = 1.0  # how stale the data generation may be
+    
+    # Parse jobs (python -m app.worker)
+    PARSE_WORKER_CONCURRENCY: int = 2  # jobs per worker process, each uses PARSER_WORKERS
+    PARSE_WORKER_POLL_SECONDS: float = 2.0
+    PARSE_JOB_MAX_ATTEMPTS: int = 3
+    PARSE_JOB_RETRY_BACKOFF_SECONDS: int = 30  # doubled per attempt
+    PARSE_JOB_LEASE_SECONDS: int = 300
+    PARSE_JOB_HEARTBEAT_SECONDS: int = 15
     
     class Config:
         env_file = Path(__file__).parent.parent.parent.parent / ".env"
@@ -0,0 +1,49 @@
+# backend/app/drift_monitor.py
+"""
+Configuration drift monitor (SRS 5.11). Runs as a single process next to
+the API and the parse workers:
+
+    python -m app.drift_monitor
+
+Follows confirmed decisions in decision_log and writes config_drift_log
+records as conflicts appear. On restart it resumes from its checkpoint.
+"""
+import asyncio
+import logging
+import signal
+
+from app.core.config import settings
+from app.core.database import Database
+from app.services.drift_detector import DriftDetector
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    logging.basicConfig(level=logging.INFO)
+    await Database.connect_db(settings.MONGO_URI)
+
+    detector = DriftDetector(
+        Database.get_db(settings.MONGO_DB),
+        clock_skew_seconds=settings.DRIFT_CLOCK_SKEW_SECONDS
+    )
+    stopping = asyncio.Event()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    try:
+        logger.info("🧭 Drift monitor started")
+        await detector.run(
+            stopping,
+            poll_seconds=settings.DRIFT_POLL_SECONDS,
+            checkpoint_seconds=settings.DRIFT_CHECKPOINT_SECONDS
+        )
+        logger.info(f"👋 Drift monitor stopped ({detector.drifts_flagged} drifts flagged)")
+    finally:
+        await Database.close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,11 +1,18 @@
 # backend/app/main.py
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import logging
+import time
 
 from app.core.config import settings
 from app.core.database import Database
 from app.api import documents, filter
+from app.services.effectivity_index import effectivity_index, refresh_periodically
+from app.services.line_bitmaps import line_bitmap_index
+from app.services.response_cache import response_cache
+from app.services.similar_parts import similar_part_index
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -44,11 +51,83 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    """Liveness: the process is up (see /health/ready for routing traffic)"""
     return {
         "status": "healthy",
-        "database": "connected" if Database.client else "disconnected"
+        "ready": getattr(app.state, "ready", False),
+        "database": "connected" if Database.client else "disconnected",
+        "response_cache": response_cache.stats()
     }
 
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness: 503 until the startup warm-up has loaded the indexes"""
+    ready = getattr(app.state, "ready", False)
+    return JSONResponse(
+        {
+            "ready": ready,
+            "warmup": getattr(app.state, "warmup", None),
+            "effectivity_index": {
+                "documents": len(effectivity_index.documents),
+                "parts": effectivity_index.parts_count(),
+                "generation": effectivity_index.generation
+            },
+            "line_bitmaps": {
+                "documents": len(line_bitmap_index.documents),
+                "generation": line_bitmap_index.generation
+            },
+            "similar_parts": {
+                "part_numbers": len(similar_part_index)
+            }
+        },
+        status_code=200 if ready else 503
+    )
+
+async def warm_up(db):
+    """
+    Load the indexes before taking traffic, then keep them in sync.
+    Published indexes and bitmaps are mapped/read from local disk; only
+    documents without a current snapshot are rebuilt from MongoDB.
+    """
+    started = time.perf_counter()
+    attempt = 0
+    while True:
+        try:
+            if settings.EFFECTIVITY_INDEX_ENABLED:
+                await effectivity_index.refresh(db)
+            if settings.LINE_BITMAPS_ENABLED:
+                await line_bitmap_index.refresh(db)
+            await similar_part_index.refresh(db)
+            break
+        except Exception as e:
+            attempt += 1
+            logger.error(f"❌ Warm-up attempt {attempt} failed: {e}")
+            await asyncio.sleep(min(2 ** attempt, 30))
+    
+    app.state.warmup = {
+        "seconds": round(time.perf_counter() - started, 3),
+        "attempts": attempt + 1
+    }
+    app.state.ready = True
+    logger.info(f"🔥 Warm-up done in {app.state.warmup['seconds']}s, ready for traffic")
+    
+    # Keep the effectivity index in sync with parses finished by workers
+    if settings.EFFECTIVITY_INDEX_ENABLED:
+        app.state.index_refresher = asyncio.create_task(refresh_periodically(
+            effectivity_index, db, settings.EFFECTIVITY_INDEX_REFRESH_SECONDS
+        ))
+    
+    # Line bitmaps stored by workers at ingest, loaded from disk
+    if settings.LINE_BITMAPS_ENABLED:
+        app.state.bitmap_refresher = asyncio.create_task(refresh_periodically(
+            line_bitmap_index, db, settings.EFFECTIVITY_INDEX_REFRESH_SECONDS
+        ))
+    
+    # Part numbers registered by workers at ingest
+    app.state.similar_refresher = asyncio.create_task(refresh_periodically(
+        similar_part_index, db, settings.EFFECTIVITY_INDEX_REFRESH_SECONDS
+    ))
+
 @app.on_event("startup")
 async def startup_event():
     """Connect to MongoDB Atlas on startup"""
@@ -59,11 +138,19 @@ async def startup_event():
     import os
     os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
     
+    # Liveness is up from here, readiness once warm_up finishes
+    app.state.ready = False
+    app.state.warmup_task = asyncio.create_task(warm_up(Database.get_db(settings.MONGO_DB)))
+    
     logger.info("✅ Startup complete")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close database connection on shutdown"""
     logger.info("Shutting down...")
+    for name in ("warmup_task", "index_refresher", "bitmap_refresher", "similar_refresher"):
+        refresher = getattr(app.state, name, None)
+        if refresher:
+            refresher.cancel()
     await Database.close_db()
     logger.info("👋 Shutdown complete")
\ No newline at end of file
@@ -35,9 +35,12 @@ class DocumentModel(BaseModel):
     aircraft_model: Optional[str] = None
     source_pdf_path: Optional[str] = None
     file_hash: Optional[str] = None
+    dedup_of: Optional[str] = None  # document whose parse result this one reuses
     uploaded_at: datetime = Field(default_factory=datetime.utcnow)
     parsing_status: str = "pending"
     parts_count: int = 0
+    pages_done: int = 0
+    pages_total: Optional[int] = None
     
     class Config:
         populate_by_name = True  # Ganti dari allow_population_by_field_name
@@ -0,0 +1,70 @@
+# backend/app/models/filter.py
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
+
+from app.core.config import settings
+
+class LineRange(BaseModel):
+    from_: int = Field(..., alias="from")
+    to: int
+
+    class Config:
+        populate_by_name = True
+
+    @property
+    def span(self) -> int:
+        return max(self.to - self.from_ + 1, 0)
+
+def check_line_count(lines: List[int], ranges: List[LineRange], max_lines: int):
+    """Reject oversized requests from the range bounds, before anything is expanded"""
+    if len(lines) + sum(line_range.span for line_range in ranges) > max_lines:
+        raise ValueError(f"At most {max_lines} lines per request")
+
+class LineBatchRequest(BaseModel):
+    """Lines to evaluate: explicit numbers and/or inclusive ranges"""
+    lines: List[int] = []
+    ranges: List[LineRange] = []
+    document_id: Optional[str] = None
+    revision: Optional[str] = None
+    format: Literal["indices", "bitmap"] = "indices"
+
+    @model_validator(mode="after")
+    def check_size(self):
+        check_line_count(self.lines, self.ranges, settings.FILTER_BATCH_MAX_LINES)
+        return self
+
+    def line_numbers(self) -> List[int]:
+        numbers = set(self.lines)
+        for line_range in self.ranges:
+            numbers.update(range(line_range.from_, line_range.to + 1))
+        return sorted(numbers)
+
+class LineSetRequest(BaseModel):
+    """
+    Set operation over the part sets of lines.
+    difference: lines[0] minus every other line (including ranges)
+    """
+    lines: List[int] = []
+    ranges: List[LineRange] = []
+    op: Literal["union", "intersection", "difference", "symmetric_difference"] = "intersection"
+    document_id: Optional[str] = None
+    revision: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_size(self):
+        check_line_count(self.lines, self.ranges, settings.FILTER_SET_MAX_LINES)
+        return self
+
+    def line_numbers(self) -> List[int]:
+        """Lines in request order without repeats (lines first, then ranges)"""
+        numbers = dict.fromkeys(self.lines)
+        for line_range in self.ranges:
+            numbers.update(dict.fromkeys(range(line_range.from_, line_range.to + 1)))
+        return list(numbers)
+
+class PartCheckRequest(BaseModel):
+    """Candidate parts to check for one line"""
+    line_number: int
+    part_numbers: List[str]
+    revision: Optional[str] = None
+    document_id: Optional[str] = None
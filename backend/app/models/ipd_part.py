@@ -31,6 +31,7 @@ class IPDPartModel(BaseModel):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
     ipd_part_id: str
     document_id: str
+    revision: Optional[str] = None
     part_number: str
     
     # Basic fields
@@ -0,0 +1,35 @@
+# backend/app/rebuild_alternatives.py
+"""
+Recompute the alternatives collection (SRS 5.4) for every parsed document:
+
+    python -m app.rebuild_alternatives
+
+Ingest keeps it current afterwards. Run it once after migration 016, or
+after changing ALTERNATIVE_MIN_SIMILARITY.
+"""
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.core.database import Database
+from app.services.alternatives import rebuild_document_alternatives
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    logging.basicConfig(level=logging.INFO)
+    await Database.connect_db(settings.MONGO_URI)
+    try:
+        db = Database.get_db(settings.MONGO_DB)
+        document_ids = await db.ipd_parts.distinct("document_id")
+        rows = 0
+        for document_id in document_ids:
+            rows += await rebuild_document_alternatives(db, document_id)
+        logger.info(f"🔀 Alternatives rebuilt for {len(document_ids)} documents, {rows} parts with alternatives")
+    finally:
+        await Database.close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
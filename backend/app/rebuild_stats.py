@@ -0,0 +1,31 @@
+# backend/app/rebuild_stats.py
+"""
+Rebuild the part statistics counters behind /filter/statistics:
+
+    python -m app.rebuild_stats
+
+Ingest keeps the counters current afterwards. Run it once after migration
+013, or whenever the counters are suspected to be off, with no parse running.
+"""
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.core.database import Database
+from app.services.part_stats import rebuild_part_stats
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    logging.basicConfig(level=logging.INFO)
+    await Database.connect_db(settings.MONGO_URI)
+    try:
+        db = Database.get_db(settings.MONGO_DB)
+        await rebuild_part_stats(db, await db.ipd_parts.distinct("document_id"))
+    finally:
+        await Database.close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+# backend/app/reparse.py
+"""
+Re-parse documents after an extraction rule change:
+
+    python -m app.reparse --document-id <id> [--document-id <id> ...]
+    python -m app.reparse --all [--priority N]
+    python -m app.reparse --all --inline   # run here instead of via the worker
+
+Pages already in the table cache skip Camelot, only extraction is re-run.
+"""
+import argparse
+import asyncio
+import logging
+import os
+
+from app.core.config import settings
+from app.core.database import Database
+from app.services.job_queue import JobQueue
+from app.services.ingest import parse_document_background, mark_document_failed, request_reparse
+
+logger = logging.getLogger(__name__)
+
+
+async def reparse(document_ids, all_documents: bool, priority: int, inline: bool):
+    db = Database.get_db(settings.MONGO_DB)
+    job_queue = JobQueue(
+        db,
+        max_attempts=settings.PARSE_JOB_MAX_ATTEMPTS,
+        retry_backoff_seconds=settings.PARSE_JOB_RETRY_BACKOFF_SECONDS,
+        lease_seconds=settings.PARSE_JOB_LEASE_SECONDS
+    )
+
+    query = {"dedup_of": None, "parsing_status": {"$in": ["completed", "failed"]}}
+    if not all_documents:
+        query = {"document_id": {"$in": document_ids}}
+
+    queued = skipped = 0
+    async for document in db.documents.find(query):
+        pdf_path = document.get("source_pdf_path")
+        if not pdf_path or not os.path.exists(pdf_path):
+            logger.warning(f"⚠️ {document['document_id']}: source PDF missing, skipped")
+            skipped += 1
+            continue
+
+        if inline:
+            try:
+                report = await parse_document_background(document["document_id"], pdf_path, db)
+                logger.info(
+                    f"✅ {document['document_id']}: {report['parts_extracted']} parts, "
+                    f"{report['pages_camelot']} pages through Camelot"
+                )
+                queued += 1
+            except Exception as e:
+                logger.error(f"❌ {document['document_id']}: {e}")
+                await mark_document_failed(db, document["document_id"], str(e))
+            continue
+
+        if await request_reparse(db, job_queue, document, priority=priority):
+            queued += 1
+        else:
+            logger.info(f"⏭️ {document['document_id']}: already has an active job")
+            skipped += 1
+
+    logger.info(f"🔁 {'Re-parsed' if inline else 'Queued'} {queued} documents, skipped {skipped}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Re-parse documents from the table cache")
+    parser.add_argument("--document-id", action="append", default=[], help="document to re-parse (repeatable)")
+    parser.add_argument("--all", action="store_true", help="re-parse every parsed document")
+    parser.add_argument("--priority", type=int, default=0, help="job priority (queued mode)")
+    parser.add_argument("--inline", action="store_true", help="parse in this process instead of queueing")
+    args = parser.parse_args()
+
+    if not args.document_id and not args.all:
+        parser.error("pass --document-id or --all")
+
+    logging.basicConfig(level=logging.INFO)
+    await Database.connect_db(settings.MONGO_URI)
+    try:
+        await reparse(args.document_id, args.all, args.priority, args.inline)
+    finally:
+        await Database.close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
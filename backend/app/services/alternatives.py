@@ -0,0 +1,176 @@
+# backend/app/services/alternatives.py
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+from collections import defaultdict
+from datetime import datetime
+import heapq
+import logging
+import re
+import time
+
+from pymongo import InsertOne
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ALTERNATIVE_PART_FIELDS = {
+    "_id": 0, "part_number": 1, "nomenclature": 1, "figure": 1, "item": 1, "revision": 1,
+    "effectivity_type": 1, "effectivity_values": 1, "effectivity_range": 1
+}
+
+TOKEN_PATTERN = re.compile(r"[A-Z0-9]+")
+
+Interval = Tuple[int, int]
+
+
+def effectivity_intervals(part: Dict) -> List[Interval]:
+    """
+    Effectivity as sorted, disjoint [start, end] line intervals:
+    a RANGE is one interval, LIST values are merged into runs of consecutive lines
+    """
+    if part.get("effectivity_type") == "RANGE":
+        range_data = part.get("effectivity_range") or {}
+        start, end = range_data.get("from"), range_data.get("to")
+        if start is None or end is None:
+            return []
+        return [(min(start, end), max(start, end))]
+
+    intervals: List[Interval] = []
+    for line in sorted(set(part.get("effectivity_values") or ())):
+        if intervals and line == intervals[-1][1] + 1:
+            intervals[-1] = (intervals[-1][0], line)
+        else:
+            intervals.append((line, line))
+    return intervals
+
+
+def nomenclature_tokens(nomenclature: Optional[str]) -> FrozenSet[str]:
+    """Word set of a nomenclature; IPD indent dots and punctuation are dropped"""
+    return frozenset(TOKEN_PATTERN.findall((nomenclature or "").upper()))
+
+
+def token_set_similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Jaccard similarity of two token sets (0 when either is empty)"""
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+def overlapping_pairs(intervals: Iterable[Tuple[int, int, int]]) -> Dict[Tuple[int, int], int]:
+    """
+    Sweep over (start, end, row) intervals sorted by start: an interval
+    overlaps exactly the active ones whose end has not passed its start.
+    Returns {(row_a, row_b): overlapping lines} with row_a < row_b.
+    Cost is O(n log n + overlapping pairs) instead of comparing every pair.
+    """
+    overlaps: Dict[Tuple[int, int], int] = defaultdict(int)
+    active: List[Tuple[int, int, int]] = []  # heap of (end, start, row)
+
+    for start, end, row in sorted(intervals):
+        while active and active[0][0] < start:
+            heapq.heappop(active)
+        for other_end, _, other in active:
+            if other != row:
+                pair = (other, row) if other < row else (row, other)
+                overlaps[pair] += min(end, other_end) - start + 1
+        heapq.heappush(active, (end, start, row))
+    return overlaps
+
+
+def find_alternatives(parts: List[Dict], min_similarity: float) -> Dict[int, List[Dict]]:
+    """
+    Alternatives per SRS 5.4: same revision and figure, overlapping
+    effectivity and similar nomenclature, between different part numbers.
+    Returns {row in parts: [alternative, ...]}, best match first.
+    """
+    groups: Dict[Tuple, List[int]] = defaultdict(list)
+    for row, part in enumerate(parts):
+        if part.get("figure"):
+            groups[(part.get("revision"), part["figure"])].append(row)
+
+    tokens: Dict[int, FrozenSet[str]] = {}
+    found: Dict[int, List[Dict]] = defaultdict(list)
+
+    for rows in groups.values():
+        if len(rows) < 2:
+            continue
+        intervals = (
+            (start, end, row)
+            for row in rows
+            for start, end in effectivity_intervals(parts[row])
+        )
+        for (a, b), overlap in overlapping_pairs(intervals).items():
+            if parts[a]["part_number"] == parts[b]["part_number"]:
+                continue
+            for row in (a, b):
+                if row not in tokens:
+                    tokens[row] = nomenclature_tokens(parts[row].get("nomenclature"))
+            similarity = token_set_similarity(tokens[a], tokens[b])
+            if similarity < min_similarity:
+                continue
+            for row, other in ((a, b), (b, a)):
+                found[row].append({
+                    "part_number": parts[other]["part_number"],
+                    "item": parts[other].get("item"),
+                    "nomenclature": parts[other].get("nomenclature"),
+                    "similarity": round(similarity, 3),
+                    "overlap_lines": overlap
+                })
+
+    for alternatives in found.values():
+        alternatives.sort(key=lambda alt: (-alt["similarity"], -alt["overlap_lines"], alt["part_number"]))
+    return found
+
+
+async def rebuild_document_alternatives(db, document_id: str,
+                                        min_similarity: Optional[float] = None) -> int:
+    """
+    Recompute the alternatives of one document into the alternatives
+    collection (one row per part with alternatives, replaced as a whole).
+    Returns the number of rows written.
+    """
+    if min_similarity is None:
+        min_similarity = settings.ALTERNATIVE_MIN_SIMILARITY
+    started = time.perf_counter()
+
+    parts = await db.ipd_parts.find(
+        {"document_id": document_id}, ALTERNATIVE_PART_FIELDS
+    ).sort("_id", 1).to_list(length=None)
+    found = find_alternatives(parts, min_similarity)
+
+    now = datetime.utcnow()
+    ops = [
+        InsertOne({
+            "document_id": document_id,
+            "revision": parts[row].get("revision"),
+            "figure": parts[row].get("figure"),
+            "item": parts[row].get("item"),
+            "part_number": parts[row]["part_number"],
+            "alternatives": alternatives,
+            "alternative_count": len(alternatives),
+            "updated_at": now
+        })
+        for row, alternatives in sorted(found.items())
+    ]
+
+    await db.alternatives.delete_many({"document_id": document_id})
+    for i in range(0, len(ops), 1000):
+        await db.alternatives.bulk_write(ops[i:i + 1000], ordered=False)
+
+    logger.info(
+        f"🔀 Alternatives for {document_id}: {len(ops)} parts with alternatives "
+        f"({int((time.perf_counter() - started) * 1000)} ms)"
+    )
+    return len(ops)
+
+
+async def read_alternatives(db, part_number: str, revision: Optional[str] = None,
+                            document_id: Optional[str] = None) -> List[Dict]:
+    """Stored alternatives of a part (decision preview), one indexed query"""
+    query = {"part_number": part_number}
+    if revision:
+        query["revision"] = revision
+    if document_id:
+        query["document_id"] = document_id
+    return await db.alternatives.find(query, {"_id": 0}).sort("document_id", 1).to_list(length=None)
@@ -0,0 +1,40 @@
+# backend/app/services/app_state.py
+from typing import List
+from pymongo import ReturnDocument
+from app.services.part_stats import refresh_document_stats
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+DATA_GENERATION_ID = "data_generation"
+
+
+async def current_generation(db) -> int:
+    """Counter bumped whenever the parts of any document change"""
+    doc = await db.app_state.find_one({"_id": DATA_GENERATION_ID})
+    return doc["value"] if doc else 0
+
+
+async def mark_data_changed(db, document_ids: List[str]) -> int:
+    """
+    Give documents a new data_version, update the part statistics counters,
+    then bump the data generation.
+    In-process caches watch the generation and reload changed documents.
+    """
+    if document_ids:
+        await db.documents.update_many(
+            {"document_id": {"$in": document_ids}},
+            {"$set": {"data_version": uuid.uuid4().hex}}
+        )
+
+    for document_id in document_ids:
+        await refresh_document_stats(db, document_id)
+
+    doc = await db.app_state.find_one_and_update(
+        {"_id": DATA_GENERATION_ID},
+        {"$inc": {"value": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return doc["value"]
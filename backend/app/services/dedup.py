@@ -0,0 +1,125 @@
+# backend/app/services/dedup.py
+from typing import Dict, Optional
+from datetime import datetime
+import logging
+
+from app.services.app_state import mark_data_changed
+from app.services.alternatives import rebuild_document_alternatives
+from app.services.revision_diff import record_revision
+
+logger = logging.getLogger(__name__)
+
+INFLIGHT_STATUSES = ["pending", "processing"]
+
+
+async def find_parsed_duplicate(db, file_hash: str) -> Optional[Dict]:
+    """Latest completed, originally parsed document with the same content hash"""
+    return await db.documents.find_one(
+        {"file_hash": file_hash, "parsing_status": "completed", "dedup_of": None},
+        sort=[("uploaded_at", -1)]
+    )
+
+
+async def find_inflight_duplicate(db, file_hash: str) -> Optional[Dict]:
+    """A parse already running (or queued) for the same content hash"""
+    return await db.documents.find_one({
+        "file_hash": file_hash,
+        "parsing_status": {"$in": INFLIGHT_STATUSES},
+        "dedup_of": None
+    })
+
+
+async def clone_document_parts(db, source_document_id: str, target_document_id: str,
+                               revision: Optional[str] = None) -> int:
+    """
+    Copy all parts of a parsed document to another document server-side.
+    ipd_part_id is rebuilt the same way ingest builds it.
+    """
+    pipeline = [
+        {"$match": {"document_id": source_document_id}},
+        {"$unset": "_id"},
+        {"$set": {
+            "document_id": target_document_id,
+            "revision": revision,
+            "ipd_part_id": {"$concat": [
+                "$part_number", "_", target_document_id, "_", {"$toString": "$page_number"}
+            ]},
+            "created_at": "$$NOW"
+        }},
+        {"$merge": {
+            "into": "ipd_parts",
+            "on": "ipd_part_id",
+            "whenMatched": "replace",
+            "whenNotMatched": "insert"
+        }}
+    ]
+    await db.ipd_parts.aggregate(pipeline).to_list(length=None)
+
+    return await db.ipd_parts.count_documents({"document_id": target_document_id})
+
+
+async def complete_from_source(db, document_id: str, source: Dict) -> bool:
+    """
+    Fill a duplicate document from its completed source.
+    Claims the document first so concurrent callers clone it only once.
+    """
+    claimed = await db.documents.find_one_and_update(
+        {"document_id": document_id, "parsing_status": "pending"},
+        {"$set": {"parsing_status": "processing"}}
+    )
+    if not claimed:
+        return False
+
+    try:
+        parts_count = await clone_document_parts(db, source["document_id"], document_id, claimed.get("revision"))
+    except Exception as e:
+        await db.documents.update_one(
+            {"document_id": document_id},
+            {"$set": {"parsing_status": "failed", "error_message": f"Reuse failed: {e}"}}
+        )
+        logger.error(f"❌ Failed to reuse parts of {source['document_id']}: {e}")
+        return False
+
+    await db.documents.update_one(
+        {"document_id": document_id},
+        {
+            "$set": {
+                "parsing_status": "completed",
+                "parts_count": parts_count,
+                "pages_done": source.get("pages_done", 0),
+                "pages_total": source.get("pages_total"),
+                "updated_at": datetime.utcnow()
+            }
+        }
+    )
+    await mark_data_changed(db, [document_id])
+    try:
+        await rebuild_document_alternatives(db, document_id)  # clone may carry another revision
+        await record_revision(db, document_id)
+    except Exception as e:
+        # The clone is complete; derived data can be rebuilt later
+        logger.error(f"❌ Alternatives / revision record for {document_id} failed: {e}")
+    logger.info(f"♻️ Reused {parts_count} parts from {source['document_id']} for {document_id}")
+    return True
+
+
+async def release_waiting_duplicates(db, document_id: str):
+    """Resolve uploads that joined this document's parse once it has finished"""
+    source = await db.documents.find_one({"document_id": document_id})
+    if not source or source.get("parsing_status") in INFLIGHT_STATUSES:
+        return
+
+    cursor = db.documents.find({"dedup_of": document_id, "parsing_status": "pending"})
+    async for waiting in cursor:
+        if source.get("parsing_status") == "completed":
+            await complete_from_source(db, waiting["document_id"], source)
+        else:
+            await db.documents.update_one(
+                {"document_id": waiting["document_id"], "parsing_status": "pending"},
+                {
+                    "$set": {
+                        "parsing_status": "failed",
+                        "error_message": f"Source parse {document_id} failed: {source.get('error_message')}"
+                    }
+                }
+            )
@@ -0,0 +1,208 @@
+# backend/app/services/drift_detector.py
+from typing import Dict, List, Optional, Set, Tuple
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import time
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+DRIFT_STATE_ID = "drift_detector"
+
+# (line_number, revision, figure, item): one configuration slot
+SlotKey = Tuple[int, Optional[str], Optional[str], Optional[str]]
+
+# A user's latest choice for a slot: (timestamp_confirm, decision _id, part_number)
+Choice = Tuple[datetime, object, str]
+
+
+def slot_id(key: SlotKey) -> str:
+    return "|".join("" if value is None else str(value) for value in key)
+
+
+def choice_rows(choices: Dict[str, Choice]) -> List[Dict]:
+    """drift_slots form of a slot's choices"""
+    return [
+        {"user_id": user_id, "part_number": part_number, "confirmed_at": confirmed_at, "decision_id": decision_id}
+        for user_id, (confirmed_at, decision_id, part_number) in sorted(choices.items())
+    ]
+
+
+class DriftDetector:
+    """
+    Configuration drift per SRS 5.11: different users' current choices for
+    the same line, revision and figure/item slot disagree. A user changing
+    their own choice is not drift.
+
+    Keeps slot -> {user_id: latest choice} in memory and follows
+    decision_log by timestamp_confirm, so each decision costs one dict
+    update; a drift record is written as soon as the latest parts of two
+    users of a slot differ. The map is checkpointed to drift_slots and, on
+    start, restored from there plus a replay of the decisions confirmed
+    after the checkpoint. A choice only replaces an older one of the same
+    user, so applying a decision twice (or late) changes nothing, which
+    makes the clock-skew overlap of each poll and the replay safe.
+    """
+
+    def __init__(self, db, clock_skew_seconds: float = 5.0):
+        self.db = db
+        self.clock_skew = timedelta(seconds=clock_skew_seconds)
+        self.slots: Dict[SlotKey, Dict[str, Choice]] = {}
+        self.dirty: Set[SlotKey] = set()
+        self.confirmed_until: Optional[datetime] = None
+        self.checkpointed_until: Optional[datetime] = None
+        self.drifts_flagged = 0
+        self._seen: Dict = {}  # decision _id -> timestamp_confirm, within the overlap
+        self._part_slots: Dict[Tuple[str, Optional[str]], Tuple[Optional[str], Optional[str]]] = {}
+
+    async def restore(self):
+        """Load the last checkpoint; the first poll replays what came after it"""
+        started = time.perf_counter()
+        async for slot in self.db.drift_slots.find():
+            key = (slot["line_number"], slot.get("revision"), slot.get("figure"), slot.get("item"))
+            self.slots[key] = {
+                choice["user_id"]: (choice["confirmed_at"], choice["decision_id"], choice["part_number"])
+                for choice in slot.get("choices", ())
+            }
+
+        state = await self.db.app_state.find_one({"_id": DRIFT_STATE_ID}) or {}
+        self.confirmed_until = self.checkpointed_until = state.get("confirmed_until")
+        logger.info(
+            f"🧭 Drift detector restored {len(self.slots)} slots "
+            f"(checkpoint {self.confirmed_until or 'none'}, {int((time.perf_counter() - started) * 1000)} ms)"
+        )
+
+    async def poll(self) -> int:
+        """Apply decisions confirmed since the last poll; returns how many were new"""
+        query = {"confirmation_checked": True, "timestamp_confirm": {"$ne": None}}
+        if self.confirmed_until is not None:
+            query["timestamp_confirm"] = {"$gte": self.confirmed_until - self.clock_skew}
+
+        applied = 0
+        cursor = self.db.decision_log.find(
+            query,
+            {"user_id": 1, "part_number": 1, "line_number": 1, "revision": 1, "figure": 1, "item": 1,
+             "timestamp_confirm": 1}
+        ).sort("timestamp_confirm", 1)
+        async for decision in cursor:
+            if decision["_id"] in self._seen:
+                continue
+            self._seen[decision["_id"]] = decision["timestamp_confirm"]
+            await self.apply(decision)
+            applied += 1
+            if self.confirmed_until is None or decision["timestamp_confirm"] > self.confirmed_until:
+                self.confirmed_until = decision["timestamp_confirm"]
+
+        # Only decisions inside the overlap window can be read again
+        if self.confirmed_until is not None:
+            horizon = self.confirmed_until - self.clock_skew
+            self._seen = {_id: ts for _id, ts in self._seen.items() if ts >= horizon}
+        return applied
+
+    async def apply(self, decision: Dict):
+        part_number = decision.get("part_number")
+        if not part_number or decision.get("line_number") is None:
+            return
+
+        key = (decision["line_number"], decision.get("revision"), *await self._slot_of(decision))
+        choices = self.slots.setdefault(key, {})
+        user_id = decision.get("user_id") or ""
+        choice = (decision["timestamp_confirm"], decision["_id"], part_number)
+        latest = choices.get(user_id)
+        if latest is not None and latest[:2] >= choice[:2]:
+            return
+        choices[user_id] = choice
+        self.dirty.add(key)
+        if latest is not None and latest[2] == part_number:
+            return  # the user confirmed the same part again
+
+        parts = {part for _, _, part in choices.values()}
+        if len(parts) > 1:
+            await self._flag(key, choices, decision)
+
+    async def _slot_of(self, decision: Dict) -> Tuple[Optional[str], Optional[str]]:
+        """figure/item of the decision, else of the chosen part in ipd_parts (cached)"""
+        if decision.get("figure") or decision.get("item"):
+            return decision.get("figure"), decision.get("item")
+
+        part = (decision["part_number"], decision.get("revision"))
+        if part not in self._part_slots:
+            query = {"part_number": part[0]}
+            if part[1]:
+                query["revision"] = part[1]
+            ipd_part = await self.db.ipd_parts.find_one(query, {"figure": 1, "item": 1}, sort=[("_id", -1)]) or {}
+            self._part_slots[part] = (ipd_part.get("figure"), ipd_part.get("item"))
+        return self._part_slots[part]
+
+    async def _flag(self, key: SlotKey, choices: Dict[str, Choice], decision: Dict):
+        """Open drift record of the slot, created on the first conflict and extended after"""
+        line_number, revision, figure, item = key
+        parts = {part for _, _, part in choices.values()}
+        now = datetime.utcnow()
+        await self.db.config_drift_log.update_one(
+            {"line_number": line_number, "revision": revision or "unknown",
+             "figure": figure, "item": item, "status": "open"},
+            {
+                "$addToSet": {
+                    "conflicting_parts": {"$each": sorted(parts)},
+                    "user_ids": {"$each": sorted(choices)},
+                    "decision_ids": decision["_id"]
+                },
+                "$set": {"updated_at": now},
+                "$setOnInsert": {"detected_at": now}
+            },
+            upsert=True
+        )
+        self.drifts_flagged += 1
+        logger.warning(
+            f"🔀 Drift on line {line_number} rev {revision or 'unknown'} "
+            f"fig {figure} item {item}: {', '.join(sorted(parts))}"
+        )
+
+    async def checkpoint(self):
+        """Persist changed slots, then the position they are complete up to"""
+        if self.dirty:
+            ops = [
+                UpdateOne(
+                    {"_id": slot_id(key)},
+                    {"$set": {
+                        "line_number": key[0], "revision": key[1], "figure": key[2], "item": key[3],
+                        "choices": choice_rows(self.slots[key])
+                    }},
+                    upsert=True
+                )
+                for key in self.dirty
+            ]
+            for i in range(0, len(ops), 1000):
+                await self.db.drift_slots.bulk_write(ops[i:i + 1000], ordered=False)
+            self.dirty.clear()
+
+        if self.confirmed_until != self.checkpointed_until:
+            await self.db.app_state.update_one(
+                {"_id": DRIFT_STATE_ID},
+                {"$set": {"confirmed_until": self.confirmed_until, "slots": len(self.slots)}},
+                upsert=True
+            )
+            self.checkpointed_until = self.confirmed_until
+
+    async def run(self, stopping: asyncio.Event, poll_seconds: float = 0.5, checkpoint_seconds: float = 30.0):
+        """Follow decision_log until `stopping` is set, checkpointing periodically and on exit"""
+        await self.restore()
+        last_checkpoint = time.monotonic()
+        try:
+            while not stopping.is_set():
+                try:
+                    await self.poll()
+                    if time.monotonic() - last_checkpoint >= checkpoint_seconds:
+                        await self.checkpoint()
+                        last_checkpoint = time.monotonic()
+                except Exception as e:
+                    logger.error(f"❌ Drift detector poll failed: {e}")
+                try:
+                    await asyncio.wait_for(stopping.wait(), timeout=poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await self.checkpoint()
@@ -0,0 +1,452 @@
+# backend/app/services/effectivity_index.py
+from typing import Dict, Iterator, List, Optional, Sequence
+import asyncio
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.app_state import current_generation
+from app.services.filter_service import applicability_matrix
+
+logger = logging.getLogger(__name__)
+
+PART_FIELDS = {
+    "_id": 0, "document_id": 1, "part_number": 1, "nomenclature": 1, "figure": 1, "item": 1,
+    "effectivity_type": 1, "effectivity_values": 1, "effectivity_range": 1,
+    "page_number": 1, "confidence": 1
+}
+
+
+def part_payload(part: Dict) -> Dict:
+    """Applicable part as returned by /filter/line"""
+    return {
+        "part_number": part["part_number"],
+        "nomenclature": part.get("nomenclature"),
+        "figure": part.get("figure"),
+        "item": part.get("item"),
+        "effectivity": {
+            "type": part["effectivity_type"],
+            "values": part.get("effectivity_values"),
+            "range": part.get("effectivity_range")
+        },
+        "page": part.get("page_number"),
+        "confidence": part.get("confidence", 0.95)
+    }
+
+
+# DocumentIndex arrays written to / mapped from the IndexStore
+TREE_FIELDS = (
+    "tree_centers", "tree_children", "tree_offsets",
+    "tree_starts", "tree_start_parts", "tree_ends", "tree_end_parts"
+)
+ARRAY_FIELDS = ("list_lines", "list_parts", "range_starts", "range_ends", "range_parts") + TREE_FIELDS
+
+# Bumped when ARRAY_FIELDS change, so published indexes of the old layout are rebuilt
+STORE_FORMAT = 2
+
+
+def interval_tree(starts: np.ndarray, ends: np.ndarray, parts: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Centered interval tree over RANGE intervals as flat arrays (node 0 is the root).
+    Node k holds the intervals containing tree_centers[k], once sorted by start
+    and once by end, at tree_offsets[k]:tree_offsets[k + 1]; tree_children[k]
+    is (node left of the center, node right of it), -1 for none. The center is
+    the median endpoint of the node's intervals, so the depth is O(log n).
+    """
+    centers, children, offsets = [], [], [0]
+    by_start, by_end = [], []
+
+    rows = np.flatnonzero(starts <= ends)  # an inverted range matches no line
+    pending = [(rows, -1, 0)] if len(rows) else []  # (intervals, parent, side)
+    while pending:
+        rows, parent, side = pending.pop()
+        node = len(centers)
+        if parent >= 0:
+            children[parent][side] = node
+
+        points = np.concatenate([starts[rows], ends[rows]])
+        center = np.partition(points, len(points) // 2)[len(points) // 2]
+        here = rows[(starts[rows] <= center) & (ends[rows] >= center)]
+        by_start.append(here[np.argsort(starts[here], kind="stable")])
+        by_end.append(here[np.argsort(ends[here], kind="stable")])
+        centers.append(center)
+        children.append([-1, -1])
+        offsets.append(offsets[-1] + len(here))
+
+        left, right = rows[ends[rows] < center], rows[starts[rows] > center]
+        if len(left):
+            pending.append((left, node, 0))
+        if len(right):
+            pending.append((right, node, 1))
+
+    by_start = np.concatenate(by_start) if by_start else np.zeros(0, dtype=np.int64)
+    by_end = np.concatenate(by_end) if by_end else np.zeros(0, dtype=np.int64)
+    return {
+        "tree_centers": np.asarray(centers, dtype=np.int64),
+        "tree_children": np.asarray(children, dtype=np.int64).reshape(-1, 2),
+        "tree_offsets": np.asarray(offsets, dtype=np.int64),
+        "tree_starts": starts[by_start],
+        "tree_start_parts": parts[by_start],
+        "tree_ends": ends[by_end],
+        "tree_end_parts": parts[by_end]
+    }
+
+
+class PackedPayloads(Sequence):
+    """
+    Part payloads as concatenated JSON with int64 offsets (payload i is
+    data[offsets[i]:offsets[i + 1]]), decoded on access. Backed by mapped
+    files, so the bytes are shared by every process mapping them.
+    """
+
+    def __init__(self, data, offsets: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return json.loads(self.data[self.offsets[i]:self.offsets[i + 1]].tobytes())
+
+
+class DocumentIndex:
+    """
+    Effectivity lookups for the parts of one document:
+    - LIST:  (line, part) pairs sorted by line, a line is one searchsorted slice
+    - RANGE: a centered interval tree, a line visits O(log n) nodes and takes one
+             searchsorted slice of hits from each, O(log n + k) in all
+    Parts are numbered in ipd_parts order, results keep that order.
+    """
+
+    def __init__(self, document_id: str, parts: List[Dict], data_version: Optional[str] = None,
+                 revision: Optional[str] = None):
+        self.document_id = document_id
+        self.data_version = data_version
+        self.revision = revision
+        self.payloads = [part_payload(p) for p in parts]
+
+        list_lines, list_parts = [], []
+        range_starts, range_ends, range_parts = [], [], []
+        for i, part in enumerate(parts):
+            eff_type = part.get("effectivity_type")
+            if eff_type == "LIST":
+                lines = {v for v in part.get("effectivity_values") or [] if isinstance(v, int)}
+                list_lines.extend(lines)
+                list_parts.extend([i] * len(lines))
+            elif eff_type == "RANGE":
+                range_data = part.get("effectivity_range") or {}
+                from_val, to_val = range_data.get("from"), range_data.get("to")
+                if isinstance(from_val, int) and isinstance(to_val, int):
+                    range_starts.append(from_val)
+                    range_ends.append(to_val)
+                    range_parts.append(i)
+
+        order = np.argsort(np.asarray(list_lines, dtype=np.int64), kind="stable")
+        self.list_lines = np.asarray(list_lines, dtype=np.int64)[order]
+        self.list_parts = np.asarray(list_parts, dtype=np.int64)[order]
+
+        order = np.argsort(np.asarray(range_starts, dtype=np.int64), kind="stable")
+        self.range_starts = np.asarray(range_starts, dtype=np.int64)[order]
+        self.range_ends = np.asarray(range_ends, dtype=np.int64)[order]
+        self.range_parts = np.asarray(range_parts, dtype=np.int64)[order]
+
+        for field, array in interval_tree(self.range_starts, self.range_ends, self.range_parts).items():
+            setattr(self, field, array)
+        self._nodes = None
+
+    @classmethod
+    def from_arrays(cls, document_id: str, arrays: Dict[str, np.ndarray], payloads: Sequence[Dict],
+                    data_version: Optional[str] = None, revision: Optional[str] = None) -> "DocumentIndex":
+        """Index over already compiled arrays (see IndexStore)"""
+        index = cls.__new__(cls)
+        index.document_id = document_id
+        index.data_version = data_version
+        index.revision = revision
+        index.payloads = payloads
+        for field in ARRAY_FIELDS:
+            setattr(index, field, arrays[field])
+        index._nodes = None
+        return index
+
+    def __len__(self) -> int:
+        return len(self.payloads)
+
+    def lookup(self, line_number: int) -> np.ndarray:
+        """Indexes of parts applicable to a line, ascending"""
+        lo = np.searchsorted(self.list_lines, line_number, side="left")
+        hi = np.searchsorted(self.list_lines, line_number, side="right")
+        list_hits = self.list_parts[lo:hi]
+
+        hits = [list_hits]
+        centers, children, offsets = self._tree_nodes()
+        node = 0 if centers else -1
+        while node >= 0:
+            center, a, b = centers[node], offsets[node], offsets[node + 1]
+            if line_number < center:
+                # Every interval here ends at or after the center: hits are those started by the line
+                k = self.tree_starts[a:b].searchsorted(line_number, side="right")
+                hits.append(self.tree_start_parts[a:a + k])
+                node = children[node][0]
+            elif line_number > center:
+                # ... and starts at or before it: hits are those not yet ended
+                k = self.tree_ends[a:b].searchsorted(line_number, side="left")
+                hits.append(self.tree_end_parts[a + k:b])
+                node = children[node][1]
+            else:
+                hits.append(self.tree_start_parts[a:b])
+                break
+
+        return np.unique(np.concatenate(hits))
+
+    def _tree_nodes(self):
+        """Tree node arrays as Python lists, the walk reads them one element at a time"""
+        if self._nodes is None:
+            self._nodes = (self.tree_centers.tolist(), self.tree_children.tolist(), self.tree_offsets.tolist())
+        return self._nodes
+
+    def filter_by_line(self, line_number: int) -> List[Dict]:
+        return [self.payloads[i] for i in self.lookup(line_number)]
+
+    def matrix(self, line_numbers: np.ndarray) -> np.ndarray:
+        """(line x part) applicability for sorted unique line numbers"""
+        return applicability_matrix(
+            line_numbers, len(self.payloads),
+            self.list_lines, self.list_parts,
+            self.range_starts, self.range_ends, self.range_parts
+        )
+
+
+class IndexStore:
+    """
+    Compiled DocumentIndex data in flat files, memory-mapped read-only:
+
+        <store_dir>/<document_id>/<data_version>.v<STORE_FORMAT>/<array>.npy, payloads.bin, payload_offsets.npy
+
+    Every API worker on the host maps the same files, so the page cache holds
+    one copy however many workers run. A version directory is published with
+    a rename and never modified; older versions are removed once a newer one
+    is published (processes still mapping them keep their view until they swap).
+    """
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+
+    def _path(self, document_id: str, data_version: Optional[str]) -> str:
+        return os.path.join(self.store_dir, document_id, f"{data_version}.v{STORE_FORMAT}")
+
+    def load(self, document_id: str, data_version: Optional[str],
+             revision: Optional[str] = None) -> Optional[DocumentIndex]:
+        path = self._path(document_id, data_version)
+        if not os.path.isdir(path):
+            return None
+
+        try:
+            arrays = {
+                field: np.load(os.path.join(path, f"{field}.npy"), mmap_mode="r")
+                for field in ARRAY_FIELDS + ("payload_offsets",)
+            }
+            offsets = arrays.pop("payload_offsets")
+            data_path = os.path.join(path, "payloads.bin")
+            data = np.memmap(data_path, dtype=np.uint8, mode="r") if os.path.getsize(data_path) else np.zeros(0, np.uint8)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable effectivity index {path}: {e}")
+            return None
+
+        return DocumentIndex.from_arrays(
+            document_id, arrays, PackedPayloads(data, offsets),
+            data_version=data_version, revision=revision
+        )
+
+    def publish(self, index: DocumentIndex):
+        """Write a compiled index, then make it visible with one rename"""
+        path = self._path(index.document_id, index.data_version)
+        if os.path.isdir(path):
+            return
+        parent = os.path.dirname(path)
+        os.makedirs(parent, exist_ok=True)
+
+        tmp_path = tempfile.mkdtemp(dir=parent, prefix=".tmp-")
+        try:
+            for field in ARRAY_FIELDS:
+                np.save(os.path.join(tmp_path, f"{field}.npy"), getattr(index, field))
+
+            encoded = [json.dumps(p, separators=(",", ":")).encode("utf-8") for p in index.payloads]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum([len(b) for b in encoded], out=offsets[1:])
+            np.save(os.path.join(tmp_path, "payload_offsets.npy"), offsets)
+            with open(os.path.join(tmp_path, "payloads.bin"), "wb") as f:
+                f.write(b"".join(encoded))
+
+            os.rename(tmp_path, path)
+        except OSError:
+            # Another process published the same version first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            if not os.path.isdir(path):
+                raise
+            return
+
+        for name in os.listdir(parent):
+            if name != os.path.basename(path) and not name.startswith(".tmp-"):
+                shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+
+
+async def load_document_indexes(db, documents: List[Dict],
+                                store: Optional[IndexStore] = None) -> Dict[str, DocumentIndex]:
+    """
+    Build DocumentIndex objects for documents (dicts with document_id, data_version, revision).
+    With a store, published indexes are mapped and the rest built from MongoDB and published.
+    """
+    if not documents:
+        return {}
+
+    indexes = {}
+    if store:
+        for doc in documents:
+            index = await asyncio.to_thread(store.load, doc["document_id"], doc.get("data_version"), doc.get("revision"))
+            if index is not None:
+                indexes[doc["document_id"]] = index
+
+    missing = [doc for doc in documents if doc["document_id"] not in indexes]
+    if not missing:
+        return indexes
+
+    parts_by_doc = {doc["document_id"]: [] for doc in missing}
+    cursor = db.ipd_parts.find(
+        {"document_id": {"$in": list(parts_by_doc)}},
+        PART_FIELDS
+    ).sort("_id", 1).batch_size(5000)
+    async for part in cursor:
+        parts_by_doc[part["document_id"]].append(part)
+
+    for doc in missing:
+        index = DocumentIndex(
+            doc["document_id"],
+            parts_by_doc[doc["document_id"]],
+            data_version=doc.get("data_version"),
+            revision=doc.get("revision")
+        )
+        if store:
+            await asyncio.to_thread(store.publish, index)
+            # Serve from the mapping too, so this process does not keep a private copy
+            index = await asyncio.to_thread(store.load, index.document_id, index.data_version, index.revision) or index
+        indexes[doc["document_id"]] = index
+    return indexes
+
+
+class EffectivityIndex:
+    """
+    In-process effectivity index over all completed documents.
+    Loaded from MongoDB on first use, then kept current by refresh(), which
+    reloads only documents whose data_version changed (see app_state).
+    With a store, document indexes are shared memory mappings (see IndexStore).
+    """
+
+    def __init__(self, store: Optional[IndexStore] = None):
+        self.store = store
+        self.documents: Dict[str, DocumentIndex] = {}
+        self.generation: Optional[int] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.generation is not None
+
+    async def ensure_loaded(self, db):
+        if not self.loaded:
+            await self.refresh(db)
+
+    async def ensure_generation(self, db, generation: int):
+        """Refresh now if the index was built from an older data generation"""
+        if self.generation is None or self.generation < generation:
+            await self.refresh(db)
+
+    async def refresh(self, db) -> bool:
+        """Sync with the database if the data generation moved; True if anything changed"""
+        async with self._lock:
+            generation = await current_generation(db)
+            if generation == self.generation:
+                return False
+
+            started = time.perf_counter()
+            wanted = {}
+            async for doc in db.documents.find(
+                {"parsing_status": "completed"},
+                {"_id": 0, "document_id": 1, "data_version": 1, "revision": 1}
+            ):
+                wanted[doc["document_id"]] = doc
+
+            stale = [
+                doc_id for doc_id, doc in wanted.items()
+                if doc_id not in self.documents or self.documents[doc_id].data_version != doc.get("data_version")
+            ]
+            dropped = [doc_id for doc_id in self.documents if doc_id not in wanted]
+
+            loaded = await load_document_indexes(db, [wanted[doc_id] for doc_id in stale], self.store)
+
+            # Swap in the new generation at once, requests never see a mix
+            documents = {doc_id: index for doc_id, index in self.documents.items() if doc_id in wanted}
+            documents.update(loaded)
+            self.documents = documents
+            self.generation = generation
+
+            logger.info(
+                f"🗂️ Effectivity index gen {generation}: loaded {len(loaded)} documents, "
+                f"dropped {len(dropped)}, {self.parts_count()} parts "
+                f"({int((time.perf_counter() - started) * 1000)} ms)"
+            )
+            return bool(loaded or dropped)
+
+    def select(self, document_id: Optional[str] = None, revision: Optional[str] = None) -> List[DocumentIndex]:
+        """Indexed documents matching the optional document/revision filter"""
+        return [
+            index for doc_id, index in self.documents.items()
+            if (not document_id or doc_id == document_id) and (not revision or index.revision == revision)
+        ]
+
+    def parts_count(self) -> int:
+        return sum(len(index) for index in self.documents.values())
+
+    def iter_by_line(self, line_number: int, document_id: Optional[str] = None) -> Iterator[Dict]:
+        """filter_by_line one document at a time, for streaming responses"""
+        indexes = [self.documents.get(document_id)] if document_id else list(self.documents.values())
+        for index in indexes:
+            if index:
+                yield from index.filter_by_line(line_number)
+
+    def filter_by_line(self, line_number: int, document_id: Optional[str] = None) -> List[Dict]:
+        """Applicable parts for a line, over one document or all of them"""
+        if document_id:
+            index = self.documents.get(document_id)
+            return index.filter_by_line(line_number) if index else []
+
+        applicable = []
+        for index in self.documents.values():
+            applicable.extend(index.filter_by_line(line_number))
+        return applicable
+
+
+async def refresh_periodically(index, db, interval_seconds: float):
+    """Background task for the API process: pick up documents finished by workers"""
+    while True:
+        try:
+            await index.refresh(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ {type(index).__name__} refresh failed: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+# Shared by the API process
+effectivity_index = EffectivityIndex(
+    IndexStore(settings.EFFECTIVITY_INDEX_DIR) if settings.EFFECTIVITY_INDEX_SHARED else None
+)
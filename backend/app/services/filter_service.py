@@ -1,6 +1,37 @@
 # backend/app/services/filter_service.py
-from typing import List, Dict, Optional
-import time
+from typing import Dict
+
+import numpy as np
+
+def applicability_matrix(line_numbers: np.ndarray, n_parts: int,
+                         list_lines: np.ndarray, list_parts: np.ndarray,
+                         range_starts: np.ndarray, range_ends: np.ndarray,
+                         range_parts: np.ndarray) -> np.ndarray:
+    """
+    Boolean (line x part) applicability for sorted unique line_numbers.
+    LIST effectivity comes as (line, part) pairs, RANGE as (start, end, part).
+    """
+    n_lines = len(line_numbers)
+    if not n_lines or not n_parts:
+        return np.zeros((n_lines, n_parts), dtype=bool)
+    
+    # RANGE: each interval covers a contiguous block of the sorted lines;
+    # mark its first row +1 and the row after its last -1, a cumsum fills it in
+    first = np.searchsorted(line_numbers, range_starts, side='left')
+    after = np.searchsorted(line_numbers, range_ends, side='right')
+    covers = after > first  # skips inverted ranges and ranges between requested lines
+    marks = np.zeros((n_lines + 1, n_parts), dtype=np.int8)
+    marks[first[covers], range_parts[covers]] = 1
+    marks[after[covers], range_parts[covers]] = -1
+    matrix = np.cumsum(marks, axis=0, dtype=np.int8)[:-1].astype(bool)
+    
+    # LIST: place every (line, part) pair whose line was requested
+    rows = np.minimum(np.searchsorted(line_numbers, list_lines), n_lines - 1)
+    hit = line_numbers[rows] == list_lines
+    matrix[rows[hit], list_parts[hit]] = True
+    
+    return matrix
+
 
 class FilterService:
     """
@@ -8,48 +39,13 @@ class FilterService:
     Phase 1: No caching yet, just direct database queries
     """
     
-    async def filter_by_line(self, line_number: int, parts: List[Dict]) -> Dict:
-        """
-        Filter parts by line number based on effectivity
-        """
-        applicable = []
-        non_applicable = []
-        
-        for part in parts:
-            effectivity = part.get('effectivity', {})
-            eff_type = effectivity.get('type')
-            
-            is_applicable = False
-            
-            if eff_type == 'LIST':
-                if line_number in effectivity.get('values', []):
-                    is_applicable = True
-                    
-            elif eff_type == 'RANGE':
-                from_val = effectivity.get('from')
-                to_val = effectivity.get('to')
-                if from_val and to_val and from_val <= line_number <= to_val:
-                    is_applicable = True
-            
-            # Build simplified part info
-            part_info = {
-                'part_number': part['part_number'],
-                'nomenclature': part.get('nomenclature'),
-                'figure': part.get('figure'),
-                'item': part.get('item'),
-                'page': part.get('page_number', part.get('page')),
-                'confidence': part.get('confidence', 0.95)
-            }
-            
-            if is_applicable:
-                applicable.append(part_info)
-            else:
-                non_applicable.append(part_info)
-        
-        return {
-            'line_number': line_number,
-            'applicable_parts': applicable,
-            'non_applicable_parts': non_applicable[:50],  # Limit non-applicable
-            'total_applicable': len(applicable),
-            'total_parts': len(parts)
-        }
\ No newline at end of file
+    def is_applicable(self, part: Dict, line_number: int) -> bool:
+        """Applicability of one ipd_parts record for a line"""
+        if part.get("effectivity_type") == "LIST":
+            return line_number in (part.get("effectivity_values") or [])
+        if part.get("effectivity_type") == "RANGE":
+            range_data = part.get("effectivity_range") or {}
+            # Same rule as DocumentIndex and line_query: any integer bounds, 0 included
+            if range_data.get("from") is not None and range_data.get("to") is not None:
+                return range_data["from"] <= line_number <= range_data["to"]
+        return False
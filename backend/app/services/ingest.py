@@ -0,0 +1,183 @@
+# backend/app/services/ingest.py
+from typing import Awaitable, Callable, Dict, Optional
+from datetime import datetime
+import logging
+
+from app.core.config import settings
+from app.services.parser import IPDParser
+from app.services.table_cache import TableCache
+from app.services.part_writer import PartWriter
+from app.services.dedup import release_waiting_duplicates
+from app.services.layout_cache import load_layouts, save_layouts
+from app.services.app_state import mark_data_changed
+from app.services.effectivity_index import IndexStore, load_document_indexes
+from app.services.line_bitmaps import LineBitmapStore, build_line_bitmaps
+from app.services.similar_parts import similar_part_index, register_document_part_numbers
+from app.services.alternatives import rebuild_document_alternatives
+from app.services.revision_diff import record_revision
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[Dict], Awaitable[None]]
+
+
+async def parse_document_background(document_id: str, pdf_path: str, db,
+                                    progress: Optional[ProgressCallback] = None):
+    """
+    Parse a document and store its parts.
+    Raises on failure; the caller decides whether to retry or mark it failed.
+    """
+    document = await db.documents.find_one({"document_id": document_id}, {"file_hash": 1, "revision": 1}) or {}
+    file_hash = document.get("file_hash")
+
+    # Update status
+    await db.documents.update_one(
+        {"document_id": document_id},
+        {
+            "$set": {"parsing_status": "processing", "parts_count": 0, "pages_done": 0},
+            "$unset": {"error_message": ""}
+        }
+    )
+
+    # Re-parse / retry: parts from the previous run are replaced, not merged
+    deleted = await db.ipd_parts.delete_many({"document_id": document_id})
+    if deleted.deleted_count:
+        logger.info(f"🧹 Removed {deleted.deleted_count} previous parts of {document_id}")
+
+    # Parse document page by page, writer stage saves parts in batches
+    parser = IPDParser(
+        workers=settings.PARSER_WORKERS,
+        pages_per_chunk=settings.PARSER_PAGES_PER_CHUNK,
+        layouts=await load_layouts(db),
+        table_cache=TableCache(settings.TABLE_CACHE_DIR) if settings.TABLE_CACHE_ENABLED else None
+    )
+    report = {}
+
+    async with PartWriter(db, document_id, batch_size=settings.INGEST_BATCH_SIZE, report=report,
+                          revision=document.get("revision")) as writer:
+        async for page, parts in parser.iter_pages(pdf_path, report, file_hash):
+            await writer.put(page, parts)
+            if progress:
+                await progress({
+                    "pages_done": page,
+                    "pages_total": report.get("pages_total"),
+                    "parts_extracted": report.get("parts_extracted")
+                })
+
+    await save_layouts(db, parser.new_layouts)
+    
+    # Update document status
+    await db.documents.update_one(
+        {"document_id": document_id},
+        {
+            "$set": {
+                "parsing_status": "completed",
+                "parts_count": writer.saved_count,
+                "pages_done": writer.pages_done,
+                "parse_report": report,
+                "updated_at": datetime.utcnow()
+            },
+            "$unset": {"inflight_hash": ""}  # later uploads of this file reuse it from here on
+        }
+    )
+
+    await run_completion_steps(db, document_id)
+
+    return report
+
+
+async def run_completion_steps(db, document_id: str):
+    """
+    Everything that follows a document being marked completed. Failures are
+    logged, not raised: an exception here would make the worker retry the job,
+    i.e. delete and re-parse a document that is already completed.
+    """
+    async def register_part_numbers():
+        # New (or never computed) part numbers into part_master with their similar-part counts
+        registered = await register_document_part_numbers(db, similar_part_index, document_id)
+        if registered:
+            logger.info(f"🔤 {registered} part numbers registered in part_master")
+
+    steps = [
+        ("Data version / statistics update", lambda: mark_data_changed(db, [document_id])),
+        ("Index publishing", lambda: publish_document_indexes(db, document_id)),
+        ("Part master registration", register_part_numbers),
+        # Alternatives for the decision preview
+        ("Alternatives", lambda: rebuild_document_alternatives(db, document_id)),
+        # Revision record with its change summary against the previous revision
+        ("Revision record", lambda: record_revision(db, document_id)),
+        # Uploads of the same file that joined this parse
+        ("Releasing joined duplicates", lambda: release_waiting_duplicates(db, document_id))
+    ]
+    for name, step in steps:
+        try:
+            await step()
+        except Exception as e:
+            logger.error(f"❌ {name} for {document_id} failed: {e}")
+
+
+async def publish_document_indexes(db, document_id: str):
+    """
+    Compile the effectivity index and line bitmaps of a parsed document once,
+    here in the worker, so API processes only map/load them
+    """
+    if not (settings.EFFECTIVITY_INDEX_SHARED or settings.LINE_BITMAPS_ENABLED):
+        return
+
+    document = await db.documents.find_one(
+        {"document_id": document_id},
+        {"_id": 0, "document_id": 1, "data_version": 1, "revision": 1}
+    )
+    try:
+        index_store = IndexStore(settings.EFFECTIVITY_INDEX_DIR) if settings.EFFECTIVITY_INDEX_SHARED else None
+        index = (await load_document_indexes(db, [document], index_store))[document_id]
+
+        if settings.LINE_BITMAPS_ENABLED:
+            bitmaps = await build_line_bitmaps(
+                db, LineBitmapStore(settings.LINE_BITMAP_DIR), document,
+                settings.LINE_BITMAP_CHUNK_LINES, index=index
+            )
+            logger.info(f"🧮 Line bitmaps for {document_id}: {len(bitmaps.part_numbers)} part numbers x {bitmaps.n_segments} line segments")
+    except Exception as e:
+        # Not fatal, the API builds whatever is missing on refresh
+        logger.warning(f"Indexes for {document_id} not published: {e}")
+
+
+async def mark_document_failed(db, document_id: str, error: str, status: str = "failed"):
+    """Final failure (or cancellation) of a document parse"""
+    await db.documents.update_one(
+        {"document_id": document_id},
+        {
+            "$set": {
+                "parsing_status": status,
+                "error_message": error
+            },
+            "$unset": {"inflight_hash": ""}
+        }
+    )
+    # Parts may have been cleared or half written
+    await mark_data_changed(db, [document_id])
+    await release_waiting_duplicates(db, document_id)
+
+
+async def request_reparse(db, job_queue, document: Dict, priority: int = 0) -> Optional[Dict]:
+    """
+    Queue a re-parse of an already uploaded document. With the table cache
+    this only re-runs extraction, Camelot is skipped for cached pages.
+    Returns None if the document already has an active job.
+    """
+    document_id = document["document_id"]
+    active = await db.parse_jobs.find_one(
+        {"document_id": document_id, "status": {"$in": ["queued", "running"]}},
+        {"_id": 1}
+    )
+    if active:
+        return None
+
+    await db.documents.update_one(
+        {"document_id": document_id},
+        {"$set": {"parsing_status": "pending", "updated_at": datetime.utcnow()}}
+    )
+    return await job_queue.enqueue(
+        document_id, document["source_pdf_path"], job_type="reparse", priority=priority
+    )
@@ -0,0 +1,206 @@
+# backend/app/services/job_queue.py
+from typing import Dict, Optional
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job when cancellation was requested"""
+
+
+class LeaseLost(Exception):
+    """Raised when a worker no longer holds the lease of its job (expired or re-claimed)"""
+
+
+class JobQueue:
+    """
+    Durable parse job queue backed by the parse_jobs collection.
+
+    Jobs are claimed with a lease; a worker that dies leaves its job to be
+    re-claimed once the lease expires. Every later transition only applies
+    while the claiming worker still holds an unexpired lease, so a worker
+    that stalled past its lease cannot overwrite the state of the worker
+    that re-claimed the job. Higher priority runs first, then FIFO.
+    """
+
+    def __init__(self, db, max_attempts: int = 3, retry_backoff_seconds: int = 30,
+                 lease_seconds: int = 300):
+        self.jobs = db.parse_jobs
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.lease_seconds = lease_seconds
+
+    async def enqueue(self, document_id: str, pdf_path: str, job_type: str = "parse",
+                      priority: int = 0) -> Dict:
+        """Add a job for a document"""
+        now = datetime.utcnow()
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "job_type": job_type,
+            "document_id": document_id,
+            "pdf_path": pdf_path,
+            "status": "queued",
+            "priority": priority,
+            "attempts": 0,
+            "max_attempts": self.max_attempts,
+            "run_after": now,
+            "cancel_requested": False,
+            "created_at": now,
+            "updated_at": now
+        }
+        await self.jobs.insert_one(job)
+        return job
+
+    async def claim(self, worker_id: str) -> Optional[Dict]:
+        """Take the next runnable job, including jobs whose lease has expired"""
+        now = datetime.utcnow()
+        return await self.jobs.find_one_and_update(
+            {
+                "$or": [
+                    {"status": "queued", "run_after": {"$lte": now}},
+                    {"status": "running", "lease_expires": {"$lt": now}}
+                ]
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "worker_id": worker_id,
+                    "started_at": now,
+                    "lease_expires": now + timedelta(seconds=self.lease_seconds),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("priority", -1), ("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def heartbeat(self, job: Dict, progress: Optional[Dict] = None):
+        """
+        Extend the lease of a running job. Raises LeaseLost if the lease is no
+        longer ours, JobCancelled if cancel was requested.
+        """
+        now = datetime.utcnow()
+        update = {
+            "lease_expires": now + timedelta(seconds=self.lease_seconds),
+            "updated_at": now
+        }
+        if progress:
+            update["progress"] = progress
+
+        current = await self.jobs.find_one_and_update(
+            self._owned(job, now),
+            {"$set": update},
+            projection={"cancel_requested": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if not current:
+            raise LeaseLost(job["job_id"])
+        if current.get("cancel_requested"):
+            raise JobCancelled(job["job_id"])
+
+    async def complete(self, job: Dict):
+        await self._finish(job, "completed")
+
+    async def fail(self, job: Dict, error: str) -> bool:
+        """
+        Record a failed attempt. Returns True if the job was re-queued
+        with exponential backoff, False if it has run out of attempts.
+        Raises LeaseLost if the lease is no longer ours.
+        """
+        now = datetime.utcnow()
+
+        if job.get("attempts", 0) < job.get("max_attempts", self.max_attempts):
+            delay = self.retry_backoff_seconds * (2 ** (job["attempts"] - 1))
+            await self._transition(job, now, {
+                "$set": {
+                    "status": "queued",
+                    "run_after": now + timedelta(seconds=delay),
+                    "error": error,
+                    "updated_at": now
+                },
+                "$unset": {"worker_id": "", "lease_expires": ""}
+            })
+            logger.warning(f"🔁 Job {job['job_id']} failed (attempt {job['attempts']}), retry in {delay}s")
+            return True
+
+        await self._finish(job, "failed", error=error)
+        return False
+
+    async def mark_cancelled(self, job: Dict):
+        await self._finish(job, "cancelled")
+
+    async def requeue(self, job: Dict):
+        """Hand a claimed job back untouched (worker shutting down)"""
+        now = datetime.utcnow()
+        await self._transition(job, now, {
+            "$set": {"status": "queued", "run_after": now},
+            "$inc": {"attempts": -1},
+            "$unset": {"worker_id": "", "lease_expires": ""}
+        })
+
+    async def cancel(self, document_id: str) -> Optional[Dict]:
+        """
+        Cancel the active job of a document. Queued jobs are cancelled
+        immediately, running jobs are flagged and stop at their next heartbeat.
+        """
+        now = datetime.utcnow()
+        job = await self.jobs.find_one_and_update(
+            {"document_id": document_id, "status": "queued"},
+            {"$set": {"status": "cancelled", "finished_at": now, "updated_at": now}},
+            return_document=ReturnDocument.AFTER
+        )
+        if job:
+            return job
+
+        return await self.jobs.find_one_and_update(
+            {"document_id": document_id, "status": "running"},
+            {"$set": {"cancel_requested": True, "updated_at": now}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def latest_for_document(self, document_id: str) -> Optional[Dict]:
+        return await self.jobs.find_one(
+            {"document_id": document_id},
+            sort=[("created_at", -1)]
+        )
+
+    async def position(self, job: Dict) -> int:
+        """Number of queued jobs that will run before this one"""
+        if job.get("status") != "queued":
+            return 0
+
+        return await self.jobs.count_documents({
+            "status": "queued",
+            "$or": [
+                {"priority": {"$gt": job["priority"]}},
+                {"priority": job["priority"], "created_at": {"$lt": job["created_at"]}}
+            ]
+        })
+
+    async def _finish(self, job: Dict, status: str, error: Optional[str] = None):
+        now = datetime.utcnow()
+        update = {"status": status, "finished_at": now, "updated_at": now}
+        if error:
+            update["error"] = error
+
+        await self._transition(job, now, {"$set": update, "$unset": {"lease_expires": ""}})
+
+    @staticmethod
+    def _owned(job: Dict, now: datetime) -> Dict:
+        """Filter matching the job only while its claim is still ours"""
+        return {
+            "job_id": job["job_id"],
+            "status": "running",
+            "worker_id": job["worker_id"],
+            "lease_expires": {"$gt": now}
+        }
+
+    async def _transition(self, job: Dict, now: datetime, update: Dict):
+        result = await self.jobs.update_one(self._owned(job, now), update)
+        if not result.matched_count:
+            raise LeaseLost(job["job_id"])
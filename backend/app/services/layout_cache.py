@@ -0,0 +1,48 @@
+# backend/app/services/layout_cache.py
+from typing import Dict, Tuple
+from datetime import datetime
+from pymongo import UpdateOne
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def layout_key(fingerprint: Tuple[str, ...]) -> str:
+    """Stable id for a normalized header tuple"""
+    return hashlib.sha1(json.dumps(list(fingerprint)).encode("utf-8")).hexdigest()
+
+
+async def load_layouts(db) -> Dict[Tuple[str, ...], Dict]:
+    """All known table layouts, in the shape IPDParser(layouts=...) expects"""
+    layouts = {}
+    async for doc in db.parser_layouts.find({}, {"_id": 0, "columns": 1, "roles": 1, "header_row": 1}):
+        layouts[tuple(doc["columns"])] = {
+            "columns": doc["columns"],
+            "roles": doc.get("roles"),
+            "header_row": doc.get("header_row", False)
+        }
+    return layouts
+
+
+async def save_layouts(db, layouts: Dict[Tuple[str, ...], Dict]):
+    """Persist layouts learned during a parse"""
+    if not layouts:
+        return
+
+    now = datetime.utcnow()
+    ops = [
+        UpdateOne(
+            {"layout_key": layout_key(fingerprint)},
+            {
+                "$set": {"columns": entry["columns"], "roles": entry["roles"], "updated_at": now},
+                "$max": {"header_row": entry["header_row"]},
+                "$setOnInsert": {"created_at": now}
+            },
+            upsert=True
+        )
+        for fingerprint, entry in layouts.items()
+    ]
+    await db.parser_layouts.bulk_write(ops, ordered=False)
+    logger.info(f"🗂️ Saved {len(ops)} table layouts")
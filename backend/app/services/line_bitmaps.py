@@ -0,0 +1,287 @@
+# backend/app/services/line_bitmaps.py
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import os
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.app_state import current_generation
+from app.services.effectivity_index import DocumentIndex, IndexStore, effectivity_index, load_document_indexes
+
+logger = logging.getLogger(__name__)
+
+SET_OPS = ("union", "intersection", "difference", "symmetric_difference")
+
+
+class LineBitmaps:
+    """
+    Line applicability of one document (revision) as packed bit arrays
+    (np.packbits, big-endian bit order) over distinct part numbers.
+    Applicability only changes at effectivity breakpoints, so rows are
+    segments rather than single lines: segment i covers the lines from
+    line_starts[i] up to line_starts[i + 1] (the last one runs to infinity
+    and is empty). Size follows the effectivity data, not the line span.
+    - by_line: segment -> part-number set
+    - by_part: part number -> segment set, the transpose
+    A part number with several records (figures, pages) applies to a line
+    if any of its records does.
+    """
+
+    def __init__(self, document_id: str, part_numbers: List[str], line_starts: np.ndarray,
+                 by_line: np.ndarray, data_version: Optional[str] = None,
+                 revision: Optional[str] = None):
+        self.document_id = document_id
+        self.data_version = data_version
+        self.revision = revision
+        self.part_numbers = part_numbers
+        self.line_starts = line_starts
+        self.by_line = by_line
+        self.by_part = transpose_bits(by_line, len(part_numbers))
+        self._part_rows = {pn: i for i, pn in enumerate(part_numbers)}
+
+    @property
+    def n_segments(self) -> int:
+        return len(self.line_starts)
+
+    @classmethod
+    def from_index(cls, index: DocumentIndex, chunk_lines: int = 512) -> "LineBitmaps":
+        """Build from a DocumentIndex, chunk_lines segments of the segment x record matrix at a time"""
+        part_numbers, codes = np.unique(
+            np.asarray([p["part_number"] for p in index.payloads], dtype=object).astype(str),
+            return_inverse=True
+        )
+        # A LIST line applies on [line, line + 1), a RANGE on [start, end + 1)
+        line_starts = np.unique(np.concatenate([
+            index.list_lines, index.list_lines + 1, index.range_starts, index.range_ends + 1
+        ])).astype(np.int64)
+        n_bytes = (len(part_numbers) + 7) // 8
+        if not len(line_starts) or not len(part_numbers):
+            return cls(index.document_id, part_numbers.tolist(), np.zeros(0, dtype=np.int64),
+                       np.zeros((0, n_bytes), dtype=np.uint8),
+                       data_version=index.data_version, revision=index.revision)
+
+        # Records grouped by part number, reduceat ORs each group into one column
+        order = np.argsort(codes, kind="stable")
+        group_starts = np.flatnonzero(np.r_[True, np.diff(codes[order]) != 0])
+
+        blocks = []
+        for start in range(0, len(line_starts), chunk_lines):
+            # Applicability is constant within a segment, its first line stands for it
+            matrix = index.matrix(line_starts[start:start + chunk_lines])[:, order]
+            blocks.append(np.packbits(np.logical_or.reduceat(matrix, group_starts, axis=1), axis=1))
+
+        return cls(index.document_id, part_numbers.tolist(), line_starts,
+                   np.concatenate(blocks), data_version=index.data_version, revision=index.revision)
+
+    def line_row(self, line_number: int) -> np.ndarray:
+        """Packed part-number set of a line (empty before the first breakpoint)"""
+        row = int(np.searchsorted(self.line_starts, line_number, side="right")) - 1
+        if row >= 0:
+            return self.by_line[row]
+        return np.zeros(self.by_line.shape[1], dtype=np.uint8)
+
+    def combine(self, line_numbers: List[int], op: str) -> List[str]:
+        """
+        Part numbers from a set operation over the lines' part sets.
+        difference is the first line minus all others.
+        """
+        if not line_numbers:
+            return []
+        rows = np.stack([self.line_row(line) for line in line_numbers])
+
+        if op == "union":
+            packed = np.bitwise_or.reduce(rows, axis=0)
+        elif op == "intersection":
+            packed = np.bitwise_and.reduce(rows, axis=0)
+        elif op == "difference":
+            packed = rows[0] & ~np.bitwise_or.reduce(rows[1:], axis=0) if len(rows) > 1 else rows[0]
+        elif op == "symmetric_difference":
+            # Parts applicable to some but not all of the lines
+            packed = np.bitwise_or.reduce(rows, axis=0) & ~np.bitwise_and.reduce(rows, axis=0)
+        else:
+            raise ValueError(f"Unknown set operation: {op}")
+
+        bits = np.unpackbits(packed, count=len(self.part_numbers))
+        return [self.part_numbers[i] for i in np.flatnonzero(bits)]
+
+    def line_ranges_of(self, part_number: str) -> Optional[List[List[int]]]:
+        """Inclusive [from, to] line ranges a part number applies to, None if the document does not have it"""
+        row = self._part_rows.get(part_number)
+        if row is None:
+            return None
+        segments = np.flatnonzero(np.unpackbits(self.by_part[row], count=self.n_segments))
+
+        ranges: List[List[int]] = []
+        for segment in segments.tolist():
+            start = int(self.line_starts[segment])
+            end = int(self.line_starts[segment + 1]) - 1  # the last segment is never set
+            if ranges and ranges[-1][1] == start - 1:
+                ranges[-1][1] = end
+            else:
+                ranges.append([start, end])
+        return ranges
+
+
+def transpose_bits(by_line: np.ndarray, n_parts: int, block_bytes: int = 512) -> np.ndarray:
+    """Packed (rows x parts) bitmap to packed (parts x rows), unpacking block_bytes columns at a time"""
+    n_rows = by_line.shape[0]
+    by_part = np.zeros((n_parts, (n_rows + 7) // 8), dtype=np.uint8)
+    if not n_rows or not n_parts:
+        return by_part
+    for start in range(0, by_line.shape[1], block_bytes):
+        first = start * 8
+        count = min(block_bytes * 8, n_parts - first)
+        bits = np.unpackbits(by_line[:, start:start + block_bytes], axis=1, count=count)
+        by_part[first:first + count] = np.packbits(bits.T, axis=1)
+    return by_part
+
+
+class LineBitmapStore:
+    """
+    Bitmaps on disk, one compressed .npz per document:
+
+        <store_dir>/<document_id>.npz
+
+    The file records the data_version it was built from; a file from an older
+    version is ignored and rebuilt.
+    """
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+
+    def _path(self, document_id: str) -> str:
+        return os.path.join(self.store_dir, f"{document_id}.npz")
+
+    def get(self, document_id: str, data_version: Optional[str]) -> Optional[LineBitmaps]:
+        path = self._path(document_id)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if str(data["data_version"]) != str(data_version) or "line_starts" not in data.files:
+                    return None  # other version, or the dense per-line layout: rebuild
+                return LineBitmaps(
+                    document_id,
+                    data["part_numbers"].tolist(),
+                    data["line_starts"],
+                    data["by_line"],
+                    data_version=data_version,
+                    revision=str(data["revision"]) or None
+                )
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable line bitmaps {path}: {e}")
+            return None
+
+    def put(self, bitmaps: LineBitmaps):
+        """Store bitmaps of one document (atomically)"""
+        os.makedirs(self.store_dir, exist_ok=True)
+        path = self._path(bitmaps.document_id)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            data_version=np.asarray(str(bitmaps.data_version)),
+            revision=np.asarray(bitmaps.revision or ""),
+            part_numbers=np.asarray(bitmaps.part_numbers, dtype=str),
+            line_starts=bitmaps.line_starts,
+            by_line=bitmaps.by_line
+        )
+        os.replace(tmp_path, path)
+
+
+async def build_line_bitmaps(db, store: LineBitmapStore, document: Dict, chunk_lines: int = 512,
+                             index_store: Optional[IndexStore] = None,
+                             index: Optional[DocumentIndex] = None) -> LineBitmaps:
+    """Build bitmaps for a document (dict with document_id, data_version, revision) and store them"""
+    if index is None:
+        index = (await load_document_indexes(db, [document], index_store))[document["document_id"]]
+    bitmaps = await asyncio.to_thread(LineBitmaps.from_index, index, chunk_lines)
+    await asyncio.to_thread(store.put, bitmaps)
+    return bitmaps
+
+
+class LineBitmapIndex:
+    """
+    LineBitmaps of all completed documents for set-algebra queries.
+    Same refresh scheme as EffectivityIndex; stale documents come from the
+    store when ingest already built them, otherwise they are built here.
+    """
+
+    def __init__(self, store: LineBitmapStore, chunk_lines: int = 512,
+                 index_store: Optional[IndexStore] = None):
+        self.store = store
+        self.index_store = index_store
+        self.chunk_lines = chunk_lines
+        self.documents: Dict[str, LineBitmaps] = {}
+        self.generation: Optional[int] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.generation is not None
+
+    async def ensure_loaded(self, db):
+        if not self.loaded:
+            await self.refresh(db)
+
+    async def refresh(self, db) -> bool:
+        """Sync with the database if the data generation moved; True if anything changed"""
+        async with self._lock:
+            generation = await current_generation(db)
+            if generation == self.generation:
+                return False
+
+            started = time.perf_counter()
+            wanted = {}
+            async for doc in db.documents.find(
+                {"parsing_status": "completed"},
+                {"_id": 0, "document_id": 1, "data_version": 1, "revision": 1}
+            ):
+                wanted[doc["document_id"]] = doc
+
+            stale = [
+                doc_id for doc_id, doc in wanted.items()
+                if doc_id not in self.documents or self.documents[doc_id].data_version != doc.get("data_version")
+            ]
+            dropped = [doc_id for doc_id in self.documents if doc_id not in wanted]
+
+            # Built aside and swapped in at once, requests never see a mix
+            documents = {doc_id: bitmaps for doc_id, bitmaps in self.documents.items() if doc_id in wanted}
+            from_store = built = 0
+            for doc_id in stale:
+                doc = wanted[doc_id]
+                bitmaps = await asyncio.to_thread(self.store.get, doc_id, doc.get("data_version"))
+                if bitmaps is not None:
+                    bitmaps.revision = doc.get("revision")
+                    from_store += 1
+                else:
+                    bitmaps = await build_line_bitmaps(db, self.store, doc, self.chunk_lines, self.index_store)
+                    built += 1
+                documents[doc_id] = bitmaps
+            self.documents = documents
+            self.generation = generation
+
+            logger.info(
+                f"🧮 Line bitmaps gen {generation}: {from_store} documents from store, "
+                f"{built} built, dropped {len(dropped)} "
+                f"({int((time.perf_counter() - started) * 1000)} ms)"
+            )
+            return bool(stale or dropped)
+
+    def select(self, document_id: Optional[str] = None, revision: Optional[str] = None) -> List[LineBitmaps]:
+        """Documents matching the optional document/revision filter"""
+        return [
+            bitmaps for doc_id, bitmaps in self.documents.items()
+            if (not document_id or doc_id == document_id) and (not revision or bitmaps.revision == revision)
+        ]
+
+
+# Shared by the API process
+line_bitmap_index = LineBitmapIndex(
+    LineBitmapStore(settings.LINE_BITMAP_DIR),
+    chunk_lines=settings.LINE_BITMAP_CHUNK_LINES,
+    index_store=effectivity_index.store
+)
@@ -1,72 +1,110 @@
 # backend/app/services/parser.py
-import camelot
 import pandas as pd
+import numpy as np
 import re
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pypdf import PdfReader
+from app.services.table_cache import TableCache, read_tables
+import asyncio
 import logging
 import os
+import time
 
 logger = logging.getLogger(__name__)
 
+PART_NUMBER_PATTERN = re.compile(r'^[A-Z0-9]{5,15}[-]?\d{0,3}$')
+EFFECTIVITY_RANGE_PATTERN = re.compile(r'(\d+)\s*[-–]\s*(\d+)')
+NUMBER_PATTERN = re.compile(r'\d+')
+
+# Camelot options for IPD tables (lattice for tables with lines)
+LATTICE_OPTIONS = {'line_scale': 40, 'strip_text': '\n'}
+
+# Drawing flavor selection (parse_drawing)
+DRAWING_FLAVOR_OPTIONS = {
+    'stream': {'edge_tol': 1000, 'row_tol': 20, 'strip_text': '\n'},  # Lebih toleran untuk tabel lebar
+    'lattice': {'line_scale': 40},
+}
+RULING_OPERATORS = {b're', b'l'}
+TEXT_OPERATORS = {b'Tj', b'TJ', b"'", b'"'}
+DRAWING_MIN_RULINGS = 8
+DRAWING_RULING_TEXT_RATIO = 0.2  # rulings per text show operator
+DRAWING_MIN_PAGE_ITEMS = 1  # pages below this are retried with the other flavor
+
+# Candidate header names per field, in lookup order (see _get_field)
+FIELD_COLUMNS = {
+    'nomenclature': ['NOMENCLATURE', 'DESC'],
+    'figure': ['FIG', 'FIGURE'],
+    'item': ['ITEM'],
+    'upa': ['UPA', 'QTY'],
+}
+
+# Per-stage timings in parse reports (seconds, summed over workers)
+TIMING_STAGES = ('camelot', 'cleaning', 'extraction')
+
+# Keyword -> ipd_parts.sticker_type, first match wins
+STICKER_KEYWORDS = (
+    ('PLACARD', 'PLACARD'),
+    ('STENCIL', 'STENCIL'),
+    ('DECAL', 'DECAL'),
+    ('MARKING', 'MARKING'),
+    ('MARKER', 'MARKING'),
+)
+
+
+def detect_sticker_type(text: Optional[str]) -> Optional[str]:
+    """Sticker type from nomenclature/description text, None if it is not a sticker"""
+    if not text:
+        return None
+    text_upper = text.upper()
+    for keyword, sticker_type in STICKER_KEYWORDS:
+        if keyword in text_upper:
+            return sticker_type
+    return None
+
+
+def _new_timings() -> Dict[str, float]:
+    return {stage: 0.0 for stage in TIMING_STAGES}
+
+
+def _parse_page_range(pdf_path: str, pages: range, layouts: Dict,
+                      table_cache: Optional[TableCache], file_hash: Optional[str]) -> Dict:
+    """Process pool entry point: lattice extraction for one page range"""
+    return IPDParser(layouts=layouts, table_cache=table_cache)._parse_pages(pdf_path, pages, file_hash)
+
+
 class IPDParser:
     """
     Simple parser for Boeing IPD documents using Camelot
     Phase 1: Focus on extracting part numbers and effectivity
     """
     
-    def __init__(self):
+    def __init__(self, workers: int = 1, pages_per_chunk: int = 25, layouts: Optional[Dict] = None,
+                 table_cache: Optional[TableCache] = None):
         self.supported_change_types = ['ADD', 'MODIFY', 'DELETE', 'RF']
+        self.workers = max(1, workers)
+        self.pages_per_chunk = max(1, pages_per_chunk)
+        self.table_cache = table_cache
+        
+        # Header layout fingerprint -> {'columns', 'roles', 'header_row'}
+        self.layouts = dict(layouts or {})
+        self.new_layouts: Dict[Tuple[str, ...], Dict] = {}
     
-    async def parse(self, pdf_path: str) -> Dict:
+    async def parse(self, pdf_path: str, file_hash: Optional[str] = None) -> Dict:
         """
         Parse IPD PDF and extract parts
         """
-        logger.info(f"📄 Parsing: {os.path.basename(pdf_path)}")
-        
         all_parts = []
-        report = {
-            'tables_found': 0,
-            'parts_extracted': 0,
-            'pages_processed': 0
-        }
+        report = {}
         
         try:
-            # Parse with Camelot (lattice for tables with lines)
-            tables = camelot.read_pdf(
-                pdf_path,
-                pages='all',
-                flavor='lattice',
-                line_scale=40,
-                strip_text='\n'
-            )
-            
-            report['tables_found'] = len(tables)
-            
-            for table in tables:
-                df = table.df
-                
-                # Basic cleaning
-                df = df.replace(r'^\s*$', pd.NA, regex=True)
-                df = df.dropna(how='all').dropna(axis=1, how='all')
-                
-                # Try to find header
-                header_row = self._find_header_row(df)
-                if header_row is not None:
-                    df = self._apply_header(df, header_row)
-                
-                # Process rows
-                for idx, row in df.iterrows():
-                    part = self._extract_part(row, table.page)
-                    if part:
-                        all_parts.append(part)
-                
-                report['pages_processed'] += 1
-            
-            report['parts_extracted'] = len(all_parts)
-            logger.info(f"✅ Extracted {len(all_parts)} parts")
+            async for page, parts in self.iter_pages(pdf_path, report, file_hash):
+                all_parts.extend(parts)
             
         except Exception as e:
             logger.error(f"❌ Error parsing PDF: {e}")
+            all_parts = []
             report['error'] = str(e)
         
         return {
@@ -74,6 +112,320 @@ class IPDParser:
             'report': report
         }
     
+    async def iter_pages(self, pdf_path: str, report: Dict,
+                         file_hash: Optional[str] = None) -> AsyncIterator[Tuple[int, List[Dict]]]:
+        """
+        Parse IPD PDF page by page, yielding (page, parts) in page order.
+        `report` is filled in as pages complete; errors propagate to the caller.
+        With a table cache and file_hash, cached pages skip Camelot entirely.
+        """
+        logger.info(f"📄 Parsing: {os.path.basename(pdf_path)}")
+        
+        report.update({
+            'tables_found': 0,
+            'parts_extracted': 0,
+            'pages_processed': 0,
+            'pages_total': 0,
+            'pages_camelot': 0,
+            'layout_cache': {'hits': 0, 'misses': 0, 'header_skips': 0, 'hit_rate': None},
+            'timings': _new_timings()
+        })
+        
+        page_ranges = self._split_pages(pdf_path)
+        report['pages_total'] = sum(len(pages) for pages in page_ranges)
+        
+        async for pages, result in self._iter_ranges(pdf_path, page_ranges, file_hash):
+            report['tables_found'] += result['tables_found']
+            report['pages_processed'] += result['pages_processed']
+            report['pages_camelot'] += result['pages_camelot']
+            for stage, seconds in result['timings'].items():
+                report['timings'][stage] = round(report['timings'][stage] + seconds, 4)
+            self._merge_layout_stats(report['layout_cache'], result['layout'])
+            
+            for page in pages:
+                parts = result['parts'].get(page, [])
+                report['parts_extracted'] += len(parts)
+                yield page, parts
+        
+        logger.info(f"✅ Extracted {report['parts_extracted']} parts")
+    
+    async def _iter_ranges(self, pdf_path: str, page_ranges: List[range],
+                           file_hash: Optional[str] = None) -> AsyncIterator[Tuple[range, Dict]]:
+        """Parse page ranges serially or across a process pool, in input order"""
+        loop = asyncio.get_running_loop()
+        
+        if self.workers == 1 or len(page_ranges) == 1:
+            # Off the event loop so heartbeats and other jobs keep running
+            for pages in page_ranges:
+                result = await loop.run_in_executor(None, self._parse_pages, pdf_path, pages, file_hash)
+                self._learn_layouts(result['layout']['layouts'])
+                yield pages, result
+            return
+        
+        logger.info(f"   Splitting into {len(page_ranges)} page ranges over {self.workers} workers")
+        pool = ProcessPoolExecutor(max_workers=min(self.workers, len(page_ranges)))
+        
+        try:
+            # Keep a bounded window in flight so finished ranges don't pile up in memory.
+            # Each range gets the layouts learned so far; the first one runs alone, so
+            # the document's common layouts reach every worker instead of being
+            # learned again per range.
+            pending = deque()
+            for i, pages in enumerate(page_ranges):
+                future = loop.run_in_executor(
+                    pool, _parse_page_range, pdf_path, pages, self.layouts, self.table_cache, file_hash
+                )
+                pending.append((pages, future))
+                if i == 0 or len(pending) >= self.workers * 2:
+                    done_pages, done_future = pending.popleft()
+                    result = await done_future
+                    self._learn_layouts(result['layout']['layouts'])
+                    yield done_pages, result
+            
+            while pending:
+                done_pages, done_future = pending.popleft()
+                result = await done_future
+                self._learn_layouts(result['layout']['layouts'])
+                yield done_pages, result
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+    
+    def _split_pages(self, pdf_path: str) -> List[range]:
+        """Split the document into page ranges of pages_per_chunk pages"""
+        page_count = len(PdfReader(pdf_path).pages)
+        return [
+            range(start, min(start + self.pages_per_chunk, page_count + 1))
+            for start in range(1, page_count + 1, self.pages_per_chunk)
+        ]
+    
+    def _parse_pages(self, pdf_path: str, pages: range, file_hash: Optional[str] = None) -> Dict:
+        """Lattice extraction and part extraction for a page range"""
+        parts = {}
+        layout = {'hits': 0, 'misses': 0, 'header_skips': 0, 'layouts': {}}
+        timings = _new_timings()
+        
+        # Parse with Camelot (lattice for tables with lines), or from the table cache
+        started = time.perf_counter()
+        tables, pages_camelot = read_tables(
+            pdf_path, list(pages), 'lattice', LATTICE_OPTIONS, self.table_cache, file_hash
+        )
+        timings['camelot'] += time.perf_counter() - started
+        
+        for page, df in tables:
+            parts.setdefault(page, []).extend(self._parse_table(df, page, layout, timings))
+        
+        return {
+            'parts': parts,
+            'tables_found': len(tables),
+            'pages_processed': len(tables),
+            'pages_camelot': pages_camelot,
+            'layout': layout,
+            'timings': timings
+        }
+    
+    def _merge_layout_stats(self, summary: Dict, layout: Dict):
+        """
+        Fold one range's layout cache stats into the parse. Stats are summed
+        over ranges; a range started from the layouts known when it was
+        submitted, so ranges already in flight may repeat a miss.
+        """
+        for key in ('hits', 'misses', 'header_skips'):
+            summary[key] += layout[key]
+        lookups = summary['hits'] + summary['misses']
+        summary['hit_rate'] = round(summary['hits'] / lookups, 4) if lookups else None
+    
+    def _learn_layouts(self, layouts: Dict):
+        """Layouts a range learned, for the ranges submitted after it and save_layouts"""
+        for fingerprint, entry in layouts.items():
+            known = self.layouts.get(fingerprint)
+            if known and known['header_row']:
+                entry = {**entry, 'header_row': True}
+            self.layouts[fingerprint] = entry
+            self.new_layouts[fingerprint] = entry
+    
+    def _parse_table(self, df: pd.DataFrame, page: int, layout: Optional[Dict] = None,
+                     timings: Optional[Dict] = None) -> List[Dict]:
+        """Clean a Camelot table and extract its parts"""
+        parts = []
+        layout = layout if layout is not None else {'hits': 0, 'misses': 0, 'header_skips': 0, 'layouts': {}}
+        timings = timings if timings is not None else _new_timings()
+        started = time.perf_counter()
+        
+        # Basic cleaning
+        df = df.replace(r'^\s*$', pd.NA, regex=True)
+        df = df.dropna(how='all').dropna(axis=1, how='all')
+        
+        # Known header layout on the first row: that is the row _find_header_row would pick
+        known = self.layouts.get(self._fingerprint(df.iloc[0].values)) if len(df) else None
+        header_fingerprint = None
+        if known and known['header_row']:
+            header_row = df.index[0]
+            layout['header_skips'] += 1
+        else:
+            # Try to find header
+            header_row = self._find_header_row(df)
+            if header_row is not None:
+                header_fingerprint = self._fingerprint(df.loc[header_row].values)
+        
+        if header_row is not None:
+            df = self._apply_header(df, header_row)
+        
+        cleaned = time.perf_counter()
+        timings['cleaning'] += cleaned - started
+        
+        try:
+            roles = self._layout_roles(df.columns, layout)
+            if header_fingerprint is not None:
+                self._flag_header_row(header_fingerprint, layout)
+            if roles is not None:
+                try:
+                    return self._extract_parts_columnar(df, page, roles)
+                except Exception as e:
+                    logger.debug(f"Columnar extraction failed, falling back to rows: {e}")
+            
+            # Process rows
+            for idx, row in df.iterrows():
+                part = self._extract_part(row, page)
+                if part:
+                    parts.append(part)
+            
+            return parts
+        finally:
+            timings['extraction'] += time.perf_counter() - cleaned
+    
+    def _fingerprint(self, values) -> Tuple[str, ...]:
+        """Normalized header tuple identifying a table layout"""
+        return tuple(str(v).upper().strip() for v in values)
+    
+    def _layout_roles(self, columns, layout: Dict) -> Optional[Dict]:
+        """Column roles for a header, from the layout cache when possible"""
+        fingerprint = self._fingerprint(columns)
+        known = self.layouts.get(fingerprint)
+        if known:
+            layout['hits'] += 1
+            return known['roles']
+        
+        layout['misses'] += 1
+        entry = {
+            'columns': list(fingerprint),
+            'roles': self._resolve_column_roles(fingerprint),
+            'header_row': False
+        }
+        self.layouts[fingerprint] = entry
+        layout['layouts'][fingerprint] = entry
+        return entry['roles']
+    
+    def _flag_header_row(self, fingerprint: Tuple[str, ...], layout: Dict):
+        """Mark a layout as seen on a detected header row, so later tables can skip detection"""
+        entry = self.layouts.get(fingerprint)
+        if entry and entry['header_row']:
+            return
+        
+        entry = {
+            'columns': list(fingerprint),
+            'roles': entry['roles'] if entry else self._resolve_column_roles(fingerprint),
+            'header_row': True
+        }
+        self.layouts[fingerprint] = entry
+        layout['layouts'][fingerprint] = entry
+    
+    def _resolve_column_roles(self, columns) -> Optional[Dict]:
+        """
+        Resolve which column positions feed each field, once per table.
+        Each role is an ordered list of positions; the first non-empty cell wins,
+        matching the per-row lookup order of _extract_part.
+        Returns None when normalized headers repeat (row dicts would collapse them).
+        """
+        keys = [str(col).upper().strip() for col in columns]
+        if len(set(keys)) != len(keys):
+            return None
+        
+        roles = {
+            'part_number_header': [i for i, key in enumerate(keys) if 'PART' in key and 'NUMBER' in key],
+            'effectivity': [i for i, key in enumerate(keys) if 'EFFECT' in key],
+        }
+        for field, names in FIELD_COLUMNS.items():
+            positions = []
+            for name in names:
+                positions.extend(i for i, key in enumerate(keys) if name in key and i not in positions)
+            roles[field] = positions
+        
+        return roles
+    
+    def _extract_parts_columnar(self, df: pd.DataFrame, page: int, roles: Dict) -> List[Dict]:
+        """Vectorized equivalent of running _extract_part over every row"""
+        if df.empty:
+            return []
+        
+        cells = pd.DataFrame(
+            {i: df.iloc[:, i].astype('string').str.strip() for i in range(df.shape[1])}
+        )
+        present = cells.notna().to_numpy()
+        values = cells.to_numpy(dtype=object, na_value=None)
+        rows = np.arange(len(cells))
+        
+        def first_present(positions: List[int], mask: np.ndarray = None) -> np.ndarray:
+            """Per row, value of the first listed column whose mask is set"""
+            result = np.full(len(cells), None, dtype=object)
+            if not positions:
+                return result
+            hits = (mask if mask is not None else present)[:, positions]
+            found = hits.any(axis=1)
+            first = np.asarray(positions)[hits.argmax(axis=1)]
+            result[found] = values[rows[found], first[found]]
+            return result
+        
+        # Part number: designated column, or any value shaped like a part number
+        part_mask = present.copy()
+        for i in range(cells.shape[1]):
+            if i not in roles['part_number_header']:
+                part_mask[:, i] &= cells[i].str.fullmatch(PART_NUMBER_PATTERN).fillna(False).to_numpy(dtype=bool)
+        part_numbers = first_present(list(range(cells.shape[1])), part_mask)
+        
+        # Effectivity: rows need both a part number and effectivity text
+        eff_text = pd.Series(first_present(roles['effectivity']), dtype='string')
+        keep = (pd.notna(part_numbers) & eff_text.notna().to_numpy())
+        if not keep.any():
+            return []
+        
+        eff_text = eff_text[keep].str.replace(',', ' ', regex=False).str.replace('  ', ' ', regex=False)
+        ranges = eff_text.str.extract(EFFECTIVITY_RANGE_PATTERN)
+        numbers = eff_text.str.findall(NUMBER_PATTERN)
+        
+        fields = {field: first_present(roles[field])[keep] for field in FIELD_COLUMNS}
+        
+        parts = []
+        for part_number, range_from, range_to, nums, nomenclature, figure, item, upa in zip(
+            part_numbers[keep],
+            ranges[0].to_numpy(dtype=object, na_value=None),
+            ranges[1].to_numpy(dtype=object, na_value=None),
+            numbers.to_numpy(dtype=object),
+            fields['nomenclature'],
+            fields['figure'],
+            fields['item'],
+            fields['upa']
+        ):
+            if range_from is not None:
+                effectivity = {'type': 'RANGE', 'from': int(range_from), 'to': int(range_to)}
+            elif nums:
+                effectivity = {'type': 'LIST', 'values': [int(n) for n in nums]}
+            else:
+                effectivity = {'type': 'UNKNOWN'}
+            
+            parts.append({
+                'part_number': part_number,
+                'nomenclature': nomenclature,
+                'figure': figure,
+                'item': item,
+                'effectivity': effectivity,
+                'upa': self._parse_int(upa),
+                'sticker_type': detect_sticker_type(nomenclature),
+                'page': page,
+                'confidence': 0.95
+            })
+        
+        return parts
+    
     def _find_header_row(self, df: pd.DataFrame) -> Optional[int]:
         """Find which row contains column headers"""
         header_keywords = ['FIG', 'ITEM', 'PART', 'NOMENCLATURE', 'EFFECT']
@@ -113,10 +465,10 @@ class IPDParser:
                 return None
             
             # Get other fields
-            nomenclature = self._get_field(row_dict, ['NOMENCLATURE', 'DESC'])
-            figure = self._get_field(row_dict, ['FIG', 'FIGURE'])
-            item = self._get_field(row_dict, ['ITEM'])
-            upa = self._parse_int(self._get_field(row_dict, ['UPA', 'QTY']))
+            nomenclature = self._get_field(row_dict, FIELD_COLUMNS['nomenclature'])
+            figure = self._get_field(row_dict, FIELD_COLUMNS['figure'])
+            item = self._get_field(row_dict, FIELD_COLUMNS['item'])
+            upa = self._parse_int(self._get_field(row_dict, FIELD_COLUMNS['upa']))
             
             return {
                 'part_number': part_number,
@@ -125,6 +477,7 @@ class IPDParser:
                 'item': item,
                 'effectivity': effectivity,
                 'upa': upa,
+                'sticker_type': detect_sticker_type(nomenclature),
                 'page': page,
                 'confidence': 0.95
             }
@@ -140,7 +493,7 @@ class IPDParser:
                 return row_dict[key]
             # Also check for common part number patterns
             val = row_dict[key]
-            if re.match(r'^[A-Z0-9]{5,15}[-]?\d{0,3}$', str(val)):
+            if PART_NUMBER_PATTERN.match(str(val)):
                 return val
         return None
     
@@ -159,7 +512,7 @@ class IPDParser:
         eff_text = str(eff_text).replace(',', ' ').replace('  ', ' ')
         
         # Check for range (e.g., "100-200")
-        range_match = re.search(r'(\d+)\s*[-–]\s*(\d+)', eff_text)
+        range_match = EFFECTIVITY_RANGE_PATTERN.search(eff_text)
         if range_match:
             return {
                 'type': 'RANGE',
@@ -168,7 +521,7 @@ class IPDParser:
             }
         
         # Extract all numbers for LIST
-        numbers = re.findall(r'\d+', eff_text)
+        numbers = NUMBER_PATTERN.findall(eff_text)
         if numbers:
             return {
                 'type': 'LIST',
@@ -192,9 +545,11 @@ class IPDParser:
         return None
 # backend/app/services/parser.py - Update drawing parser
 
-    async def parse_drawing(self, pdf_path: str) -> Dict:
+    async def parse_drawing(self, pdf_path: str, file_hash: Optional[str] = None) -> Dict:
         """
-        Parse drawing document with complex layout
+        Parse drawing document with complex layout.
+        Flavor is picked per page from cheap content-stream features; only
+        low-yield pages are retried with the other flavor.
         """
         logger.info(f"📐 Parsing drawing: {os.path.basename(pdf_path)}")
         
@@ -202,54 +557,58 @@ class IPDParser:
         report = {
             'tables_found': 0,
             'items_extracted': 0,
-            'pages_processed': 0
+            'pages_processed': 0,
+            'page_strategies': [],
+            'timings': _new_timings()
         }
         
         try:
-            # Strategy 1: Stream with edge_tol for wide tables
-            tables = camelot.read_pdf(
-                pdf_path,
-                pages='all',
-                flavor='stream',
-                edge_tol=1000,  # Lebih toleran untuk tabel lebar
-                row_tol=20,     # Toleransi baris
-                strip_text='\n'
-            )
+            reader = PdfReader(pdf_path)
+            strategies = {}
+            for page_number, page in enumerate(reader.pages, start=1):
+                features = self._page_features(page)
+                strategies[page_number] = {
+                    'page': page_number,
+                    'flavor': self._choose_flavor(features),
+                    'features': features,
+                    'items': 0,
+                    'retry_flavor': None,
+                    'retry_items': 0
+                }
             
-            report['tables_found'] = len(tables)
-            logger.info(f"   Found {len(tables)} tables with stream")
+            # Pass 1: each page with its chosen flavor
+            page_items = {page: [] for page in strategies}
+            for flavor in DRAWING_FLAVOR_OPTIONS:
+                pages = [p for p, s in strategies.items() if s['flavor'] == flavor]
+                for page, items in self._read_drawing_pages(pdf_path, pages, flavor, report, file_hash).items():
+                    page_items[page].extend(items)
             
-            for table in tables:
-                df = table.df
-                logger.debug(f"   Table shape: {df.shape}")
-                
-                # Clean dataframe
-                df = df.replace(r'^\s*$', pd.NA, regex=True)
-                df = df.replace(r'\s+', ' ', regex=True)
-                
-                # Process each row
-                for idx, row in df.iterrows():
-                    items = self._extract_drawing_items_from_row(row, table.page)
-                    all_items.extend(items)
-                
-                report['pages_processed'] += 1
+            for page, strategy in strategies.items():
+                strategy['items'] = len(page_items[page])
             
-            # Strategy 2: Jika masih kurang, coba lattice untuk tabel dengan garis
-            if len(all_items) < 10:
-                tables2 = camelot.read_pdf(
-                    pdf_path,
-                    pages='all',
-                    flavor='lattice',
-                    line_scale=40
-                )
-                logger.info(f"   Found {len(tables2)} tables with lattice")
+            # Pass 2: low-yield pages with the other flavor, deduplicated per page
+            for flavor in DRAWING_FLAVOR_OPTIONS:
+                pages = [
+                    p for p, s in strategies.items()
+                    if s['flavor'] != flavor and s['items'] < DRAWING_MIN_PAGE_ITEMS
+                ]
+                for page in pages:
+                    strategies[page]['retry_flavor'] = flavor
                 
-                for table in tables2:
-                    df = table.df
-                    for idx, row in df.iterrows():
-                        items = self._extract_drawing_items_from_row(row, table.page)
-                        all_items.extend(items)
+                for page, items in self._read_drawing_pages(pdf_path, pages, flavor, report, file_hash).items():
+                    seen = {self._drawing_item_key(item) for item in page_items[page]}
+                    for item in items:
+                        key = self._drawing_item_key(item)
+                        if key not in seen:
+                            seen.add(key)
+                            page_items[page].append(item)
+                            strategies[page]['retry_items'] += 1
             
+            for page in sorted(page_items):
+                all_items.extend(page_items[page])
+            
+            report['page_strategies'] = [strategies[page] for page in sorted(strategies)]
+            report['timings'] = {stage: round(seconds, 4) for stage, seconds in report['timings'].items()}
             report['items_extracted'] = len(all_items)
             logger.info(f"✅ Extracted {len(all_items)} items from drawing")
             
@@ -264,6 +623,72 @@ class IPDParser:
             'report': report
         }
     
+    def _page_features(self, page) -> Dict:
+        """Count ruling-line and text operators in a page content stream"""
+        features = {'rulings': 0, 'text_ops': 0}
+        try:
+            contents = page.get_contents()
+            if contents is None:
+                return features
+            for _, operator in contents.operations:
+                if operator in RULING_OPERATORS:
+                    features['rulings'] += 1
+                elif operator in TEXT_OPERATORS:
+                    features['text_ops'] += 1
+        except Exception as e:
+            logger.debug(f"Could not read page content stream: {e}")
+        return features
+    
+    def _choose_flavor(self, features: Dict) -> str:
+        """Lattice for ruled pages, stream otherwise"""
+        rulings = features['rulings']
+        if rulings >= DRAWING_MIN_RULINGS and rulings >= DRAWING_RULING_TEXT_RATIO * features['text_ops']:
+            return 'lattice'
+        return 'stream'
+    
+    def _read_drawing_pages(self, pdf_path: str, pages: List[int], flavor: str, report: Dict,
+                            file_hash: Optional[str] = None) -> Dict[int, List[Dict]]:
+        """Run one Camelot flavor over a set of pages, items grouped by page"""
+        page_items = {}
+        if not pages:
+            return page_items
+        
+        timings = report['timings']
+        started = time.perf_counter()
+        tables, _ = read_tables(
+            pdf_path, pages, flavor, DRAWING_FLAVOR_OPTIONS[flavor], self.table_cache, file_hash
+        )
+        timings['camelot'] += time.perf_counter() - started
+        report['tables_found'] += len(tables)
+        logger.info(f"   Found {len(tables)} tables with {flavor} on {len(pages)} pages")
+        
+        for page, df in tables:
+            logger.debug(f"   Table shape: {df.shape}")
+            
+            started = time.perf_counter()
+            if flavor == 'stream':
+                # Clean dataframe
+                df = df.replace(r'^\s*$', pd.NA, regex=True)
+                df = df.replace(r'\s+', ' ', regex=True)
+            
+            cleaned = time.perf_counter()
+            timings['cleaning'] += cleaned - started
+            
+            items = page_items.setdefault(page, [])
+            
+            # Process each row
+            for idx, row in df.iterrows():
+                items.extend(self._extract_drawing_items_from_row(row, page))
+            timings['extraction'] += time.perf_counter() - cleaned
+            
+            report['pages_processed'] += 1
+        
+        return page_items
+    
+    def _drawing_item_key(self, item: Dict) -> Tuple:
+        """Identity of a drawing item on its page, for merging both passes"""
+        return (item.get('part_number'), item.get('item_number'), item.get('page'))
+    
     def _extract_drawing_items_from_row(self, row: pd.Series, page: int) -> List[Dict]:
         """Extract multiple items from a single row (for complex tables)"""
         items = []
@@ -371,16 +796,7 @@ class IPDParser:
     
     def _detect_sticker_type(self, text: str) -> Optional[str]:
         """Detect sticker type from text"""
-        text_upper = text.upper()
-        if 'PLACARD' in text_upper:
-            return 'PLACARD'
-        elif 'STENCIL' in text_upper:
-            return 'STENCIL'
-        elif 'DECAL' in text_upper:
-            return 'DECAL'
-        elif 'MARKING' in text_upper:
-            return 'MARKING'
-        return None
+        return detect_sticker_type(text)
     
     def _extract_sticker_text(self, text: str) -> Optional[str]:
         """Extract the actual text that goes on sticker"""
@@ -0,0 +1,112 @@
+# backend/app/services/part_stats.py
+from typing import Dict, List, Optional
+from collections import Counter
+from pymongo import ReturnDocument, UpdateOne
+import logging
+
+logger = logging.getLogger(__name__)
+
+STATS_ID = "global"
+
+
+async def document_snapshot(db, document_id: str) -> Dict:
+    """Counts for the parts of one document, in a single $facet pass"""
+    pipeline = [
+        {"$match": {"document_id": document_id}},
+        {"$facet": {
+            "by_type": [{"$group": {"_id": "$effectivity_type", "count": {"$sum": 1}}}],
+            "stickers": [{"$match": {"is_sticker": True}}, {"$count": "count"}],
+            "lines": [
+                {"$match": {"effectivity_type": "LIST"}},
+                {"$unwind": "$effectivity_values"},
+                {"$group": {"_id": "$effectivity_values", "count": {"$sum": 1}}}
+            ],
+            "part_numbers": [{"$group": {"_id": "$part_number"}}]
+        }}
+    ]
+    result = (await db.ipd_parts.aggregate(pipeline).to_list(length=1))[0]
+
+    by_type = {item["_id"]: item["count"] for item in result["by_type"]}
+    return {
+        "document_id": document_id,
+        "total_parts": sum(by_type.values()),
+        "list_count": by_type.get("LIST", 0),
+        "range_count": by_type.get("RANGE", 0),
+        "sticker_count": result["stickers"][0]["count"] if result["stickers"] else 0,
+        "line_counts": [{"line": item["_id"], "count": item["count"]} for item in result["lines"]],
+        "part_numbers": sorted(item["_id"] for item in result["part_numbers"])
+    }
+
+
+async def refresh_document_stats(db, document_id: str):
+    """
+    Bring the global counters in line with the current parts of a document.
+    The previous snapshot is swapped out atomically, so each snapshot is
+    added once (by its writer) and subtracted once (by whoever replaces it).
+    Does nothing until rebuild_part_stats has created the counters.
+    """
+    if not await db.part_stats.find_one({"_id": STATS_ID}, {"_id": 1}):
+        return
+
+    new = await document_snapshot(db, document_id)
+    old = await db.document_stats.find_one_and_replace(
+        {"document_id": document_id}, new, upsert=True, return_document=ReturnDocument.BEFORE
+    ) or {}
+
+    await db.part_stats.update_one(
+        {"_id": STATS_ID},
+        {"$inc": {
+            field: new[field] - old.get(field, 0)
+            for field in ("total_parts", "list_count", "range_count", "sticker_count")
+        }}
+    )
+
+    lines = Counter({item["line"]: item["count"] for item in new["line_counts"]})
+    lines.subtract({item["line"]: item["count"] for item in old.get("line_counts", [])})
+    await _apply_deltas(db.line_part_counts, "count", lines)
+
+    refs = Counter(new["part_numbers"])
+    refs.subtract(old.get("part_numbers", []))
+    await _apply_deltas(db.part_number_refs, "documents", refs)
+
+    # Only live part numbers stay in part_number_refs
+    await db.part_stats.update_one(
+        {"_id": STATS_ID},
+        {"$set": {"unique_part_numbers": await db.part_number_refs.count_documents({})}}
+    )
+
+
+async def _apply_deltas(collection, field: str, deltas: Counter):
+    ops = [
+        UpdateOne({"_id": key}, {"$inc": {field: delta}}, upsert=True)
+        for key, delta in deltas.items() if delta
+    ]
+    for i in range(0, len(ops), 1000):
+        await collection.bulk_write(ops[i:i + 1000], ordered=False)
+    if ops:
+        await collection.delete_many({field: {"$lte": 0}})
+
+
+async def read_part_stats(db, top_lines: int = 10) -> Optional[Dict]:
+    """Counters for /filter/statistics, None until they have been built"""
+    stats = await db.part_stats.find_one({"_id": STATS_ID})
+    if not stats:
+        return None
+
+    cursor = db.line_part_counts.find().sort([("count", -1), ("_id", 1)]).limit(top_lines)
+    stats["top_lines"] = [{"line": item["_id"], "count": item["count"]} async for item in cursor]
+    return stats
+
+
+async def rebuild_part_stats(db, document_ids: List[str]):
+    """Recount from scratch (run while no parse is writing)"""
+    for collection in (db.part_stats, db.document_stats, db.line_part_counts, db.part_number_refs):
+        await collection.delete_many({})
+    await db.part_stats.insert_one({
+        "_id": STATS_ID, "total_parts": 0, "list_count": 0, "range_count": 0,
+        "sticker_count": 0, "unique_part_numbers": 0
+    })
+
+    for document_id in document_ids:
+        await refresh_document_stats(db, document_id)
+    logger.info(f"📊 Part statistics rebuilt from {len(document_ids)} documents")
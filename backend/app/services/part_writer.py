@@ -0,0 +1,130 @@
+# backend/app/services/part_writer.py
+from typing import Dict, List, Optional
+from datetime import datetime
+from pymongo import UpdateOne
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def build_ipd_part(part: Dict, document_id: str, revision: Optional[str] = None) -> Dict:
+    """Map a parser part dict to an ipd_parts record"""
+    part_id = f"{part['part_number']}_{document_id}_{part['page']}"
+    sticker_type = part.get("sticker_type")
+
+    ipd_part = {
+        "ipd_part_id": part_id,
+        "document_id": document_id,  # Ini string, bukan ObjectId
+        "revision": revision,
+        "part_number": part["part_number"],
+        "nomenclature": part.get("nomenclature"),
+        "figure": part.get("figure"),
+        "item": part.get("item"),
+        "is_sticker": sticker_type is not None,  # classified by the parser
+        "effectivity_type": part["effectivity"]["type"],
+        "effectivity_values": part["effectivity"].get("values"),
+        "effectivity_range": part["effectivity"] if part["effectivity"].get("type") == "RANGE" else None,
+        "upa": part.get("upa"),  # Bisa None
+        "page_number": part["page"],
+        "confidence": part.get("confidence", 0.95),
+        "created_at": datetime.utcnow()
+    }
+    if sticker_type:
+        ipd_part["sticker_type"] = sticker_type  # enum in the schema, omitted rather than null
+    return ipd_part
+
+
+class PartWriter:
+    """
+    Writer stage for ingest: buffers parsed pages and flushes them to
+    ipd_parts with unordered bulk upserts, bumping document progress per batch.
+
+    Usage:
+        async with PartWriter(db, document_id) as writer:
+            async for page, parts in parser.iter_pages(pdf_path, report):
+                await writer.put(page, parts)
+    """
+
+    def __init__(self, db, document_id: str, batch_size: int = 1000,
+                 report: Optional[Dict] = None, max_pending_pages: int = 64,
+                 revision: Optional[str] = None):
+        self.db = db
+        self.document_id = document_id
+        self.revision = revision
+        self.batch_size = batch_size
+        self.report = report if report is not None else {}
+        self.saved_count = 0
+        self.pages_done = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending_pages)
+        self._task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "PartWriter":
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except BaseException:
+                pass
+            return False
+
+        await self._put_item(None)
+        await self._task
+        return False
+
+    async def put(self, page: int, parts: List[Dict]):
+        """Queue one parsed page for writing"""
+        await self._put_item((page, parts))
+
+    async def _put_item(self, item):
+        # Surface writer failures to the producer instead of blocking on a dead queue
+        put = asyncio.ensure_future(self._queue.put(item))
+        done, _ = await asyncio.wait({put, self._task}, return_when=asyncio.FIRST_COMPLETED)
+        if put not in done:
+            put.cancel()
+            self._task.result()
+
+    async def _run(self):
+        ops = []
+        pages = 0
+
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                break
+
+            page, parts = item
+            for part in parts:
+                ipd_part = build_ipd_part(part, self.document_id, self.revision)
+                ops.append(UpdateOne(
+                    {"ipd_part_id": ipd_part["ipd_part_id"]},
+                    {"$set": ipd_part},
+                    upsert=True
+                ))
+            pages += 1
+
+            # Flush on page boundaries so pages_done never counts a half-written page
+            if len(ops) >= self.batch_size:
+                await self._flush(ops, pages)
+                ops, pages = [], 0
+
+        if ops or pages:
+            await self._flush(ops, pages)
+
+    async def _flush(self, ops: List[UpdateOne], pages: int):
+        if ops:
+            await self.db.ipd_parts.bulk_write(ops, ordered=False)
+
+        self.saved_count += len(ops)
+        self.pages_done += pages
+
+        update = {"$inc": {"parts_count": len(ops), "pages_done": pages}}
+        if self.report.get("pages_total"):
+            update["$set"] = {"pages_total": self.report["pages_total"]}
+
+        await self.db.documents.update_one({"document_id": self.document_id}, update)
+        logger.debug(f"   Flushed {len(ops)} parts ({self.pages_done} pages) for {self.document_id}")
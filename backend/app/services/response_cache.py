@@ -0,0 +1,143 @@
+# backend/app/services/response_cache.py
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Tuple
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import time
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+from app.services.app_state import current_generation
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, int]
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes, etag: str):
+        self.body = body
+        self.etag = etag
+
+
+class ResponseCache:
+    """
+    LRU cache of serialized JSON responses, bounded by total body bytes.
+    Keys are (endpoint, params, data generation): parsed data only changes
+    through mark_data_changed, so a generation bump retires every entry.
+    The generation is read from MongoDB at most every generation_seconds.
+    """
+
+    def __init__(self, max_bytes: int, generation_seconds: float = 1.0):
+        self.max_bytes = max_bytes
+        self.generation_seconds = generation_seconds
+        self.entries: "OrderedDict[CacheKey, CachedResponse]" = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._generation: Optional[int] = None
+        self._generation_read_at = 0.0
+
+    async def generation(self, db) -> int:
+        now = time.monotonic()
+        if self._generation is None or now - self._generation_read_at >= self.generation_seconds:
+            generation = await current_generation(db)
+            if generation != self._generation:
+                self.clear()
+            self._generation = generation
+            self._generation_read_at = now
+        return self._generation
+
+    def get(self, key: CacheKey) -> Optional[CachedResponse]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: CacheKey, entry: CachedResponse):
+        if len(entry.body) > self.max_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size_bytes -= len(old.body)
+        self.entries[key] = entry
+        self.size_bytes += len(entry.body)
+        while self.size_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size_bytes -= len(evicted.body)
+
+    def clear(self):
+        self.entries.clear()
+        self.size_bytes = 0
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "generation": self._generation
+        }
+
+
+def make_entry(payload: Any) -> CachedResponse:
+    """Serialize a payload once; the strong ETag is the hash of the exact body bytes"""
+    body = json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode("utf-8")
+    return CachedResponse(body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in (tag.strip() for tag in header.split(","))
+
+
+async def cached_json(request: Request, db, endpoint: str, params: Dict,
+                      build: Callable[[], Awaitable[Any]], indexes: Sequence = ()) -> Response:
+    """
+    Serve a GET endpoint through the response cache: build() runs on a miss,
+    If-None-Match with the current ETag is answered with 304.
+    `indexes` are in-process indexes build() reads; on a miss they are first
+    brought up to the key's generation, so no stale result is cached under it.
+    """
+    headers = {"Cache-Control": "no-cache"}  # clients keep the body but revalidate
+
+    if not settings.RESPONSE_CACHE_ENABLED:
+        entry = make_entry(await build())
+    else:
+        generation = await response_cache.generation(db)
+        key = (endpoint, json.dumps(params, sort_keys=True, default=str), generation)
+        entry = response_cache.get(key)
+        headers["X-Cache"] = "HIT" if entry else "MISS"
+        if entry is None:
+            for index in indexes:
+                await index.ensure_generation(db, generation)
+            entry = make_entry(await build())
+            response_cache.put(key, entry)
+
+    headers["ETag"] = entry.etag
+    if etag_matches(request, entry.etag):
+        response_cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+
+# Shared by the API process
+response_cache = ResponseCache(
+    settings.RESPONSE_CACHE_MAX_BYTES,
+    generation_seconds=settings.RESPONSE_CACHE_GENERATION_SECONDS
+)
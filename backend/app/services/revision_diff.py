@@ -0,0 +1,283 @@
+# backend/app/services/revision_diff.py
+from typing import Dict, Iterator, List, Optional, Tuple
+from collections import defaultdict
+from datetime import datetime
+import hashlib
+import json
+import logging
+import time
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+# Fields whose change makes a part "modified" between revisions
+MEANINGFUL_FIELDS = (
+    "nomenclature", "supplier_code", "effectivity_type", "effectivity_values", "effectivity_range",
+    "upa", "sb_reference", "is_sticker", "sticker_type"
+)
+DIFF_PART_FIELDS = {"_id": 0, "part_number": 1, "figure": 1, "item": 1, **{f: 1 for f in MEANINGFUL_FIELDS}}
+
+PartKey = Tuple[Optional[str], Optional[str], str]
+
+
+def part_key(part: Dict) -> PartKey:
+    """Join key: the same figure, item and part number in two revisions is the same part"""
+    return part.get("figure"), part.get("item"), part["part_number"]
+
+
+def meaningful_values(part: Dict) -> Dict:
+    values = {field: part.get(field) for field in MEANINGFUL_FIELDS}
+    if values["effectivity_values"]:
+        values["effectivity_values"] = sorted(values["effectivity_values"])
+    if values["effectivity_range"]:
+        range_data = values["effectivity_range"]
+        values["effectivity_range"] = {"from": range_data.get("from"), "to": range_data.get("to")}
+    return values
+
+
+def record_hash(part: Dict) -> str:
+    """Hash of the meaningful fields; equal hashes mean an unchanged part"""
+    payload = json.dumps(meaningful_values(part), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def snapshot_entry(part: Dict) -> Dict:
+    """Compact per-part snapshot row (revision_parts) joined by the next diff"""
+    entry = {
+        "part_number": part["part_number"],
+        "figure": part.get("figure"),
+        "item": part.get("item"),
+        "is_sticker": bool(part.get("is_sticker")),
+        "hash": record_hash(part)
+    }
+    if part.get("sticker_type"):
+        entry["sticker_type"] = part["sticker_type"]
+    return entry
+
+
+def group_by_key(entries) -> Dict[PartKey, List[Dict]]:
+    """Snapshot entries per key, ordered by hash (a key can occur on several rows)"""
+    groups: Dict[PartKey, List[Dict]] = defaultdict(list)
+    for entry in entries:
+        groups[part_key(entry)].append(entry)
+    for rows in groups.values():
+        rows.sort(key=lambda entry: entry["hash"])
+    return groups
+
+
+def diff_snapshots(previous: Dict[PartKey, List[Dict]],
+                   current: Dict[PartKey, List[Dict]]) -> Iterator[Tuple[str, Dict, Optional[Dict]]]:
+    """
+    Hash join of two revisions on (figure, item, part_number), yielding
+    ("added", new, None), ("removed", old, None) or ("modified", new, old).
+    Rows of a key with equal hashes are unchanged; the remaining ones are
+    paired in hash order as modified, any surplus is added or removed.
+    """
+    for key, new_rows in current.items():
+        old_rows = previous.get(key, [])
+        old_hashes = {row["hash"] for row in old_rows}
+        new_hashes = {row["hash"] for row in new_rows}
+        new_left = [row for row in new_rows if row["hash"] not in old_hashes]
+        old_left = [row for row in old_rows if row["hash"] not in new_hashes]
+
+        for new, old in zip(new_left, old_left):
+            yield "modified", new, old
+        for new in new_left[len(old_left):]:
+            yield "added", new, None
+        for old in old_left[len(new_left):]:
+            yield "removed", old, None
+
+    for key, old_rows in previous.items():
+        if key not in current:
+            for old in old_rows:
+                yield "removed", old, None
+
+
+def field_deltas(old: Dict, new: Dict) -> Dict:
+    """{field: {"from": old value, "to": new value}} for the meaningful fields that differ"""
+    old_values, new_values = meaningful_values(old), meaningful_values(new)
+    return {
+        field: {"from": old_values[field], "to": new_values[field]}
+        for field in MEANINGFUL_FIELDS if old_values[field] != new_values[field]
+    }
+
+
+CHANGE_TYPES = {"added": "ADD", "removed": "DELETE", "modified": "MODIFY"}
+
+
+def change_ref(entry: Dict) -> Dict:
+    return {"part_number": entry["part_number"], "figure": entry.get("figure"), "item": entry.get("item")}
+
+
+def sticker_change(kind: str, new: Dict, old: Optional[Dict]) -> Optional[Dict]:
+    """Sticker fields of a change row, None if no sticker is involved"""
+    before = old if kind == "modified" else (new if kind == "removed" else None)
+    after = new if kind != "removed" else None
+    if not ((before and before.get("is_sticker")) or (after and after.get("is_sticker"))):
+        return None
+    return {
+        "sticker_type_from": before.get("sticker_type") if before else None,
+        "sticker_type_to": after.get("sticker_type") if after else None
+    }
+
+
+async def build_changes(db, previous: Dict[PartKey, List[Dict]], previous_document_id: Optional[str],
+                        current: Dict[PartKey, List[Dict]],
+                        current_parts: Dict[Tuple[PartKey, str], Dict]) -> List[Dict]:
+    """
+    Change rows (added / removed / modified, with sticker changes marked) of a
+    revision against the previous revision's snapshot rows. Only modified
+    parts of the previous document are read back from ipd_parts, for their
+    field-level deltas.
+    """
+    changes: List[Dict] = []
+    pending_old: List[Tuple[Dict, Dict, Dict]] = []
+
+    for kind, new, old in diff_snapshots(previous, current):
+        change = {**change_ref(new), "change_type": CHANGE_TYPES[kind]}
+        sticker = sticker_change(kind, new, old)
+        if sticker:
+            change.update(sticker, sticker_change=True)
+        changes.append(change)
+        if kind == "modified":
+            pending_old.append((change, new, old))
+
+    # Old field values of modified parts, by (key, hash)
+    old_parts: Dict[Tuple[PartKey, str], Dict] = {}
+    part_numbers = sorted({old["part_number"] for _, _, old in pending_old})
+    for i in range(0, len(part_numbers), 1000):
+        cursor = db.ipd_parts.find(
+            {"document_id": previous_document_id, "part_number": {"$in": part_numbers[i:i + 1000]}},
+            DIFF_PART_FIELDS
+        )
+        async for part in cursor:
+            old_parts.setdefault((part_key(part), record_hash(part)), part)
+
+    for change, new, old in pending_old:
+        new_part = current_parts[(part_key(new), new["hash"])]
+        old_part = old_parts.get((part_key(old), old["hash"]))
+        # None when the previous document was re-parsed since its snapshot
+        change["changes"] = field_deltas(old_part, new_part) if old_part else None
+
+    return changes
+
+
+def change_counts(changes: List[Dict]) -> Dict:
+    counts = {"added": 0, "removed": 0, "modified": 0, "sticker_changes": 0}
+    names = {code: kind for kind, code in CHANGE_TYPES.items()}
+    for change in changes:
+        counts[names[change["change_type"]]] += 1
+        counts["sticker_changes"] += bool(change.get("sticker_change"))
+    return counts
+
+
+async def _replace_rows(collection, revision_id, rows: List[Dict]):
+    """Rows of one revision in a side collection, replaced as a whole"""
+    await collection.delete_many({"revision_id": revision_id})
+    for i in range(0, len(rows), 1000):
+        await collection.insert_many(rows[i:i + 1000], ordered=False)
+
+
+async def record_revision(db, document_id: str) -> Optional[Dict]:
+    """
+    Ingest step: store the revision of a parsed document against the previous
+    revision of the same document_number. Re-parses replace the document's rows.
+    - revisions: one small record, change_summary holds the type and counts
+    - revision_parts: the parts snapshot (key + record hash), joined by the next diff
+    - revision_changes: one row per added / removed / modified part
+    """
+    started = time.perf_counter()
+    document = await db.documents.find_one({"document_id": document_id})
+    if not document or not document.get("document_number"):
+        return None
+
+    current_parts: Dict[Tuple[PartKey, str], Dict] = {}
+    snapshot: List[Dict] = []
+    async for part in db.ipd_parts.find({"document_id": document_id}, DIFF_PART_FIELDS).batch_size(5000):
+        entry = snapshot_entry(part)
+        snapshot.append(entry)
+        current_parts.setdefault((part_key(part), entry["hash"]), part)
+
+    existing = await db.revisions.find_one({"document_id": document_id}, {"previous_revision_id": 1})
+    if existing and existing.get("previous_revision_id"):
+        previous = await db.revisions.find_one({"_id": existing["previous_revision_id"]})
+    elif existing:
+        previous = None  # this document started the chain
+    else:
+        previous = await db.revisions.find_one(
+            {"document_number": document["document_number"], "document_id": {"$ne": document_id}},
+            sort=[("created_at", -1)]
+        )
+
+    changes: List[Dict] = []
+    if previous:
+        previous_rows = db.revision_parts.find({"revision_id": previous["_id"]}, {"_id": 0, "revision_id": 0})
+        changes = await build_changes(
+            db, group_by_key(await previous_rows.to_list(length=None)), previous["document_id"],
+            group_by_key(snapshot), current_parts
+        )
+    change_summary = {"type": "UPDATE" if previous else "INITIAL", "counts": change_counts(changes)}
+
+    now = datetime.utcnow()
+    revision = {
+        "document_id": document_id,
+        "document_number": document["document_number"],
+        "revision": document.get("revision") or "unknown",
+        "part_count": len(snapshot),
+        "sticker_count": sum(1 for entry in snapshot if entry["is_sticker"]),
+        "change_summary": change_summary,
+        "updated_at": now
+    }
+    for field in ("issue_date", "source_pdf_path", "file_hash"):
+        if document.get(field):
+            revision[field] = document[field]
+    if previous:
+        revision["previous_revision_id"] = previous["_id"]
+
+    result = await db.revisions.find_one_and_update(
+        {"document_id": document_id},
+        {
+            "$set": revision,
+            "$unset": {"parts": ""},  # snapshot lives in revision_parts
+            "$setOnInsert": {
+                "metadata": {"created_by": "ingest", "created_at": now, "status": "draft"},
+                "created_at": now,
+                "version": 1
+            }
+        },
+        upsert=True,
+        projection={"_id": 1, "created_at": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    revision_id = result["_id"]
+    if previous:
+        await db.revisions.update_one({"_id": previous["_id"]}, {"$set": {"next_revision_id": revision_id}})
+
+    await _replace_rows(db.revision_parts, revision_id, [{**entry, "revision_id": revision_id} for entry in snapshot])
+
+    # Change rows carry what the revision history shows, so it is one query
+    context = {
+        "revision_id": revision_id,
+        "document_id": document_id,
+        "document_number": revision["document_number"],
+        "revision": revision["revision"],
+        "date": revision.get("issue_date") or result["created_at"]
+    }
+    await _replace_rows(db.revision_changes, revision_id, [{**change, **context} for change in changes])
+
+    counts = change_summary["counts"]
+    logger.info(
+        f"🧾 Revision {revision['revision']} of {revision['document_number']}: {change_summary['type']}, "
+        f"+{counts['added']} -{counts['removed']} ~{counts['modified']} "
+        f"({int((time.perf_counter() - started) * 1000)} ms)"
+    )
+    return change_summary
+
+
+async def read_part_history(db, part_number: str) -> List[Dict]:
+    """Revisions that changed a part, with the kind of change and its field deltas"""
+    cursor = db.revision_changes.find(
+        {"part_number": part_number}, {"_id": 0, "revision_id": 0}
+    ).sort([("date", 1), ("document_id", 1)])
+    return await cursor.to_list(length=None)
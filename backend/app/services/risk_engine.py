@@ -0,0 +1,283 @@
+# backend/app/services/risk_engine.py
+from typing import Dict, Iterator, List, Optional, Set
+from datetime import datetime, timedelta
+from itertools import islice
+import logging
+import time
+
+import numpy as np
+from pymongo import UpdateOne
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RISK_STATE_ID = "risk_profile"
+WARNING_WINDOW = timedelta(days=30)
+
+# SRS 5.9: Warn x 0.3 + Change x 0.2 + Similar x 0.2 + Error x 0.2 + Overlap x 0.1
+RISK_WEIGHTS = {"warn": 0.3, "change": 0.2, "similar": 0.2, "error": 0.2, "overlap": 0.1}
+
+# SRS 5.10: volatility below LOW is Low, below HIGH is Medium, else High
+VOLATILITY_LOW = 0.2
+VOLATILITY_HIGH = 0.5
+
+PROFILE_CHUNK = 10000  # rows turned into profile documents at a time
+
+
+class RiskInputs:
+    """Per-part risk inputs as NumPy columns, row i is part_numbers[i]"""
+
+    def __init__(self, part_numbers: List[str]):
+        self.part_numbers = part_numbers
+        self.rows = {pn: i for i, pn in enumerate(part_numbers)}
+        n = len(part_numbers)
+        self.warning_count = np.zeros(n, dtype=np.int64)
+        self.error_count = np.zeros(n, dtype=np.int64)
+        self.change_count = np.zeros(n, dtype=np.int64)
+        self.revision_count = np.zeros(n, dtype=np.int64)
+        self.similar_count = np.zeros(n, dtype=np.int64)
+        self.alternative_count = np.zeros(n, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.part_numbers)
+
+    def positions(self, part_numbers: List[str]) -> np.ndarray:
+        """Row of each part number, -1 for part numbers outside this batch"""
+        rows = self.rows
+        return np.fromiter((rows.get(pn, -1) for pn in part_numbers), dtype=np.int64, count=len(part_numbers))
+
+    def add(self, column: np.ndarray, part_numbers: List[str], values):
+        """column[row of part_numbers[i]] += values[i], ignoring unknown part numbers"""
+        rows = self.positions(part_numbers)
+        known = rows >= 0
+        np.add.at(column, rows[known], np.asarray(values, dtype=column.dtype)[known])
+
+
+def risk_components(inputs: RiskInputs) -> Dict[str, np.ndarray]:
+    """
+    Every component scaled to 0-100. Counts saturate at their RISK_*_SATURATION
+    setting, change is the volatility index (SRS 5.10) as a percentage.
+    Fixed scales keep a part's score independent of the other parts, so an
+    incremental run gives the same result as a full one.
+    """
+    def saturate(counts: np.ndarray, at: int) -> np.ndarray:
+        return np.minimum(counts / max(at, 1), 1.0) * 100
+
+    return {
+        "warn": saturate(inputs.warning_count, settings.RISK_WARN_SATURATION),
+        "change": volatility_index(inputs) * 100,
+        "similar": saturate(inputs.similar_count, settings.RISK_SIMILAR_SATURATION),
+        "error": saturate(inputs.error_count, settings.RISK_ERROR_SATURATION),
+        "overlap": saturate(inputs.alternative_count, settings.RISK_OVERLAP_SATURATION)
+    }
+
+
+def volatility_index(inputs: RiskInputs) -> np.ndarray:
+    """Revisions that changed the part / revisions of the documents it changed in"""
+    volatility = np.zeros(len(inputs), dtype=np.float64)
+    np.divide(inputs.change_count, inputs.revision_count, out=volatility, where=inputs.revision_count > 0)
+    return volatility
+
+
+def volatility_category(volatility: np.ndarray) -> np.ndarray:
+    return np.select(
+        [volatility < VOLATILITY_LOW, volatility < VOLATILITY_HIGH], ["Low", "Medium"], default="High"
+    )
+
+
+def risk_scores(components: Dict[str, np.ndarray]) -> np.ndarray:
+    return sum(RISK_WEIGHTS[name] * score for name, score in components.items())
+
+
+async def _group_counts(collection, pipeline: List[Dict]) -> Dict[str, list]:
+    """Run an aggregation ending in {_id: part_number, ...} into columns"""
+    columns: Dict[str, list] = {}
+    async for row in collection.aggregate(pipeline, allowDiskUse=True, batchSize=10000):
+        for field, value in row.items():
+            columns.setdefault(field, []).append(value)
+    return columns
+
+
+def _scope_match(scope: Optional[List[str]], field: str = "part_number") -> List[Dict]:
+    return [{"$match": {field: {"$in": scope}}}] if scope is not None else []
+
+
+async def load_risk_inputs(db, scope: Optional[List[str]] = None,
+                           now: Optional[datetime] = None) -> RiskInputs:
+    """
+    Inputs for the parts in part_master (or only `scope`), each from one
+    server-side aggregation grouped by part number
+    """
+    now = now or datetime.utcnow()
+
+    query = {"part_number": {"$in": scope}} if scope is not None else {}
+    part_numbers, similar_counts = [], []
+    cursor = db.part_master.find(query, {"_id": 0, "part_number": 1, "similar_part_count": 1})
+    async for part in cursor.batch_size(10000):
+        part_numbers.append(part["part_number"])
+        similar_counts.append(part.get("similar_part_count") or 0)
+    inputs = RiskInputs(part_numbers)
+    if not len(inputs):
+        return inputs
+    inputs.similar_count[:] = similar_counts
+
+    # decision_log: warnings of the last 30 days, error reports of all time
+    decisions = await _group_counts(db.decision_log, _scope_match(scope) + [
+        {"$group": {
+            "_id": "$part_number",
+            "warnings": {"$sum": {"$cond": [
+                {"$gte": ["$timestamp_open", now - WARNING_WINDOW]},
+                {"$size": {"$ifNull": ["$warnings_triggered", []]}},
+                0
+            ]}},
+            "errors": {"$sum": {"$cond": [{"$eq": ["$error_reported", True]}, 1, 0]}}
+        }}
+    ])
+    if decisions:
+        inputs.add(inputs.warning_count, decisions["_id"], decisions["warnings"])
+        inputs.add(inputs.error_count, decisions["_id"], decisions["errors"])
+
+    # revision_changes: how many revisions of each document number changed the part
+    changes = await _group_counts(db.revision_changes, _scope_match(scope) + [
+        {"$group": {"_id": {"part_number": "$part_number", "document_number": "$document_number"},
+                    "revisions": {"$addToSet": "$revision_id"}}},
+        {"$project": {"changes": {"$size": "$revisions"}}}
+    ])
+    if changes:
+        totals = await _group_counts(db.revisions, [
+            {"$group": {"_id": "$document_number", "revisions": {"$sum": 1}}}
+        ])
+        revisions_of = dict(zip(totals["_id"], totals["revisions"]))
+        keys = changes["_id"]
+        part_numbers = [key["part_number"] for key in keys]
+        inputs.add(inputs.change_count, part_numbers, changes["changes"])
+        inputs.add(inputs.revision_count, part_numbers,
+                   [revisions_of.get(key.get("document_number"), 0) for key in keys])
+
+    # alternatives: distinct alternative part numbers over all documents
+    alternatives = await _group_counts(db.alternatives, _scope_match(scope) + [
+        {"$unwind": "$alternatives"},
+        {"$group": {"_id": "$part_number", "alternatives": {"$addToSet": "$alternatives.part_number"}}},
+        {"$project": {"count": {"$size": "$alternatives"}}}
+    ])
+    if alternatives:
+        inputs.add(inputs.alternative_count, alternatives["_id"], alternatives["count"])
+
+    return inputs
+
+
+def profile_updates(inputs: RiskInputs, now: datetime) -> Iterator[UpdateOne]:
+    """part_risk_profile upserts with each component's value, score, weight and contribution"""
+    components = risk_components(inputs)
+    scores = risk_scores(components)
+    volatility = volatility_index(inputs)
+
+    values = {
+        "warn": inputs.warning_count, "change": np.round(volatility, 4), "similar": inputs.similar_count,
+        "error": inputs.error_count, "overlap": inputs.alternative_count
+    }
+    columns = {
+        "risk_score": np.round(scores, 2),
+        "volatility_index": np.round(volatility, 4),
+        "volatility_category": volatility_category(volatility),
+        "warning_count_30d": inputs.warning_count,
+        "error_report_count": inputs.error_count,
+        "change_count": inputs.change_count,
+        "revision_count": inputs.revision_count,
+        "similar_part_count": inputs.similar_count,
+        "alternative_count": inputs.alternative_count
+    }
+    # Slices of the columns become Python lists, rows are zipped from those
+    fields = list(columns)
+    for start in range(0, len(inputs), PROFILE_CHUNK):
+        rows = slice(start, start + PROFILE_CHUNK)
+        profiles = zip(*(column[rows].tolist() for column in columns.values()))
+        breakdowns = zip(*(
+            [
+                {"value": value, "score": score, "weight": RISK_WEIGHTS[name], "contribution": contribution}
+                for value, score, contribution in zip(
+                    values[name][rows].tolist(),
+                    np.round(components[name][rows], 2).tolist(),
+                    np.round(components[name][rows] * RISK_WEIGHTS[name], 2).tolist()
+                )
+            ]
+            for name in RISK_WEIGHTS
+        ))
+
+        for part_number, profile, breakdown in zip(inputs.part_numbers[rows], profiles, breakdowns):
+            profile = dict(zip(fields, profile))
+            profile["components"] = dict(zip(RISK_WEIGHTS, breakdown))
+            profile["last_updated"] = now
+            yield UpdateOne({"part_number": part_number}, {"$set": profile}, upsert=True)
+
+
+async def changed_part_numbers(db, since: datetime, now: datetime) -> Set[str]:
+    """Part numbers whose risk inputs may have changed since the last run"""
+    changed: Set[str] = set()
+
+    async def collect(collection, match: Dict, field: str = "$part_number"):
+        pipeline = [{"$match": match}, {"$group": {"_id": field}}]
+        async for row in collection.aggregate(pipeline, allowDiskUse=True):
+            if row["_id"]:
+                changed.add(row["_id"])
+
+    # New decisions, and warnings that have aged out of the 30-day window
+    await collect(db.decision_log, {"$or": [
+        {"timestamp_open": {"$gte": since}},
+        {"timestamp_confirm": {"$gte": since}},
+        {"timestamp_open": {"$gte": since - WARNING_WINDOW, "$lt": now - WARNING_WINDOW}}
+    ]})
+    await collect(db.part_master, {"similar_updated_at": {"$gte": since}})
+    await collect(db.alternatives, {"updated_at": {"$gte": since}})
+
+    # Re-parsed documents (alternatives may be gone) and documents with a new
+    # revision (every part's volatility denominator moved)
+    new_revisions = await db.revisions.distinct("document_number", {"created_at": {"$gte": since}})
+    document_ids = await db.documents.distinct("document_id", {"$or": [
+        {"updated_at": {"$gte": since}},
+        {"document_number": {"$in": new_revisions}}
+    ]})
+    if document_ids:
+        await collect(db.ipd_parts, {"document_id": {"$in": document_ids}})
+
+    return changed
+
+
+async def compute_risk_profiles(db, incremental: bool = True) -> Dict:
+    """
+    Recompute part_risk_profile. Incremental runs only touch parts whose
+    inputs changed since the previous run; the first run is always full.
+    """
+    started = time.perf_counter()
+    now = datetime.utcnow()
+
+    state = await db.app_state.find_one({"_id": RISK_STATE_ID}) or {}
+    since = state.get("last_updated") if incremental else None
+
+    if since is None:
+        batches = [None]
+    else:
+        changed = sorted(await changed_part_numbers(db, since, now))
+        size = settings.RISK_BATCH_PARTS
+        batches = [changed[i:i + size] for i in range(0, len(changed), size)]
+
+    updated = 0
+    for scope in batches:
+        inputs = await load_risk_inputs(db, scope, now)
+        ops = profile_updates(inputs, now)
+        while batch := list(islice(ops, 1000)):
+            await db.part_risk_profile.bulk_write(batch, ordered=False)
+            updated += len(batch)
+
+    await db.app_state.update_one(
+        {"_id": RISK_STATE_ID}, {"$set": {"last_updated": now}}, upsert=True
+    )
+
+    result = {
+        "mode": "incremental" if since is not None else "full",
+        "parts_updated": updated,
+        "seconds": round(time.perf_counter() - started, 1)
+    }
+    logger.info(f"⚠️ Risk profiles ({result['mode']}): {updated} parts in {result['seconds']} s")
+    return result
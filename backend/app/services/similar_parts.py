@@ -0,0 +1,282 @@
+# backend/app/services/similar_parts.py
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import UpdateOne
+import asyncio
+import logging
+import time
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# part_master rows written close together by different processes can get
+# out-of-order ObjectIds, so each sync re-reads this much history
+SYNC_OVERLAP = timedelta(minutes=1)
+
+
+def levenshtein(a: str, b: str, max_distance: Optional[int] = None) -> int:
+    """
+    Edit distance (insert, delete, substitute), Myers/Hyyro bit-parallel:
+    one pass over the longer string with the shorter one as bit vectors.
+    With max_distance, length differences beyond it return max_distance + 1.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+    m = len(b)
+    if not m:
+        return len(a)
+
+    peq = {}
+    for i, c in enumerate(b):
+        peq[c] = peq.get(c, 0) | (1 << i)
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv, mv, score = mask, 0, m
+    for c in a:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return score
+
+
+def normalize_part_number(part_number: str) -> str:
+    return part_number.strip().upper()
+
+
+def deletion_variants(word: str, depth: int) -> Set[str]:
+    """word with up to `depth` characters deleted, including word itself"""
+    variants = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        variants |= frontier
+    return variants
+
+
+class SimilarPartIndex:
+    """
+    Similar parts per SRS 5.5: same prefix and Levenshtein distance <= max_distance.
+
+    Symmetric-deletion index: every part number is stored under the hashes
+    of (prefix, each variant with up to max_distance characters deleted).
+    Two part numbers within max_distance share at least one such variant, so
+    a query looks up its own variants and only verifies those candidates.
+    Hashes live in a sorted int64 array (binary search, no per-entry Python
+    objects); new part numbers go to a small pending dict that is merged
+    into the arrays once it grows past compact_every entries.
+    Filled from part_master and kept current by refresh().
+    """
+
+    def __init__(self, prefix_length: int = 3, max_distance: int = 2, compact_every: int = 50000):
+        self.prefix_length = prefix_length
+        self.max_distance = max_distance
+        self.compact_every = compact_every
+        self.part_numbers: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.key_ids = np.zeros(0, dtype=np.int32)
+        self.pending: Dict[int, List[int]] = {}
+        self.pending_entries = 0
+        self.synced_until: Optional[ObjectId] = None
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self.part_numbers)
+
+    def __contains__(self, part_number: str) -> bool:
+        return normalize_part_number(part_number) in self.ids
+
+    @property
+    def loaded(self) -> bool:
+        return self.synced_until is not None
+
+    def prefix(self, part_number: str) -> str:
+        return part_number[:self.prefix_length]
+
+    def _keys(self, part_number: str) -> List[int]:
+        prefix = self.prefix(part_number)
+        return [hash((prefix, variant)) for variant in deletion_variants(part_number, self.max_distance)]
+
+    def add(self, part_number: str) -> bool:
+        """Index a part number; False if it was already present"""
+        part_number = normalize_part_number(part_number)
+        if part_number in self.ids:
+            return False
+
+        part_id = len(self.part_numbers)
+        self.part_numbers.append(part_number)
+        self.ids[part_number] = part_id
+        for key in self._keys(part_number):
+            self.pending.setdefault(key, []).append(part_id)
+            self.pending_entries += 1
+
+        if self.pending_entries >= self.compact_every:
+            self.compact()
+        return True
+
+    def compact(self):
+        """Merge pending entries into the sorted arrays"""
+        if not self.pending:
+            return
+        new_keys = np.fromiter(
+            (key for key, ids in self.pending.items() for _ in ids), dtype=np.int64, count=self.pending_entries
+        )
+        new_ids = np.fromiter(
+            (part_id for ids in self.pending.values() for part_id in ids), dtype=np.int32, count=self.pending_entries
+        )
+        keys = np.concatenate([self.keys, new_keys])
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.key_ids = np.concatenate([self.key_ids, new_ids])[order]
+        self.pending = {}
+        self.pending_entries = 0
+
+    def similar(self, part_number: str) -> List[Tuple[str, int]]:
+        """Other part numbers within max_distance, closest first"""
+        part_number = normalize_part_number(part_number)
+        keys = np.asarray(self._keys(part_number), dtype=np.int64)
+
+        lo = np.searchsorted(self.keys, keys, side="left")
+        hi = np.searchsorted(self.keys, keys, side="right")
+        candidates = set()
+        for start, end in zip(lo[lo < hi], hi[lo < hi]):
+            candidates.update(self.key_ids[start:end].tolist())
+        for key in keys.tolist():
+            candidates.update(self.pending.get(key, ()))
+
+        matches = []
+        for part_id in candidates:
+            candidate = self.part_numbers[part_id]
+            if candidate == part_number:
+                continue
+            distance = levenshtein(part_number, candidate, self.max_distance)
+            if distance <= self.max_distance:
+                matches.append((candidate, distance))
+        return sorted(matches, key=lambda match: (match[1], match[0]))
+
+    async def ensure_loaded(self, db):
+        if not self.loaded:
+            await self.refresh(db)
+
+    async def refresh(self, db) -> bool:
+        """Add part numbers that entered part_master since the last sync; True if any"""
+        async with self._lock:
+            return await self._sync(db)
+
+    async def _sync(self, db) -> bool:
+        started = time.perf_counter()
+        query = {}
+        if self.synced_until is not None:
+            since = self.synced_until.generation_time - SYNC_OVERLAP
+            query["_id"] = {"$gte": ObjectId.from_datetime(since)}
+
+        added = 0
+        last_id = self.synced_until
+        async for doc in db.part_master.find(query, {"part_number": 1}).sort("_id", 1).batch_size(5000):
+            added += self.add(doc["part_number"])
+            last_id = doc["_id"]
+        self.synced_until = last_id or ObjectId.from_datetime(datetime.utcnow() - SYNC_OVERLAP)
+        self.compact()
+
+        if added:
+            logger.info(
+                f"🔤 Similar-part index: +{added} part numbers, {len(self)} total "
+                f"({int((time.perf_counter() - started) * 1000)} ms)"
+            )
+        return bool(added)
+
+    async def register(self, db, part_numbers: Iterable[str]) -> int:
+        """
+        Bring part numbers into part_master with their similar parts. New ones
+        and those whose similar parts were never computed (seeded rows, rows
+        from before this index) get their list and count set, and are added to
+        the lists of the computed parts they are similar to.
+        Returns how many part numbers were computed.
+        """
+        async with self._lock:
+            await self._sync(db)
+
+            normalized = sorted({normalize_part_number(pn) for pn in part_numbers if pn})
+            computed: Set[str] = set()
+            for i in range(0, len(normalized), 1000):
+                cursor = db.part_master.find(
+                    {"part_number": {"$in": normalized[i:i + 1000]}, "similar_updated_at": {"$exists": True}},
+                    {"_id": 0, "part_number": 1}
+                )
+                computed.update([doc["part_number"] async for doc in cursor])
+
+            stale = [pn for pn in normalized if pn not in computed]
+            for part_number in stale:
+                self.add(part_number)
+            return await self._write_similar(db, stale)
+
+    async def recompute_all(self, db) -> int:
+        """Set the similar parts of every part number in part_master afresh (backfill)"""
+        async with self._lock:
+            await self._sync(db)
+            return await self._write_similar(db, list(self.part_numbers))
+
+    async def _write_similar(self, db, part_numbers: List[str]) -> int:
+        """$set similar parts of part_numbers, $push them to computed neighbours outside that set"""
+        targets = set(part_numbers)
+        now = datetime.utcnow()
+        ops = []
+        for part_number in part_numbers:
+            similar = [pn for pn, _ in self.similar(part_number)]
+            ops.append(UpdateOne(
+                {"part_number": part_number},
+                {
+                    "$set": {"similar_parts": similar, "similar_part_count": len(similar), "similar_updated_at": now},
+                    "$setOnInsert": {"first_appearance": now}
+                },
+                upsert=True
+            ))
+            # Neighbours never computed keep no partial count, they get theirs when computed
+            ops.extend(
+                UpdateOne(
+                    {"part_number": neighbour, "similar_updated_at": {"$exists": True},
+                     "similar_parts": {"$ne": part_number}},
+                    {
+                        "$push": {"similar_parts": part_number},
+                        "$inc": {"similar_part_count": 1},
+                        "$set": {"similar_updated_at": now}
+                    }
+                )
+                for neighbour in similar if neighbour not in targets
+            )
+            if len(ops) >= 1000:
+                await db.part_master.bulk_write(ops, ordered=False)
+                ops = []
+
+        if ops:
+            await db.part_master.bulk_write(ops, ordered=False)
+        return len(part_numbers)
+
+
+async def register_document_part_numbers(db, index: SimilarPartIndex, document_id: str) -> int:
+    """Ingest step: part numbers of a parsed document into part_master / the similar-part index"""
+    part_numbers = await db.ipd_parts.distinct("part_number", {"document_id": document_id})
+    return await index.register(db, part_numbers)
+
+
+# One per process: the worker registers at ingest, the API answers queries
+similar_part_index = SimilarPartIndex(
+    prefix_length=settings.SIMILAR_PART_PREFIX_LENGTH,
+    max_distance=settings.SIMILAR_PART_MAX_DISTANCE
+)
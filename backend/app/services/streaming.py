@@ -0,0 +1,62 @@
+# backend/app/services/streaming.py
+from typing import AsyncIterator, Dict, Iterable, Union
+from datetime import datetime
+import json
+
+from bson import ObjectId
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(request: Request) -> bool:
+    """Opt-in streaming: the client sent Accept: application/x-ndjson"""
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def ndjson_line(row: Dict) -> bytes:
+    return json.dumps(row, default=_json_default, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+async def _aiter(rows: Union[AsyncIterator[Dict], Iterable[Dict]]) -> AsyncIterator[Dict]:
+    if hasattr(rows, "__aiter__"):
+        async for row in rows:
+            yield row
+    else:
+        for row in rows:
+            yield row
+
+
+async def _ndjson_chunks(rows: Union[AsyncIterator[Dict], Iterable[Dict]],
+                         flush_bytes: int) -> AsyncIterator[bytes]:
+    """
+    One JSON document per line. Lines are grouped into chunks of about
+    flush_bytes; the first row goes out on its own so it arrives early.
+    """
+    buffer = bytearray()
+    first = True
+
+    async for row in _aiter(rows):
+        buffer.extend(ndjson_line(row))
+        if first or len(buffer) >= flush_bytes:
+            yield bytes(buffer)
+            buffer.clear()
+            first = False
+
+    if buffer:
+        yield bytes(buffer)
+
+
+def ndjson_response(rows: Union[AsyncIterator[Dict], Iterable[Dict]],
+                    flush_bytes: int = 64 * 1024) -> StreamingResponse:
+    """Stream rows (e.g. straight from a Motor cursor) without materializing them"""
+    return StreamingResponse(_ndjson_chunks(rows, flush_bytes), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,117 @@
+# backend/app/services/table_cache.py
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+
+import camelot
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+
+class TableCache:
+    """
+    On-disk cache of raw Camelot table grids, one Parquet file per page:
+
+        <cache_dir>/<file_hash>/<params_key>/<page>.parquet
+
+    params_key covers the flavor, the Camelot options and the Camelot version,
+    so changing extraction parameters never serves stale grids. A page with no
+    tables is cached as an empty file, so it is not re-run either.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    def params_key(self, flavor: str, options: Dict) -> str:
+        params = {"flavor": flavor, "options": options, "camelot": camelot.__version__}
+        return hashlib.sha1(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+    def _page_path(self, file_hash: str, flavor: str, options: Dict, page: int) -> str:
+        return os.path.join(self.cache_dir, file_hash, self.params_key(flavor, options), f"{page}.parquet")
+
+    def get(self, file_hash: str, flavor: str, options: Dict, page: int) -> Optional[List[pd.DataFrame]]:
+        """Cached table grids of a page, in Camelot order, or None on a miss"""
+        path = self._page_path(file_hash, flavor, options, page)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            grid = pq.read_table(path).to_pandas()
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable table cache {path}: {e}")
+            return None
+
+        tables = []
+        for _, rows in grid.groupby("table", sort=True):
+            ncols = int(rows["ncols"].iloc[0])
+            df = rows[[f"c{i}" for i in range(ncols)]].reset_index(drop=True)
+            df.columns = range(ncols)
+            tables.append(df.astype(object))
+        return tables
+
+    def put(self, file_hash: str, flavor: str, options: Dict, page: int, tables: List[pd.DataFrame]):
+        """Store the raw grids of one page (atomically)"""
+        path = self._page_path(file_hash, flavor, options, page)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        width = max((df.shape[1] for df in tables), default=0)
+        columns = {"table": [], "row": [], "ncols": []}
+        columns.update({f"c{i}": [] for i in range(width)})
+
+        for t, df in enumerate(tables):
+            for r, values in enumerate(df.itertuples(index=False)):
+                columns["table"].append(t)
+                columns["row"].append(r)
+                columns["ncols"].append(df.shape[1])
+                for i in range(width):
+                    columns[f"c{i}"].append(str(values[i]) if i < len(values) else None)
+
+        schema = pa.schema(
+            [("table", pa.int32()), ("row", pa.int32()), ("ncols", pa.int32())]
+            + [(f"c{i}", pa.string()) for i in range(width)]
+        )
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        pq.write_table(pa.table(columns, schema=schema), tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+
+
+def read_tables(pdf_path: str, pages: List[int], flavor: str, options: Dict,
+                cache: Optional[TableCache] = None,
+                file_hash: Optional[str] = None) -> Tuple[List[Tuple[int, pd.DataFrame]], int]:
+    """
+    Camelot tables for the given pages as (page, df) in page order.
+    With a cache and file hash, Camelot only runs for pages not cached yet.
+    Returns (tables, pages_run_through_camelot).
+    """
+    use_cache = cache is not None and bool(file_hash)
+
+    tables_by_page = {}
+    if use_cache:
+        for page in pages:
+            tables = cache.get(file_hash, flavor, options, page)
+            if tables is not None:
+                tables_by_page[page] = tables
+
+    missing = [page for page in pages if page not in tables_by_page]
+    if missing:
+        fresh = {page: [] for page in missing}
+        for table in camelot.read_pdf(
+            pdf_path,
+            pages=",".join(str(p) for p in missing),
+            flavor=flavor,
+            **options
+        ):
+            fresh.setdefault(int(table.page), []).append(table.df)
+
+        for page, tables in fresh.items():
+            if use_cache:
+                cache.put(file_hash, flavor, options, page, tables)
+            tables_by_page[page] = tables
+
+    result = [(page, df) for page in sorted(tables_by_page) for df in tables_by_page[page]]
+    return result, len(missing)
@@ -0,0 +1,151 @@
+# backend/app/worker.py
+"""
+Parse worker process. Runs separately from the API:
+
+    python -m app.worker
+"""
+import asyncio
+import logging
+import os
+import signal
+import socket
+
+from app.core.config import settings
+from app.core.database import Database
+from app.services.job_queue import JobQueue, JobCancelled, LeaseLost
+from app.services.ingest import parse_document_background, mark_document_failed
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerShutdown(Exception):
+    """Raised inside a running job when the worker is asked to stop"""
+
+
+class ParseWorker:
+    """Pulls jobs from parse_jobs and runs up to `concurrency` of them at once"""
+
+    def __init__(self, db, concurrency: int = 2, poll_seconds: float = 2.0):
+        self.db = db
+        self.queue = JobQueue(
+            db,
+            max_attempts=settings.PARSE_JOB_MAX_ATTEMPTS,
+            retry_backoff_seconds=settings.PARSE_JOB_RETRY_BACKOFF_SECONDS,
+            lease_seconds=settings.PARSE_JOB_LEASE_SECONDS
+        )
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = asyncio.Event()
+
+    def stop(self):
+        self._stopping.set()
+
+    async def run(self):
+        logger.info(f"👷 Worker {self.worker_id} started ({self.concurrency} slots)")
+        await asyncio.gather(*(self._slot(i) for i in range(self.concurrency)))
+        logger.info("👋 Worker stopped")
+
+    async def _slot(self, slot: int):
+        while not self._stopping.is_set():
+            job = await self.queue.claim(f"{self.worker_id}/{slot}")
+            if not job:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run_job(job)
+
+    async def _run_job(self, job):
+        document_id = job["document_id"]
+        logger.info(f"▶️ Job {job['job_id']} ({job['job_type']}) for {document_id}, attempt {job['attempts']}")
+
+        if job["attempts"] > job["max_attempts"]:
+            # Lease expired too many times (worker crashes)
+            await self.queue.fail(job, "Exceeded max attempts")
+            await mark_document_failed(self.db, document_id, "Exceeded max attempts")
+            return
+
+        beat = {"state": None, "stop": None}
+
+        async def heartbeat():
+            """Keeps the lease for the whole job, also while no progress is reported"""
+            while True:
+                await asyncio.sleep(settings.PARSE_JOB_HEARTBEAT_SECONDS)
+                try:
+                    await self.queue.heartbeat(job, beat["state"])
+                except (JobCancelled, LeaseLost) as e:
+                    beat["stop"] = e
+                    return
+                except Exception as e:
+                    logger.warning(f"⚠️ Heartbeat of job {job['job_id']} failed: {e}")
+
+        async def progress(state):
+            if self._stopping.is_set():
+                raise WorkerShutdown()
+            if beat["stop"]:
+                raise beat["stop"]
+            beat["state"] = state
+
+        heartbeat_task = asyncio.create_task(heartbeat())
+        try:
+            try:
+                await parse_document_background(document_id, job["pdf_path"], self.db, progress=progress)
+                await self.queue.complete(job)
+
+            except JobCancelled:
+                await self.queue.mark_cancelled(job)
+                await mark_document_failed(self.db, document_id, "Cancelled by user", status="cancelled")
+                logger.info(f"⏹️ Job {job['job_id']} cancelled")
+
+            except WorkerShutdown:
+                await self.queue.requeue(job)
+                await self.db.documents.update_one(
+                    {"document_id": document_id},
+                    {"$set": {"parsing_status": "pending"}}
+                )
+
+            except LeaseLost:
+                raise
+
+            except Exception as e:
+                logger.error(f"❌ Job {job['job_id']} failed: {e}")
+                if await self.queue.fail(job, str(e)):
+                    await self.db.documents.update_one(
+                        {"document_id": document_id},
+                        {"$set": {"parsing_status": "pending", "error_message": str(e)}}
+                    )
+                else:
+                    await mark_document_failed(self.db, document_id, str(e))
+
+        except LeaseLost:
+            # The job was re-claimed after our lease expired; its new owner decides its state
+            logger.warning(f"⚠️ Lost the lease of job {job['job_id']}, leaving it to its new owner")
+
+        finally:
+            heartbeat_task.cancel()
+
+async def main():
+    logging.basicConfig(level=logging.INFO)
+    await Database.connect_db(settings.MONGO_URI)
+
+    worker = ParseWorker(
+        Database.get_db(settings.MONGO_DB),
+        concurrency=settings.PARSE_WORKER_CONCURRENCY,
+        poll_seconds=settings.PARSE_WORKER_POLL_SECONDS
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    try:
+        await worker.run()
+    finally:
+        await Database.close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,161 @@
+# backend/benchmarks/run_parser.py
+"""
+Parser throughput benchmark on synthetic PDFs (offline, no MongoDB):
+
+    python -m benchmarks.run_parser --pages 50 --rows 25 --workers 4
+    python -m benchmarks.run_parser --kind drawing --ruled-ratio 0.5
+
+Results are written to benchmarks/results/<time>-<commit>.json for comparing commits.
+"""
+from typing import Dict, List
+from datetime import datetime
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import camelot
+
+from app.services.parser import IPDParser
+from benchmarks.synthetic_pdf import SyntheticSpec, generate
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(__file__), text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    """Peak RSS of this process and of reaped children (process pool workers)"""
+    # ru_maxrss is KB on Linux
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }
+
+
+async def run_once(spec: SyntheticSpec, pdf_path: str, workers: int, pages_per_chunk: int) -> Dict:
+    parser = IPDParser(workers=workers, pages_per_chunk=pages_per_chunk)
+
+    started = time.perf_counter()
+    if spec.kind == "ipd":
+        result = await parser.parse(pdf_path)
+        extracted = len(result["parts"])
+    else:
+        result = await parser.parse_drawing(pdf_path)
+        extracted = len(result["items"])
+    elapsed = time.perf_counter() - started
+
+    report = result["report"]
+    if report.get("error"):
+        raise RuntimeError(report["error"])
+
+    return {
+        "seconds": round(elapsed, 4),
+        "pages_per_sec": round(spec.pages / elapsed, 2),
+        "rows_per_sec": round(spec.pages * spec.rows_per_table / elapsed, 2),
+        "extracted": extracted,
+        "tables_found": report["tables_found"],
+        "timings": report["timings"],
+    }
+
+
+def summarize(runs: List[Dict]) -> Dict:
+    """Median run, stage timings taken from that same run"""
+    median = sorted(runs, key=lambda r: r["seconds"])[len(runs) // 2]
+    return {
+        "seconds_median": median["seconds"],
+        "seconds_min": min(r["seconds"] for r in runs),
+        "seconds_stdev": round(statistics.pstdev(r["seconds"] for r in runs), 4),
+        "pages_per_sec": median["pages_per_sec"],
+        "rows_per_sec": median["rows_per_sec"],
+        "extracted": median["extracted"],
+        "tables_found": median["tables_found"],
+        "timings": median["timings"],
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="IPDParser benchmark on synthetic PDFs")
+    parser.add_argument("--kind", choices=["ipd", "drawing"], default="ipd")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=25, help="rows per table")
+    parser.add_argument("--range-ratio", type=float, default=0.3, help="share of RANGE effectivity rows")
+    parser.add_argument("--ruled-ratio", type=float, default=1.0, help="share of ruled (lattice) pages")
+    parser.add_argument("--seed", type=int, default=787)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--pages-per-chunk", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    spec = SyntheticSpec(
+        kind=args.kind,
+        pages=args.pages,
+        rows_per_table=args.rows,
+        range_ratio=args.range_ratio,
+        ruled_ratio=args.ruled_ratio,
+        seed=args.seed,
+    )
+
+    with tempfile.TemporaryDirectory(prefix="parser-bench-") as tmp:
+        pdf_path = os.path.join(tmp, f"synthetic-{spec.kind}.pdf")
+        generated = generate(spec, pdf_path)
+
+        runs = []
+        for i in range(args.repeat):
+            run = await run_once(spec, pdf_path, args.workers, args.pages_per_chunk)
+            runs.append(run)
+            print(f"  run {i + 1}/{args.repeat}: {run['seconds']}s, {run['pages_per_sec']} pages/s")
+
+    commit = git_commit()
+    result = {
+        "commit": commit,
+        "created_at": datetime.utcnow().isoformat(),
+        "environment": {
+            "python": sys.version.split()[0],
+            "camelot": camelot.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "spec": spec.to_dict(),
+        "parser": {"workers": args.workers, "pages_per_chunk": args.pages_per_chunk},
+        "generated": {"rows": generated["rows"], "ruled_pages": generated["ruled_pages"]},
+        "summary": summarize(runs),
+        "peak_rss_mb": peak_rss_mb(),
+        "runs": runs,
+    }
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{commit}-{spec.kind}.json")
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+
+    summary = result["summary"]
+    print(f"📊 {spec.kind}: {summary['pages_per_sec']} pages/s, {summary['rows_per_sec']} rows/s, "
+          f"peak RSS {result['peak_rss_mb']['self']} MB")
+    print(f"   stages: {summary['timings']}")
+    print(f"   saved {output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+# backend/benchmarks/synthetic_pdf.py
+"""
+Deterministic synthetic IPD / drawing PDFs for parser benchmarks.
+Same arguments + seed always give the same PDF content, no real data needed.
+"""
+from dataclasses import dataclass, asdict
+from typing import Dict, List
+import random
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter, landscape
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, PageBreak
+
+IPD_HEADER = ["FIG ITEM", "PART NUMBER", "NOMENCLATURE", "EFFECT", "UPA"]
+DRAWING_HEADER = ["ITEM", "QTY", "PART NUMBER", "DESCRIPTION"]
+
+NOMENCLATURES = [
+    "BOLT", "NUT", "WASHER", "BRACKET", "CLAMP", "SEAL", "SCREW", "SPACER",
+    "PLACARD - NO STEP", "DECAL - FUEL", "STENCIL - EMERGENCY EXIT", "MARKER - ECB",
+]
+DRAWING_DESCRIPTIONS = [
+    "PLACARD - NO STEP", "STENCIL - EXIT", "DECAL - OXYGEN", "ECB MARKING", "BOX LABEL",
+]
+
+# Ruling styles: lattice needs the grid, stream gets plain text columns
+RULED_STYLE = TableStyle([("GRID", (0, 0), (-1, -1), 0.5, colors.black)])
+UNRULED_STYLE = TableStyle([("LEFTPADDING", (0, 0), (-1, -1), 8)])
+
+
+@dataclass
+class SyntheticSpec:
+    """What to generate; serialized into benchmark results"""
+    kind: str = "ipd"  # ipd | drawing
+    pages: int = 20
+    rows_per_table: int = 25
+    range_ratio: float = 0.3  # share of RANGE effectivity rows (rest LIST)
+    ruled_ratio: float = 1.0  # share of ruled pages (1.0 = all lattice, 0.0 = all stream)
+    seed: int = 787
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _ruled_pages(spec: SyntheticSpec, rng: random.Random) -> List[bool]:
+    ruled = round(spec.pages * spec.ruled_ratio)
+    flags = [True] * ruled + [False] * (spec.pages - ruled)
+    rng.shuffle(flags)
+    return flags
+
+
+def _effectivity(rng: random.Random, spec: SyntheticSpec) -> str:
+    if rng.random() < spec.range_ratio:
+        start = rng.randint(1, 900)
+        return f"{start}-{start + rng.randint(1, 120)}"
+    lines = sorted(rng.sample(range(1, 1000), rng.randint(1, 6)))
+    return ", ".join(str(line) for line in lines)
+
+
+def _ipd_rows(spec: SyntheticSpec, rng: random.Random, page: int) -> List[List[str]]:
+    rows = [IPD_HEADER]
+    for r in range(spec.rows_per_table):
+        rows.append([
+            f"{r + 1}",
+            f"{rng.choice(['867Z', 'BACB30', 'NAS', 'MS'])}{rng.randint(1000, 99999)}-{rng.randint(1, 999)}",
+            rng.choice(NOMENCLATURES),
+            _effectivity(rng, spec),
+            str(rng.randint(1, 12)),
+        ])
+    return rows
+
+
+def _drawing_rows(spec: SyntheticSpec, rng: random.Random, page: int) -> List[List[str]]:
+    rows = [DRAWING_HEADER]
+    for r in range(spec.rows_per_table):
+        item = page * spec.rows_per_table + r
+        rows.append([
+            f"ITEM-{item % 1000:03d}",
+            str(rng.randint(1, 4)),
+            f"A51135{rng.randint(1000, 9999)}-{rng.randint(1, 999):03d}",  # A511351610-XXX style
+            rng.choice(DRAWING_DESCRIPTIONS),
+        ])
+    return rows
+
+
+def generate(spec: SyntheticSpec, out_path: str) -> Dict:
+    """Write the PDF for `spec` and return what it contains (expected row counts)"""
+    rng = random.Random(spec.seed)
+    ruled = _ruled_pages(spec, rng)
+    build_rows = _ipd_rows if spec.kind == "ipd" else _drawing_rows
+
+    pagesize = letter if spec.kind == "ipd" else landscape(letter)
+    doc = SimpleDocTemplate(out_path, pagesize=pagesize, invariant=1)  # invariant: no timestamps, same bytes
+    elements = []
+    for page in range(spec.pages):
+        table = Table(build_rows(spec, rng, page), repeatRows=0)
+        table.setStyle(RULED_STYLE if ruled[page] else UNRULED_STYLE)
+        elements += [table, PageBreak()]
+    doc.build(elements[:-1])
+
+    return {
+        "path": out_path,
+        "rows": spec.pages * spec.rows_per_table,
+        "ruled_pages": sum(ruled),
+    }
@@ -22,6 +22,7 @@ db.ipd_parts.createIndex({ nomenclature: "text" });
 // Composite indexes for common queries (NEW)
 db.ipd_parts.createIndex({ is_sticker: 1, sticker_type: 1 });
 db.ipd_parts.createIndex({ is_sticker: 1, part_number: 1 });
+db.ipd_parts.createIndex({ is_sticker: 1, _id: 1 }); // browse keyset pagination
 db.ipd_parts.createIndex({ sticker_type: 1, effectivity_values: 1 });
 
 // ============== DRAWING ITEMS INDEXES ==============
@@ -87,6 +88,15 @@ db.documents.createIndex({ aircraft_model: 1 });
 db.documents.createIndex({ issue_date: -1 });
 db.documents.createIndex({ file_hash: 1 }); // NEW
 
+// ============== PARSE JOBS INDEXES ==============
+db.parse_jobs.createIndex({ job_id: 1 }, { unique: true });
+db.parse_jobs.createIndex({ status: 1, priority: -1, created_at: 1 }); // claim order + queue position
+db.parse_jobs.createIndex({ status: 1, lease_expires: 1 }); // expired leases
+db.parse_jobs.createIndex({ document_id: 1, created_at: -1 });
+
+// ============== PARSER LAYOUTS INDEXES ==============
+db.parser_layouts.createIndex({ layout_key: 1 }, { unique: true });
+
 // ============== AUDIT LOGS INDEXES ==============
 db.audit_logs.createIndex({ document_id: 1, timestamp: -1 });
 db.audit_logs.createIndex({ user_id: 1, timestamp: -1 });
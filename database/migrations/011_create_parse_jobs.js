@@ -0,0 +1,37 @@
+// Migration 011: Parse job queue (consumed by `python -m app.worker`)
+db.createCollection("parse_jobs", {
+  validator: {
+    $jsonSchema: {
+      bsonType: "object",
+      required: ["job_id", "job_type", "document_id", "status", "priority", "created_at"],
+      properties: {
+        job_id: { bsonType: "string" },
+        job_type: { bsonType: "string" },
+        document_id: { bsonType: "string" },
+        pdf_path: { bsonType: "string" },
+        status: {
+          enum: ["queued", "running", "completed", "failed", "cancelled"],
+        },
+        priority: { bsonType: "int" },
+        attempts: { bsonType: "int" },
+        max_attempts: { bsonType: "int" },
+        run_after: { bsonType: "date" },
+        lease_expires: { bsonType: "date" },
+        worker_id: { bsonType: "string" },
+        cancel_requested: { bsonType: "bool" },
+        progress: { bsonType: "object" },
+        error: { bsonType: "string" },
+        created_at: { bsonType: "date" },
+        started_at: { bsonType: "date" },
+        finished_at: { bsonType: "date" },
+        updated_at: { bsonType: "date" },
+      },
+    },
+  },
+});
+
+// Indexes
+db.parse_jobs.createIndex({ job_id: 1 }, { unique: true });
+db.parse_jobs.createIndex({ status: 1, priority: -1, created_at: 1 });
+db.parse_jobs.createIndex({ status: 1, lease_expires: 1 });
+db.parse_jobs.createIndex({ document_id: 1, created_at: -1 });
@@ -0,0 +1,9 @@
+// Migration 012: Copy documents.revision onto ipd_parts (batch check filters parts by revision)
+db.documents.find({}, { document_id: 1, revision: 1 }).forEach((doc) => {
+  db.ipd_parts.updateMany(
+    { document_id: doc.document_id, revision: { $exists: false } },
+    { $set: { revision: doc.revision || null } },
+  );
+});
+
+db.ipd_parts.createIndex({ part_number: 1, revision: 1 });
@@ -0,0 +1,11 @@
+// Migration 013: Part statistics counters, kept current at ingest
+// (fill them once with `python -m app.rebuild_stats`)
+db.createCollection("part_stats"); // single "global" counter document
+db.createCollection("document_stats"); // last counted snapshot per document
+db.createCollection("line_part_counts"); // _id: line number, count: LIST parts
+db.createCollection("part_number_refs"); // _id: part number, documents: count
+
+// Indexes
+db.document_stats.createIndex({ document_id: 1 }, { unique: true });
+db.line_part_counts.createIndex({ count: -1, _id: 1 });
+db.part_number_refs.createIndex({ documents: 1 });
@@ -0,0 +1,20 @@
+// Migration 014: Classify existing ipd_parts as stickers (ingest does this for new parts,
+// see detect_sticker_type in parser.py; first keyword wins, MARKER counts as MARKING)
+const stickerTypes = [
+  ["PLACARD", "PLACARD"],
+  ["STENCIL", "STENCIL"],
+  ["DECAL", "DECAL"],
+  ["MARKING", "MARKING"],
+  ["MARKER", "MARKING"],
+];
+
+db.ipd_parts.updateMany({ is_sticker: { $ne: true } }, { $set: { is_sticker: false } });
+stickerTypes.forEach(([keyword, stickerType]) => {
+  db.ipd_parts.updateMany(
+    { is_sticker: false, nomenclature: { $regex: keyword, $options: "i" } },
+    { $set: { is_sticker: true, sticker_type: stickerType } },
+  );
+});
+
+// Browse: is_sticker filter + keyset pagination on _id
+db.ipd_parts.createIndex({ is_sticker: 1, _id: 1 });
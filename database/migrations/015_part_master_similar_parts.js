@@ -0,0 +1,12 @@
+// Migration 015: Similar parts (SRS 5.5) on part_master, filled at ingest
+// (existing part numbers: `python -m app.backfill_similar_parts`)
+const partMasterSchema = db.getCollectionInfos({ name: "part_master" })[0].options.validator.$jsonSchema;
+Object.assign(partMasterSchema.properties, {
+  similar_parts: { bsonType: "array", items: { bsonType: "string" } },
+  similar_part_count: { bsonType: "int" },
+  similar_updated_at: { bsonType: "date" },
+});
+db.runCommand({ collMod: "part_master", validator: { $jsonSchema: partMasterSchema } });
+
+db.part_master.createIndex({ part_number: 1 }, { unique: true });
+db.part_master.createIndex({ similar_part_count: -1 });
@@ -0,0 +1,37 @@
+// Migration 016: Alternative parts (SRS 5.4), one row per part that has any,
+// rebuilt per document at ingest (existing data: `python -m app.rebuild_alternatives`)
+db.createCollection("alternatives", {
+  validator: {
+    $jsonSchema: {
+      bsonType: "object",
+      required: ["document_id", "part_number", "alternatives"],
+      properties: {
+        document_id: { bsonType: "string" },
+        revision: { bsonType: ["string", "null"] },
+        figure: { bsonType: ["string", "null"] },
+        item: { bsonType: ["string", "null"] },
+        part_number: { bsonType: "string" },
+        alternatives: {
+          bsonType: "array",
+          items: {
+            bsonType: "object",
+            required: ["part_number", "similarity", "overlap_lines"],
+            properties: {
+              part_number: { bsonType: "string" },
+              item: { bsonType: ["string", "null"] },
+              nomenclature: { bsonType: ["string", "null"] },
+              similarity: { bsonType: "double" },
+              overlap_lines: { bsonType: "int" },
+            },
+          },
+        },
+        alternative_count: { bsonType: "int" },
+        updated_at: { bsonType: "date" },
+      },
+    },
+  },
+});
+
+// Decision preview looks a part up by number (and revision)
+db.alternatives.createIndex({ part_number: 1, revision: 1 });
+db.alternatives.createIndex({ document_id: 1 });
@@ -0,0 +1,45 @@
+// Migration 017: Risk profile fields written by the risk batch
+// (python -m app.compute_risk), with the per-component breakdown (SRS 6.3)
+const component = {
+  bsonType: "object",
+  required: ["value", "score", "weight", "contribution"],
+  properties: {
+    value: { bsonType: ["int", "long", "double"] },
+    score: { bsonType: "double" },
+    weight: { bsonType: "double" },
+    contribution: { bsonType: "double" },
+  },
+};
+
+const riskSchema = db.getCollectionInfos({ name: "part_risk_profile" })[0].options.validator.$jsonSchema;
+Object.assign(riskSchema.properties, {
+  volatility_index: { bsonType: "double" },
+  volatility_category: { enum: ["Low", "Medium", "High"] },
+  warning_count_30d: { bsonType: ["int", "long"] },
+  error_report_count: { bsonType: ["int", "long"] },
+  change_count: { bsonType: ["int", "long"] },
+  revision_count: { bsonType: ["int", "long"] },
+  similar_part_count: { bsonType: ["int", "long"] },
+  alternative_count: { bsonType: ["int", "long"] },
+  components: {
+    bsonType: "object",
+    properties: {
+      warn: component,
+      change: component,
+      similar: component,
+      error: component,
+      overlap: component,
+    },
+  },
+  last_updated: { bsonType: "date" },
+});
+db.runCommand({ collMod: "part_risk_profile", validator: { $jsonSchema: riskSchema } });
+
+db.part_risk_profile.createIndex({ part_number: 1 }, { unique: true });
+
+// Incremental runs look for inputs changed since the previous run
+db.decision_log.createIndex({ timestamp_confirm: 1 });
+db.part_master.createIndex({ similar_updated_at: 1 });
+db.alternatives.createIndex({ updated_at: 1 });
+db.revisions.createIndex({ created_at: 1 });
+db.documents.createIndex({ updated_at: 1 });
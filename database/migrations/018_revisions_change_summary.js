@@ -0,0 +1,21 @@
+// Migration 018: Revision records written at ingest (one per document).
+// The per-part snapshot and the change rows live in side collections, so a
+// revision of any size stays far below the 16 MB document limit.
+db.createCollection("revision_parts"); // snapshot: revision_id, figure, item, part_number, hash, sticker info
+db.createCollection("revision_changes"); // added / removed / modified parts, with field-level deltas
+
+// change_summary now holds the type and counts; parts moved to revision_parts
+const revisionsSchema = db.getCollectionInfos({ name: "revisions" })[0].options.validator.$jsonSchema;
+revisionsSchema.required = revisionsSchema.required.filter((field) => field !== "parts");
+db.runCommand({ collMod: "revisions", validator: { $jsonSchema: revisionsSchema } });
+
+db.revisions.createIndex({ document_id: 1 }, { unique: true });
+db.revisions.createIndex({ document_number: 1, created_at: -1 });
+
+// The next diff joins on the previous revision's rows
+db.revision_parts.createIndex({ revision_id: 1, figure: 1, item: 1, part_number: 1 });
+
+// Part revision history (SRS 5.6) and the risk batch's change counts
+db.revision_changes.createIndex({ revision_id: 1 });
+db.revision_changes.createIndex({ part_number: 1, date: 1 });
+db.revision_changes.createIndex({ document_number: 1, part_number: 1 });
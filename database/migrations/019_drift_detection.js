@@ -0,0 +1,23 @@
+// Migration 019: Streaming drift detection (python -m app.drift_monitor)
+db.createCollection("drift_slots"); // checkpoint: _id "line|revision|figure|item", choices: latest { user_id, part_number, confirmed_at, decision_id } per user
+
+const driftSchema = db.getCollectionInfos({ name: "config_drift_log" })[0].options.validator.$jsonSchema;
+Object.assign(driftSchema.properties, {
+  figure: { bsonType: ["string", "null"] },
+  item: { bsonType: ["string", "null"] },
+  conflicting_parts: { bsonType: "array", items: { bsonType: "string" } },
+  user_ids: { bsonType: "array", items: { bsonType: "string" } },
+  decision_ids: { bsonType: "array", items: { bsonType: "objectId" } },
+  status: { bsonType: "string" },
+  updated_at: { bsonType: "date" },
+});
+db.runCommand({ collMod: "config_drift_log", validator: { $jsonSchema: driftSchema } });
+
+// One open record per slot, extended as more parts conflict
+db.config_drift_log.createIndex(
+  { line_number: 1, revision: 1, figure: 1, item: 1 },
+  { unique: true, partialFilterExpression: { status: "open" } }
+);
+
+// Decisions are followed by confirmation time
+db.decision_log.createIndex({ confirmation_checked: 1, timestamp_confirm: 1 });
@@ -0,0 +1,15 @@
+// Migration 020: Atomic claim of the parse of a file.
+// An original upload carries inflight_hash (its file_hash) until its parse
+// completes or fails; the unique index lets only one upload of the same
+// content claim the parse, a concurrent one gets a duplicate key and joins it.
+const documentsSchema = db.getCollectionInfos({ name: "documents" })[0].options.validator.$jsonSchema;
+documentsSchema.properties.inflight_hash = { bsonType: "string" };
+db.runCommand({ collMod: "documents", validator: { $jsonSchema: documentsSchema } });
+
+db.documents.createIndex(
+  { inflight_hash: 1 },
+  { unique: true, partialFilterExpression: { inflight_hash: { $exists: true } } }
+);
+
+// Upload dedup: latest completed original with the same content
+db.documents.createIndex({ file_hash: 1, parsing_status: 1, uploaded_at: -1 });
@@ -0,0 +1,13 @@
+// Migration 021: Document fields written by the parse pipeline
+// (page progress, upload dedup, cancelled parses)
+const parseSchema = db.getCollectionInfos({ name: "documents" })[0].options.validator.$jsonSchema;
+Object.assign(parseSchema.properties, {
+  dedup_of: { bsonType: ["string", "null"] },
+  pages_done: { bsonType: "int" },
+  pages_total: { bsonType: "int" },
+});
+const statuses = parseSchema.properties.parsing_status.enum;
+if (!statuses.includes("cancelled")) {
+  statuses.push("cancelled");
+}
+db.runCommand({ collMod: "documents", validator: { $jsonSchema: parseSchema } });
@@ -0,0 +1,5 @@
+// Migration 022: ipd_parts.revision, copied from documents.revision at ingest
+// (existing parts are backfilled by migration 012)
+const partsSchema = db.getCollectionInfos({ name: "ipd_parts" })[0].options.validator.$jsonSchema;
+partsSchema.properties.revision = { bsonType: ["string", "null"] };
+db.runCommand({ collMod: "ipd_parts", validator: { $jsonSchema: partsSchema } });